@@ -1,19 +1,34 @@
-import mlflow
+import time
 
-from opinionlens.common.settings import get_settings
-from opinionlens.common.utils import get_logger
+# When the app started importing, to report the import time with the startup phases
+IMPORT_START_TIME = time.perf_counter()
+
+from opinionlens.common.settings import get_settings  # noqa: E402
+from opinionlens.common.utils import get_logger  # noqa: E402
 
 settings = get_settings()
 
 logger = get_logger("opinionlens.app")
 
 
-mlflow.set_tracking_uri(
-    settings.mlflow.remote_tracking_uri
-)
-logger.info(f"Mlflow tracking URI set as {mlflow.get_tracking_uri()}")
+def setup_mlflow(set_experiment: bool = True):
+    """Point MLflow to the remote tracking server, and set the experiment.
+
+    MLflow is imported here rather than with the package, as importing it takes a while
+    and setting the experiment is a call to the tracking server.
+
+    Args:
+        set_experiment: Whether to set the experiment too, which creates it if it doesn't exist.
+    """
+    import mlflow
+
+    mlflow.set_tracking_uri(
+        settings.mlflow.remote_tracking_uri
+    )
+    logger.info(f"Mlflow tracking URI set as {mlflow.get_tracking_uri()}")
 
-experiment = mlflow.set_experiment(
-    settings.mlflow.remote_experiment_name
-)
-logger.info(f"Mlflow experiment set as {experiment.name}")
+    if set_experiment:
+        experiment = mlflow.set_experiment(
+            settings.mlflow.remote_experiment_name
+        )
+        logger.info(f"Mlflow experiment set as {experiment.name}")
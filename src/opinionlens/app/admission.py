@@ -0,0 +1,196 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from opinionlens.app import instruments
+from opinionlens.app.exceptions import OverloadedError
+
+__all__ = ["AdmissionController"]
+
+# The weight of the latest measurement in the drain rate estimate
+DRAIN_RATE_SMOOTHING = 0.2
+# The shortest time the drain rate is measured over, so releases at the same time count as one
+DRAIN_RATE_WINDOW_SECONDS = 0.05
+
+
+class AdmissionController:
+    """Admit the inference requests of an endpoint, shedding those that would wait too long.
+
+    Requests are weighted by their number of texts. Up to `max_in_flight` texts are admitted
+    at once, and up to `max_queued` more wait their turn in arrival order. A request is rejected
+    right away when the queue is full, or when its estimated queue delay exceeds the objective.
+    A request larger than either bound isn't starved: it waits alone at the head of an empty
+    queue, and it's admitted alone once the texts ahead of it finish.
+
+    The queue delay is estimated from the drain rate, the number of texts per second admitted
+    from the queue while the endpoint is saturated. Until it's measured, only the queue bound
+    applies.
+    """
+
+    def __init__(self, endpoint: str, max_in_flight: int, max_queued: int, max_queue_delay_ms: float):
+        """
+        Args:
+            endpoint: The endpoint the requests are made to, used to label metrics.
+            max_in_flight: The maximum number of texts admitted at once. A larger request
+                is admitted alone.
+            max_queued: The maximum number of texts waiting to be admitted. A larger request
+                waits alone.
+            max_queue_delay_ms: The queue delay objective in milliseconds.
+        """
+        self.endpoint = endpoint
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.max_queue_delay = max_queue_delay_ms / 1000
+        self._in_flight = 0
+        self._queued = 0
+        self._waiters: deque[tuple[int, asyncio.Future]] = deque()
+        self._drain_rate: float | None = None
+        self._window_start: float | None = None
+        self._window_weight = 0
+
+    @property
+    def in_flight(self) -> int:
+        """The number of texts of the admitted requests."""
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        """The number of texts of the requests waiting to be admitted."""
+        return self._queued
+
+    def _fits(self, weight: int) -> bool:
+        return self._in_flight + weight <= self.max_in_flight or self._in_flight == 0
+
+    def estimate_queue_delay(self, weight: int) -> float | None:
+        """Estimate how long a request would wait to be admitted.
+
+        Args:
+            weight: The number of texts of the request.
+
+        Returns:
+            The estimated delay in seconds, or `None` if the drain rate isn't measured yet.
+        """
+        if not self._waiters and self._fits(weight):
+            return 0.0
+        if not self._drain_rate:
+            return None
+
+        # The texts that must finish before the request, and everything queued ahead of it, fit.
+        # A request larger than `max_in_flight` waits for every text ahead of it, and no more.
+        backlog = self._queued + self._in_flight + min(weight, self.max_in_flight) - self.max_in_flight
+        return max(backlog, 0) / self._drain_rate
+
+    def _reject(self, reason: str, retry_after: float | None):
+        instruments.child(instruments.ADMISSION_REJECTED_TOTAL, self.endpoint, reason).inc()
+        raise OverloadedError(
+            f"Too many inference requests to {self.endpoint}, try again later.",
+            retry_after=retry_after if retry_after is not None else self.max_queue_delay,
+        )
+
+    def _set_gauges(self):
+        instruments.child(instruments.ADMISSION_IN_FLIGHT_TEXTS, self.endpoint).set(self._in_flight)
+        instruments.child(instruments.ADMISSION_QUEUED_TEXTS, self.endpoint).set(self._queued)
+
+    def _measure_drain(self, weight: int):
+        """Count the texts admitted from the queue into the drain rate, over short windows."""
+        now = time.monotonic()
+        if self._window_start is None:
+            self._window_start = now
+            self._window_weight = 0
+
+        self._window_weight += weight
+        elapsed = now - self._window_start
+        if elapsed < DRAIN_RATE_WINDOW_SECONDS:
+            return
+
+        rate = self._window_weight / elapsed
+        if self._drain_rate is None:
+            self._drain_rate = rate
+        else:
+            self._drain_rate += DRAIN_RATE_SMOOTHING * (rate - self._drain_rate)
+        self._window_start = now
+        self._window_weight = 0
+
+    def _admit_waiters(self):
+        """Admit the waiting requests in arrival order, as long as they fit."""
+        while self._waiters:
+            weight, future = self._waiters[0]
+            if future.cancelled():
+                self._waiters.popleft()
+                self._queued -= weight
+                continue
+            if not self._fits(weight):
+                break
+
+            self._waiters.popleft()
+            self._queued -= weight
+            self._in_flight += weight
+            self._measure_drain(weight)
+            future.set_result(None)
+
+        if not self._waiters:
+            # The endpoint isn't saturated anymore, the next window starts with the next backlog
+            self._window_start = None
+
+        self._set_gauges()
+
+    async def _acquire(self, weight: int):
+        if not self._waiters and self._fits(weight):
+            self._in_flight += weight
+            self._set_gauges()
+            instruments.child(instruments.ADMISSION_QUEUE_DELAY_SECONDS, self.endpoint).observe(0.0)
+            return
+
+        delay = self.estimate_queue_delay(weight)
+        if self._queued + weight > self.max_queued and self._waiters:
+            self._reject("queue_full", delay)
+        if delay is not None and delay > self.max_queue_delay:
+            self._reject("queue_delay", delay)
+
+        waiter = (weight, asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        self._queued += weight
+        self._set_gauges()
+
+        start_time = time.perf_counter()
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            if waiter[1].cancelled():
+                # Still waiting, unless skipped by `_admit_waiters` already
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    self._queued -= weight
+                # A large request leaving the head of the queue may let the next ones in
+                self._admit_waiters()
+            else:
+                # Admitted right before the request was cancelled
+                self._release(weight)
+            raise
+
+        instruments.child(instruments.ADMISSION_QUEUE_DELAY_SECONDS, self.endpoint).observe(
+            time.perf_counter() - start_time
+        )
+
+    def _release(self, weight: int):
+        self._in_flight -= weight
+        self._admit_waiters()
+
+    @asynccontextmanager
+    async def admit(self, weight: int):
+        """Wait for the request to be admitted, and hold its place while the block runs.
+
+        Args:
+            weight: The number of texts of the request.
+
+        Raises:
+            OverloadedError: The request was rejected, the queue is full or the request would
+                wait longer than the queue delay objective.
+        """
+        await self._acquire(weight)
+        instruments.child(instruments.ADMISSION_ADMITTED_TOTAL, self.endpoint).inc()
+        try:
+            yield
+        finally:
+            self._release(weight)
@@ -0,0 +1,224 @@
+import fcntl
+import os
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from opinionlens.common.settings import get_settings
+from opinionlens.common.utils import get_logger
+
+settings = get_settings()
+
+__all__ = ["artifact_store"]
+
+# Prefix of the directories of the downloads in progress, kept to resume failed downloads
+PARTIAL_PREFIX = ".partial-"
+# Prefix of the directories of the models being deleted
+DELETING_PREFIX = ".deleting-"
+# The directory of the references to the models, one directory of owners per model
+REFERENCES_DIRNAME = ".references"
+
+
+class ArtifactStore:
+    """A local store of model artifacts, shared by the replicas on the same host.
+
+    Artifacts are addressed by model ID, which identifies immutable content in the registry.
+    Each model is downloaded once into a partial directory, file by file and in parallel,
+    then atomically renamed into place, so a model directory in the store is always complete.
+    Files finished by a failed download are kept and the next attempt resumes from them.
+
+    Replicas coordinate through a lock file per model, so only one of them downloads a model
+    while the others wait and reuse it. Each replica using a model holds a reference to it,
+    and the model is deleted from the store once the last reference is released.
+    """
+
+    def __init__(self, root: str, max_workers: int):
+        """
+        Args:
+            root: The directory of the store, e.g. a volume shared by the replicas.
+            max_workers: The number of files downloaded in parallel.
+        """
+        self.root = root
+        self.max_workers = max_workers
+        self._logger = get_logger(self.__class__.__name__, level=settings.api.logging_level)
+
+    def get_path(self, model_id: str) -> str:
+        """Get the path of the model artifacts in the store."""
+        return os.path.join(self.root, model_id)
+
+    def _get_partial_path(self, model_id: str) -> str:
+        return os.path.join(self.root, PARTIAL_PREFIX + model_id)
+
+    def _get_references_path(self, model_id: str) -> str:
+        return os.path.join(self.root, REFERENCES_DIRNAME, model_id)
+
+    def _add_reference(self, model_id: str, owner: str):
+        """Must be called with the lock of the model held."""
+        references_path = self._get_references_path(model_id)
+        os.makedirs(references_path, exist_ok=True)
+        open(os.path.join(references_path, owner), "w").close()
+
+    def get_owners(self, model_id: str) -> list[str]:
+        """Get the owners holding a reference to the model."""
+        references_path = self._get_references_path(model_id)
+        return sorted(os.listdir(references_path)) if os.path.isdir(references_path) else []
+
+    @contextmanager
+    def _lock(self, model_id: str):
+        """Hold the lock of the model across processes, and across threads of this process."""
+        with open(os.path.join(self.root, f".{model_id}.lock"), "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _list_files(self, repository, path: str | None = None) -> list[tuple[str, int | None]]:
+        """List the artifact files recursively, with their sizes when the repository knows them."""
+        files = []
+        for file_info in repository.list_artifacts(path):
+            if file_info.is_dir:
+                files.extend(self._list_files(repository, file_info.path))
+            else:
+                files.append((file_info.path, file_info.file_size))
+        return files
+
+    def _download_file(self, repository, partial_path: str, path: str, size: int | None) -> bool:
+        """Download a file into the partial directory, unless a previous attempt did already.
+
+        Returns:
+            Whether the file was downloaded.
+        """
+        dst_path = os.path.join(partial_path, path)
+        if os.path.exists(dst_path) and (size is None or os.path.getsize(dst_path) == size):
+            return False
+
+        # Download to a scratch directory first, so files in place are always complete
+        scratch_path = os.path.join(partial_path, f".incoming-{uuid.uuid4().hex}")
+        os.makedirs(scratch_path)
+        try:
+            local_path = repository.download_artifacts(path, scratch_path)
+            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+            os.replace(local_path, dst_path)
+        finally:
+            shutil.rmtree(scratch_path, ignore_errors=True)
+
+        return True
+
+    def ensure(self, model_uri: str, model_id: str, owner: str) -> str:
+        """Make sure the model artifacts are in the store, downloading them if they aren't.
+
+        The owner holds a reference to the model until it releases it.
+
+        Args:
+            model_uri: The URI of the model artifacts, e.g. 'models:/<name>/<version>'.
+            model_id: The ID of the model.
+            owner: The ID of the replica using the model.
+
+        Returns:
+            The path of the model artifacts in the store.
+
+        Raises:
+            MlflowException: An error occurred downloading the model. Files already downloaded
+                are kept for the next attempt.
+        """
+        store_path = self.get_path(model_id)
+
+        # Created on the first download rather than with the store, so importing the app has no side effects
+        os.makedirs(self.root, exist_ok=True)
+        with self._lock(model_id):
+            # The reference is taken under the lock, so the last owner can't delete the model meanwhile
+            if os.path.isdir(store_path):
+                self._add_reference(model_id, owner)
+                self._logger.debug(f"Model {model_id!r} found in the artifact store at {store_path!r}.")
+                return store_path
+
+            from mlflow.exceptions import MlflowException
+            from mlflow.store.artifact.artifact_repository_registry import get_artifact_repository
+
+            partial_path = self._get_partial_path(model_id)
+            os.makedirs(partial_path, exist_ok=True)
+            # Drop the files a killed process was still downloading
+            for entry in os.scandir(partial_path):
+                if entry.name.startswith(".incoming-"):
+                    shutil.rmtree(entry.path, ignore_errors=True)
+
+            repository = get_artifact_repository(model_uri)
+            files = self._list_files(repository)
+            if not files:
+                raise MlflowException(f"No artifacts found at {model_uri!r}.")
+
+            with ThreadPoolExecutor(self.max_workers, thread_name_prefix="artifact-download") as executor:
+                downloaded = list(executor.map(
+                    lambda file: self._download_file(repository, partial_path, *file), files
+                ))
+
+            os.rename(partial_path, store_path)
+            self._add_reference(model_id, owner)
+
+        self._logger.info(
+            f"Model {model_id!r} saved in the artifact store at {store_path!r}, "
+            f"{sum(downloaded)} of {len(files)} files downloaded."
+        )
+        return store_path
+
+    def add_reference(self, model_id: str, owner: str) -> bool:
+        """Take a reference to a model already in the store, e.g. one linked before references existed.
+
+        Args:
+            model_id: The ID of the model.
+            owner: The ID of the replica using the model.
+
+        Returns:
+            Whether the model is in the store.
+        """
+        if not os.path.isdir(self.get_path(model_id)):
+            return False
+
+        with self._lock(model_id):
+            if not os.path.isdir(self.get_path(model_id)):
+                return False
+            self._add_reference(model_id, owner)
+        return True
+
+    def release(self, model_id: str, owner: str) -> bool:
+        """Release the owner's reference to a model, deleting the model once no owner references it.
+
+        Args:
+            model_id: The ID of the model.
+            owner: The ID of the replica that used the model.
+
+        Returns:
+            Whether the model was deleted from the store.
+        """
+        if not os.path.isdir(self.root):
+            return False
+
+        with self._lock(model_id):
+            references_path = self._get_references_path(model_id)
+            try:
+                os.remove(os.path.join(references_path, owner))
+            except FileNotFoundError:
+                pass
+            if self.get_owners(model_id):
+                return False
+
+            shutil.rmtree(references_path, ignore_errors=True)
+            store_path = self.get_path(model_id)
+            if not os.path.isdir(store_path):
+                return False
+
+            # Renamed under the lock, so the model is gone at once, and deleted after
+            deleting_path = os.path.join(self.root, f"{DELETING_PREFIX}{model_id}-{uuid.uuid4().hex}")
+            os.rename(store_path, deleting_path)
+
+        shutil.rmtree(deleting_path, ignore_errors=True)
+        self._logger.info(f"Model {model_id!r} deleted from the artifact store, no replica uses it anymore.")
+        return True
+
+
+artifact_store = ArtifactStore(
+    root=settings.api.artifact_store_path,
+    max_workers=settings.api.artifact_download_workers,
+)
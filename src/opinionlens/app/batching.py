@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+from opinionlens.app import instruments
+from opinionlens.app.executors import InferenceExecutor
+from opinionlens.app.models import Model
+
+__all__ = ["MicroBatcher"]
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-text predictions into `Model.batch_predict` calls.
+
+    Texts are queued per model and flushed as one batch once `max_batch_size`
+    texts are waiting, or once the oldest queued text has waited `max_wait_ms`.
+    """
+
+    def __init__(self, executor: InferenceExecutor, max_batch_size: int, max_wait_ms: float):
+        """
+        Args:
+            executor: The executor running the batches.
+            max_batch_size: The maximum number of texts in a single batch.
+            max_wait_ms: The maximum time in milliseconds a text waits for a batch to fill.
+        """
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending: dict[Model, list[tuple[str, asyncio.Future, float]]] = {}
+        self._timers: dict[Model, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def predict(self, model: Model, text: str) -> int:
+        """Queue the text for the next batch of the given model and wait for its prediction.
+
+        Args:
+            model: The model object to make the prediction.
+            text: The input text.
+
+        Returns:
+            Either 0 for negative sentiment, or 1 for positive sentiment.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        pending = self._pending.setdefault(model, [])
+        pending.append((text, future, time.perf_counter()))
+
+        if len(pending) >= self.max_batch_size:
+            self._flush(model)
+        elif model not in self._timers:
+            self._timers[model] = loop.call_later(self.max_wait, self._flush, model)
+
+        return await future
+
+    def _flush(self, model: Model):
+        """Send all queued texts of the model to the executor as one batch."""
+        timer = self._timers.pop(model, None)
+        if timer is not None:
+            timer.cancel()
+
+        pending = self._pending.pop(model, [])
+        # Skip requests that were cancelled while waiting for the batch
+        pending = [item for item in pending if not item[1].done()]
+        if not pending:
+            return
+
+        flush_time = time.perf_counter()
+        instruments.observe_many(
+            instruments.MICRO_BATCH_QUEUE_WAIT_SECONDS,
+            (flush_time - enqueue_time for _, _, enqueue_time in pending),
+        )
+        instruments.MICRO_BATCH_SIZE.observe(len(pending))
+
+        # Keep a reference so the task isn't garbage collected before it's done
+        task = asyncio.create_task(self._run_batch(model, pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, model: Model, pending: list[tuple[str, asyncio.Future, float]]):
+        """Run the batch on the executor and resolve the futures of its texts."""
+        try:
+            predictions = await self.executor.run(
+                model, "batch_predict", [text for text, _, _ in pending], endpoint="/predict"
+            )
+        except Exception as e:
+            for _, future, _ in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), prediction in zip(pending, predictions):
+            if not future.done():
+                future.set_result(prediction)
@@ -0,0 +1,144 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from opinionlens.app import instruments
+from opinionlens.common.settings import get_settings
+
+settings = get_settings()
+
+__all__ = ["prediction_cache"]
+
+# Rough size of the key tuple, the value tuple and the ordered dict node of an entry
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+class PredictionCache:
+    """A bounded LRU cache of predictions with a time to live.
+
+    Entries are keyed by the model ID and the preprocessed text, so input texts that
+    normalize to the same string share an entry.
+
+    With the process executor, models predict in the worker processes, so each worker has its
+    own cache. A worker starts with a copy of the API process's cache, and its cache is discarded
+    with it when the worker pool is replaced after the loaded models change.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        """
+        Args:
+            max_size: The maximum number of entries, 0 disables the cache.
+            ttl_seconds: The number of seconds an entry stays valid.
+        """
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self._entries: OrderedDict[tuple[str, str], tuple[int, float]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _entry_size(text: str) -> int:
+        return sys.getsizeof(text) + _ENTRY_OVERHEAD_BYTES
+
+    def _remove(self, key: tuple[str, str]):
+        """Remove an entry. Must be called with the lock held."""
+        del self._entries[key]
+        self._bytes -= self._entry_size(key[1])
+
+    def _update_size_metrics(self):
+        instruments.PREDICTION_CACHE_ENTRIES.set(len(self._entries))
+        instruments.PREDICTION_CACHE_BYTES.set(self._bytes)
+
+    def get_many(self, model_id: str, texts: list[str]) -> list[int | None]:
+        """Look up the cached predictions of the given texts.
+
+        Args:
+            model_id: The ID of the model making the predictions.
+            texts: A list of preprocessed texts.
+
+        Returns:
+            A list with the cached prediction of each text, or `None` for texts not in the cache.
+        """
+        if self.max_size == 0:
+            return [None] * len(texts)
+
+        now = time.monotonic()
+        results = []
+        expired = 0
+
+        with self._lock:
+            for text in texts:
+                key = (model_id, text)
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] <= now:
+                    self._remove(key)
+                    expired += 1
+                    entry = None
+
+                if entry is None:
+                    results.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    results.append(entry[0])
+
+            if expired:
+                self._update_size_metrics()
+
+        hits = sum(1 for result in results if result is not None)
+        instruments.PREDICTION_CACHE_HITS_TOTAL.inc(hits)
+        instruments.PREDICTION_CACHE_MISSES_TOTAL.inc(len(results) - hits)
+        if expired:
+            instruments.PREDICTION_CACHE_EVICTIONS_TOTAL.labels("expired").inc(expired)
+
+        return results
+
+    def put_many(self, model_id: str, texts: list[str], predictions: list[int]):
+        """Cache the predictions of the given texts, evicting the least recently used entries.
+
+        Args:
+            model_id: The ID of the model that made the predictions.
+            texts: A list of preprocessed texts.
+            predictions: The predictions of the texts.
+        """
+        if self.max_size == 0:
+            return
+
+        expiry = time.monotonic() + self.ttl
+        evicted = 0
+
+        with self._lock:
+            for text, prediction in zip(texts, predictions):
+                key = (model_id, text)
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                else:
+                    self._bytes += self._entry_size(text)
+                self._entries[key] = (prediction, expiry)
+
+            while len(self._entries) > self.max_size:
+                key, _ = self._entries.popitem(last=False)
+                self._bytes -= self._entry_size(key[1])
+                evicted += 1
+
+            self._update_size_metrics()
+
+        if evicted:
+            instruments.PREDICTION_CACHE_EVICTIONS_TOTAL.labels("capacity").inc(evicted)
+
+    def invalidate(self, model_id: str):
+        """Remove all the entries of the given model.
+
+        Args:
+            model_id: The ID of the model.
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == model_id]:
+                self._remove(key)
+            self._update_size_metrics()
+
+
+prediction_cache = PredictionCache(
+    max_size=settings.api.prediction_cache_size,
+    ttl_seconds=settings.api.prediction_cache_ttl_seconds,
+)
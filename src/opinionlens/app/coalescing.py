@@ -0,0 +1,86 @@
+import asyncio
+from functools import partial
+from typing import Awaitable, Callable
+
+from opinionlens.app import instruments
+from opinionlens.app.models import Model
+
+__all__ = ["SingleFlight"]
+
+
+class SingleFlight:
+    """Share in-flight predictions between the concurrent requests for the same texts.
+
+    A text requested while the same model is already predicting it for another request to the
+    same endpoint waits for that prediction instead of being predicted again. Endpoints don't
+    share predictions, so a single prediction never waits for a whole batch. Texts are matched
+    as sent, before cleaning, and stop being shared once predicted, when the prediction cache
+    takes over.
+
+    Predictions run in their own task, so a request that's cancelled doesn't cancel the
+    predictions other requests are waiting for.
+    """
+
+    def __init__(self):
+        # Keyed by endpoint, model ID, and text
+        self._in_flight: dict[tuple[str, str, str], tuple[asyncio.Task, int]] = {}
+
+    def _finish(self, keys: list[tuple[str, str, str]], task: asyncio.Task):
+        for key in keys:
+            if self._in_flight.get(key, (None,))[0] is task:
+                del self._in_flight[key]
+        if not task.cancelled():
+            # Retrieved here as well, in case all the requests waiting for it were cancelled
+            task.exception()
+
+    async def predict(
+        self,
+        model: Model,
+        texts: list[str],
+        predict_texts: Callable[[list[str]], Awaitable[list[int]]],
+        endpoint: str,
+    ) -> list[int]:
+        """Predict the texts, sharing the predictions of the texts already in flight.
+
+        Args:
+            model: The model object to make the predictions.
+            texts: The input texts.
+            predict_texts: Predicts the texts that aren't in flight yet with the model.
+            endpoint: The endpoint the request is made to. Only requests to the same endpoint
+                share predictions.
+
+        Returns:
+            The predictions of the texts, in order.
+        """
+        # Where the prediction of each text comes from, a task and an index in its predictions
+        sources = []
+        owned = []
+        for text in texts:
+            source = self._in_flight.get((endpoint, model.model_id, text))
+            if source is None:
+                sources.append((None, len(owned)))
+                owned.append(text)
+            else:
+                sources.append(source)
+
+        if len(owned) < len(texts):
+            instruments.child(instruments.COALESCED_TEXTS_TOTAL, endpoint).inc(len(texts) - len(owned))
+
+        if owned:
+            task = asyncio.ensure_future(predict_texts(owned))
+            keys = []
+            for index, text in enumerate(owned):
+                key = (endpoint, model.model_id, text)
+                # Repeated texts of the request are shared from their first occurrence
+                if key not in self._in_flight:
+                    self._in_flight[key] = (task, index)
+                    keys.append(key)
+            task.add_done_callback(partial(self._finish, keys))
+            sources = [(task, index) if source is None else (source, index) for source, index in sources]
+
+        results = {}
+        for source, _ in sources:
+            if source not in results:
+                results[source] = await asyncio.shield(source)
+
+        return [results[source][index] for source, index in sources]
@@ -0,0 +1,112 @@
+import struct
+
+from pydantic import TypeAdapter
+
+__all__ = [
+    "JSON_MEDIA_TYPE",
+    "TEXT_MEDIA_TYPE",
+    "BINARY_MEDIA_TYPE",
+    "BATCH_PARSERS",
+    "parse_json_batch",
+    "parse_text_batch",
+    "parse_binary_batch",
+    "pack_predictions",
+    "negotiate",
+]
+
+JSON_MEDIA_TYPE = "application/json"
+TEXT_MEDIA_TYPE = "text/plain"
+BINARY_MEDIA_TYPE = "application/octet-stream"
+
+# Each text of a binary batch is prefixed with its length in bytes, as a little-endian unsigned 32-bit integer
+_LENGTH = struct.Struct("<I")
+
+_json_batch = TypeAdapter(list[str])
+
+
+def parse_json_batch(body: bytes) -> list[str]:
+    """Parse a JSON array of strings, validating it in a single pass.
+
+    Raises:
+        pydantic.ValidationError: The body isn't valid JSON or isn't an array of strings.
+    """
+    return _json_batch.validate_json(body)
+
+
+def parse_text_batch(body: bytes) -> list[str]:
+    """Parse newline-delimited UTF-8 texts, one text per line.
+
+    Lines may end with '\\r\\n', and the last line may end with a line ending or not. Empty
+    lines are empty texts, so predictions line up with the lines.
+
+    Raises:
+        ValueError: The body isn't valid UTF-8.
+    """
+    if not body:
+        return []
+
+    texts = body.decode("utf-8").split("\n")
+    if not texts[-1]:
+        texts.pop()
+    if b"\r" in body:
+        texts = [text.removesuffix("\r") for text in texts]
+    return texts
+
+
+def parse_binary_batch(body: bytes) -> list[str]:
+    """Parse length-prefixed UTF-8 texts.
+
+    Each text is its length in bytes, as a little-endian unsigned 32-bit integer, followed by
+    its UTF-8 bytes.
+
+    Raises:
+        ValueError: A text is truncated or isn't valid UTF-8.
+    """
+    texts = []
+    append = texts.append
+    unpack = _LENGTH.unpack_from
+    offset = 0
+    try:
+        while offset < len(body):
+            (length,) = unpack(body, offset)
+            start = offset + _LENGTH.size
+            offset = start + length
+            # A truncated last text is caught below, as slicing past the end doesn't fail
+            append(body[start:offset].decode("utf-8"))
+    except struct.error:
+        raise ValueError(f"Truncated length prefix at byte {offset}.")
+
+    if offset > len(body):
+        raise ValueError(f"Text at byte {start} is truncated, expected {length} bytes.")
+
+    return texts
+
+
+BATCH_PARSERS = {
+    JSON_MEDIA_TYPE: parse_json_batch,
+    TEXT_MEDIA_TYPE: parse_text_batch,
+    BINARY_MEDIA_TYPE: parse_binary_batch,
+}
+
+
+def pack_predictions(predictions: list[int]) -> bytes:
+    """Pack class IDs into one unsigned byte each, in order, without a per-item object."""
+    return bytes(predictions)
+
+
+def negotiate(accept: str | None, offered: tuple[str, ...]) -> str:
+    """Pick the offered media type listed first in an Accept header, ignoring quality values.
+
+    Args:
+        accept: The Accept header, if any.
+        offered: The media types the response can be encoded as, the default first.
+
+    Returns:
+        The media type to encode the response as.
+    """
+    if accept:
+        for media_range in accept.split(","):
+            media_type = media_range.split(";")[0].strip().lower()
+            if media_type in offered:
+                return media_type
+    return offered[0]
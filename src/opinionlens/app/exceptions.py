@@ -18,3 +18,21 @@ class ModelNotAvailableError(ExceptionWithMessage):
 class OperationalError(ExceptionWithMessage):
     """An operational error has occurred."""
     pass
+
+
+class JobNotFoundError(ExceptionWithMessage):
+    """A requested job doesn't exist."""
+    pass
+
+
+class OverloadedError(ExceptionWithMessage):
+    """A request was shed to keep the others within the queue delay objective."""
+
+    def __init__(self, message: str, retry_after: float):
+        """
+        Args:
+            message: A user-friendly message explaining the error.
+            retry_after: The estimated number of seconds until the request would be admitted.
+        """
+        self.retry_after = retry_after
+        super().__init__(message)
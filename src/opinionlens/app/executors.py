@@ -0,0 +1,459 @@
+import asyncio
+import concurrent.futures.process
+import gc
+import math
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any
+
+from opinionlens.app import instruments, timing
+from opinionlens.app.exceptions import ModelNotAvailableError, OperationalError
+from opinionlens.app.managers import model_manager
+from opinionlens.app.models import Model
+from opinionlens.common.settings import get_settings
+
+settings = get_settings()
+
+__all__ = ["inference_executor"]
+
+
+def _call_model(
+    submit_time: float, sampled: bool, model: Model, method: str, payload: Any
+) -> tuple[float, float, dict[str, float] | None, Any]:
+    """Run the model method in a pool thread.
+
+    Returns:
+        The queue wait, the run time in seconds, the stage timings, and the result.
+    """
+    queue_wait = time.monotonic() - submit_time
+    start_time = time.perf_counter()
+    with timing.record(sampled) as timings:
+        result = getattr(model, method)(payload)
+    return queue_wait, time.perf_counter() - start_time, timings, result
+
+
+def _call_worker_model(
+    submit_time: float, sampled: bool, model_id: str, method: str, payload: Any
+) -> tuple[float, float, dict[str, float] | None, Any]:
+    """Run the model method in a pool process.
+
+    Worker processes are forked from the API process after the models are loaded, so the
+    model is looked up in the model manager they inherited instead of being pickled with every call.
+    Workers never load models themselves, the API process loads them and forks new workers.
+
+    Returns:
+        The queue wait, the run time in seconds, the stage timings, and the result.
+
+    Raises:
+        ModelNotAvailableError: The model was evicted from the API process before the worker was forked.
+    """
+    queue_wait = time.monotonic() - submit_time
+    model = model_manager.get_loaded_model(model_id)
+    start_time = time.perf_counter()
+    with timing.record(sampled) as timings:
+        result = getattr(model, method)(payload)
+    return queue_wait, time.perf_counter() - start_time, timings, result
+
+
+def _forget_inherited_pools():
+    """Forget the process pools of the API process in a forked worker.
+
+    When a process exits, `concurrent.futures` wakes the manager thread of every process pool it
+    knows of, taking a lock that another thread of the API process may have held at fork time.
+    The manager threads only run in the API process, so a worker has nothing to wake.
+    """
+    wakeups = getattr(concurrent.futures.process, "_threads_wakeups", None)
+    if wakeups is not None:
+        wakeups.clear()
+
+
+def _init_worker():
+    """Restore the default signal handling in a forked worker, and warm up the models it inherited.
+
+    Workers inherit the handlers the server installed in the API process, which only ask the
+    server to exit, so a worker would otherwise ignore SIGTERM and outlive the API process. SIGINT
+    is ignored, as Ctrl+C reaches the whole process group and the API process shuts the pool down.
+
+    A worker takes no calls before its initializer returns, so no call runs on a cold model.
+    """
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    for model_id in model_manager.get_loaded_model_ids():
+        try:
+            model_manager.get_loaded_model(model_id).batch_predict(settings.api.warmup_texts)
+        except Exception:
+            # A model that fails on the warm-up texts fails its calls too, where it's reported
+            pass
+
+
+class InferenceExecutor:
+    """Run CPU-bound inference on a dedicated pool, off the asyncio event loop.
+
+    At most `max_workers` calls run at once, and at most `max_queue_size` more wait for
+    a free worker. Calls beyond that are rejected instead of queuing without bound. Background
+    calls, made by scoring jobs, aren't rejected, and wait for the interactive calls with `wait_idle`.
+
+    Process workers are forked from the API process, sharing its loaded models copy-on-write.
+    Whenever the loaded models change, a replacement pool is forked and warmed up in a background
+    thread with the current models, then swapped in. Until then, calls keep running on the current
+    workers, except calls for models they don't have, which wait for the replacement.
+
+    Large batches are split into sub-batches that run concurrently, each on its own worker.
+    """
+
+    def __init__(self, kind: str, max_workers: int, max_queue_size: int, sub_batch_size: int):
+        """
+        Args:
+            kind: Either 'thread' or 'process', the type of the worker pool.
+            max_workers: The number of workers in the pool.
+            max_queue_size: The maximum number of calls waiting for a free worker.
+            sub_batch_size: The maximum number of texts of a sub-batch, 0 runs batches whole.
+        """
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.sub_batch_size = sub_batch_size
+        self._pool: Executor | None = None
+        # The IDs of the models the process workers inherited
+        self._pool_model_ids: frozenset[str] = frozenset()
+        # Bumped whenever the loaded models change, so a pool forked meanwhile is forked again
+        self._pool_generation = 0
+        self._pool_lock = threading.Lock()
+        # Resolved once the replacement pool being forked is swapped in
+        self._forking: Future | None = None
+        self._in_flight = 0
+        self._interactive_in_flight = 0
+        # Set while no interactive call is in flight, background work waits on it
+        self._idle = threading.Event()
+        self._idle.set()
+
+    def _fork_process_pool(self) -> tuple[ProcessPoolExecutor, frozenset[str]]:
+        """Fork all worker processes at once from the current state of the API process.
+
+        Runs in a thread, without holding any lock, so the workers don't inherit a lock that's held.
+
+        Returns:
+            The pool, and the IDs of the models its workers inherited.
+        """
+        model_ids = model_manager.get_loaded_model_ids()
+        # Keep the garbage collector of the workers from touching (and copying) the shared objects
+        gc.freeze()
+        try:
+            pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=_init_worker,
+            )
+            # With the fork start method, the first submission starts every worker
+            pool.submit(os.getpid).result()
+        finally:
+            gc.unfreeze()
+        return pool, model_ids
+
+    def _start_forking(self) -> Future:
+        """Fork a replacement process pool in a background thread.
+
+        Must be called with the pool lock held, when no replacement is being forked.
+
+        Returns:
+            A future resolved once the replacement is swapped in, or discarded by a shutdown.
+        """
+        forking = self._forking = Future()
+        threading.Thread(
+            target=self._replace_process_pool, args=(forking,), name="inference-pool-forker", daemon=True
+        ).start()
+        return forking
+
+    def _replace_process_pool(self, forking: Future):
+        """Fork and warm up a new process pool, then swap it in, forking again if the models changed meanwhile."""
+        forking.set_running_or_notify_cancel()
+        retired = None
+        try:
+            while True:
+                with self._pool_lock:
+                    generation = self._pool_generation
+
+                pool, model_ids = self._fork_process_pool()
+
+                with self._pool_lock:
+                    if self._forking is not forking:
+                        # Shut down meanwhile
+                        retired = pool
+                        break
+                    if self._pool_generation == generation:
+                        retired, self._pool, self._pool_model_ids = self._pool, pool, model_ids
+                        self._forking = None
+                        break
+                pool.shutdown(wait=False)
+        except BaseException as e:
+            with self._pool_lock:
+                if self._forking is forking:
+                    self._forking = None
+            forking.set_exception(e)
+            return
+
+        forking.set_result(None)
+        if retired is not None:
+            # Calls already submitted to the retired pool still run to completion
+            retired.shutdown(wait=False)
+
+    async def _get_process_pool(self, model_id: str) -> tuple[Executor, frozenset[str]]:
+        """Return the process pool and the models its workers inherited.
+
+        If the current workers don't have the model, waits for the replacement being forked,
+        forking one if there's no pool yet.
+        """
+        while True:
+            with self._pool_lock:
+                if self._pool is not None and (model_id in self._pool_model_ids or self._forking is None):
+                    return self._pool, self._pool_model_ids
+                forking = self._forking or self._start_forking()
+
+            # A cancelled call doesn't cancel the fork the other calls are waiting for
+            await asyncio.shield(asyncio.wrap_future(forking))
+
+    async def _get_worker_pool(self, model: Model) -> Executor:
+        """Return a process pool whose workers have the model loaded.
+
+        Raises:
+            ModelNotAvailableError: The model was deleted.
+        """
+        pool, model_ids = await self._get_process_pool(model.model_id)
+        if model.model_id in model_ids:
+            return pool
+
+        # Evicted since the caller got it. Loading it again forks a replacement pool with it.
+        await asyncio.to_thread(model_manager.get_model, model.model_id)
+        pool, model_ids = await self._get_process_pool(model.model_id)
+        if model.model_id not in model_ids:
+            raise ModelNotAvailableError(f"Model {model.model_id!r} isn't loaded.")
+        return pool
+
+    def _get_pool(self) -> Executor:
+        """Create the thread pool on first use."""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="inference",
+                )
+            return self._pool
+
+    def recycle(self):
+        """Fork a replacement process pool with the current models off the request path.
+
+        Called whenever the loaded models change. If a replacement is already being forked, it's
+        forked again once done, so a burst of changes forks one pool for the last of them.
+        """
+        if self.kind != "process":
+            return
+
+        with self._pool_lock:
+            self._pool_generation += 1
+            if self._forking is None:
+                self._start_forking()
+
+    def _reset_after_fork(self):
+        """Replace the pool lock in a forked child, where the thread holding it at fork time doesn't exist."""
+        self._pool_lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        """The number of calls running or waiting on the pool."""
+        return self._in_flight
+
+    def wait_idle(self, timeout: float) -> bool:
+        """Block until no interactive call is in flight, up to the timeout.
+
+        Called from background threads between units of background work.
+
+        Args:
+            timeout: The maximum wait in seconds.
+
+        Returns:
+            Whether the executor is idle, `False` if the wait timed out.
+        """
+        return self._idle.wait(timeout)
+
+    def _enter(self, background: bool):
+        self._in_flight += 1
+        instruments.INFERENCE_IN_FLIGHT.inc()
+        if not background:
+            self._interactive_in_flight += 1
+            self._idle.clear()
+
+    def _exit(self, background: bool):
+        self._in_flight -= 1
+        instruments.INFERENCE_IN_FLIGHT.dec()
+        if not background:
+            self._interactive_in_flight -= 1
+            if not self._interactive_in_flight:
+                self._idle.set()
+
+    async def _run(
+        self, model: Model, method: str, payload: Any, endpoint: str, background: bool = False
+    ) -> tuple[Any, float]:
+        """Run a model method on the pool, returning its result and its run time in seconds."""
+        # Background calls are bounded by the number of threads making them instead
+        if not background and self._in_flight >= self.max_workers + self.max_queue_size:
+            raise OperationalError("Inference queue is full, try again later.")
+
+        # Reserved before waiting for the process pool, so concurrent calls can't all pass the check
+        self._enter(background)
+        try:
+            if self.kind == "process":
+                pool = await self._get_worker_pool(model)
+                submit_time = time.monotonic()
+                sampled = timing.sample()
+                future = pool.submit(_call_worker_model, submit_time, sampled, model.model_id, method, payload)
+            else:
+                pool = self._get_pool()
+                submit_time = time.monotonic()
+                sampled = timing.sample()
+                future = pool.submit(_call_model, submit_time, sampled, model, method, payload)
+
+            queue_wait, run_time, timings, result = await asyncio.wrap_future(future)
+        finally:
+            self._exit(background)
+
+        instruments.child(instruments.INFERENCE_QUEUE_WAIT_SECONDS, endpoint).observe(queue_wait)
+        timing.observe(timings, model.model_id, endpoint)
+
+        return result, run_time
+
+    async def run(
+        self, model: Model, method: str, payload: Any, endpoint: str, background: bool = False
+    ) -> Any:
+        """Run a model method on the pool and wait for its result.
+
+        Cancelling the awaiting task cancels the call if it hasn't started yet.
+
+        Args:
+            model: The model object.
+            method: The name of the model method, e.g. 'predict' or 'batch_predict'.
+            payload: The argument passed to the model method.
+            endpoint: The endpoint the call is made for, used to label metrics.
+                A sample of the calls records the timings of the model's stages.
+            background: Whether the call is background work, which isn't rejected when the
+                queue is full and doesn't keep `wait_idle` waiting.
+
+        Returns:
+            The result of the model method.
+
+        Raises:
+            OperationalError: The inference queue is full.
+            ModelNotAvailableError: The model was deleted, with the process pool.
+        """
+        result, _ = await self._run(model, method, payload, endpoint, background)
+        return result
+
+    def split(self, texts: list[str]) -> list[list[str]]:
+        """Split the texts into as few sub-batches as `sub_batch_size` allows, of even sizes."""
+        if not self.sub_batch_size or len(texts) <= self.sub_batch_size:
+            return [texts]
+
+        size = math.ceil(len(texts) / math.ceil(len(texts) / self.sub_batch_size))
+        return [texts[i:i + size] for i in range(0, len(texts), size)]
+
+    async def _run_sub_batch(self, model: Model, method: str, texts: list[str], endpoint: str) -> list[int]:
+        predictions, run_time = await self._run(model, method, texts, endpoint)
+        instruments.child(instruments.INFERENCE_SUB_BATCH_SECONDS, endpoint).observe(run_time)
+        instruments.child(instruments.INFERENCE_SUB_BATCH_SIZE, endpoint).observe(len(texts))
+        return predictions
+
+    @staticmethod
+    async def _run_concurrently(awaitables) -> list[Any]:
+        """Run the sub-batches concurrently, cancelling the others if one fails."""
+        tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+    async def _predict_cleaned(self, model: Model, texts: list[str], endpoint: str) -> list[int]:
+        """Clean the sub-batches concurrently, then predict each cleaned text of the whole batch once."""
+        results = await self._run_concurrently(
+            self._run(model, "preprocess_text", sub_batch, endpoint) for sub_batch in self.split(texts)
+        )
+        cleaned = [text for cleaned_texts, _ in results for text in cleaned_texts]
+
+        # The position of each unique cleaned text in the order it first appears
+        positions = {}
+        indices = [positions.setdefault(text, len(positions)) for text in cleaned]
+        duplicates = len(cleaned) - len(positions)
+        if duplicates:
+            instruments.child(instruments.DEDUPLICATED_TEXTS_TOTAL, "cleaned").inc(duplicates)
+
+        results = await self._run_concurrently(
+            self._run_sub_batch(model, "predict_preprocessed", sub_batch, endpoint)
+            for sub_batch in self.split(list(positions))
+        )
+        predictions = [prediction for sub_batch_predictions in results for prediction in sub_batch_predictions]
+        return [predictions[i] for i in indices]
+
+    async def _predict_unique(self, model: Model, texts: list[str], endpoint: str) -> list[int]:
+        if len(self.split(texts)) == 1:
+            # The model deduplicates the cleaned texts of a single sub-batch itself
+            return await self._run_sub_batch(model, "batch_predict", texts, endpoint)
+        return await self._predict_cleaned(model, texts, endpoint)
+
+    async def run_batch(self, model: Model, texts: list[str], endpoint: str) -> list[int]:
+        """Predict a batch on the pool, in sub-batches running concurrently, and wait for the predictions.
+
+        Repeated texts are predicted once, and their predictions scattered back to their positions.
+        Batches split into sub-batches are cleaned first, sub-batches running concurrently, so the
+        texts that only repeat once cleaned are also predicted once across the whole batch.
+
+        Args:
+            model: The model object.
+            texts: The input texts.
+            endpoint: The endpoint the call is made for, used to label metrics.
+
+        Returns:
+            The predictions of the texts, in order.
+
+        Raises:
+            OperationalError: The inference queue is full. The other sub-batches are cancelled.
+        """
+        # The position of each unique text in the order it first appears
+        positions = {}
+        indices = [positions.setdefault(text, len(positions)) for text in texts]
+        duplicates = len(texts) - len(positions)
+        if texts:
+            instruments.child(instruments.BATCH_DUPLICATE_RATIO, endpoint).observe(duplicates / len(texts))
+        if duplicates:
+            instruments.child(instruments.DEDUPLICATED_TEXTS_TOTAL, "as_sent").inc(duplicates)
+            predictions = await self._predict_unique(model, list(positions), endpoint)
+            return [predictions[i] for i in indices]
+
+        return await self._predict_unique(model, texts, endpoint)
+
+    def shutdown(self):
+        """Shut down the pool, cancelling calls that haven't started."""
+        with self._pool_lock:
+            self._pool_generation += 1
+            # The replacement being forked is discarded once done
+            self._forking = None
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+inference_executor = InferenceExecutor(
+    kind=settings.api.inference_executor,
+    max_workers=settings.api.inference_workers,
+    max_queue_size=settings.api.inference_queue_size,
+    sub_batch_size=settings.api.inference_sub_batch_size,
+)
+
+model_manager.add_listener(inference_executor.recycle)
+
+os.register_at_fork(after_in_child=inference_executor._reset_after_fork)
+os.register_at_fork(after_in_child=_forget_inherited_pools)
@@ -1,4 +1,28 @@
-from prometheus_client import CollectorRegistry, Counter, Histogram
+import os
+import threading
+import time
+from typing import Any, Callable, Iterable
+
+import numpy as np
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.registry import Collector
+
+from opinionlens.common.settings import get_settings
+
+settings = get_settings()
+
+# With several worker processes, set `PROMETHEUS_MULTIPROC_DIR` to an empty directory before starting
+# the server. Every process then writes its metrics to memory-mapped files there, and scrapes
+# aggregate the files of all processes.
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
 
 inference_registry = CollectorRegistry()
 
@@ -10,6 +34,14 @@ MODEL_INFERENCE_TIME_SECONDS = Histogram(
     registry=inference_registry,
 )
 
+INFERENCE_STAGE_SECONDS = Histogram(
+    "inference_stage_seconds",
+    "Duration of each stage of a sampled inference call",
+    ["stage", "model_id", "endpoint"],
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.1, 0.5),
+    registry=inference_registry,
+)
+
 INPUT_TEXT_LENGTH_CHARS = Histogram(
     "input_text_length_chars",
     "Input text length in characters",
@@ -40,3 +72,286 @@ PREDICTED_SENTIMENT_TOTAL = Counter(
     ["label"],
     registry=inference_registry,
 )
+
+BATCH_DUPLICATE_RATIO = Histogram(
+    "batch_duplicate_ratio",
+    "Fraction of the texts of a batch that repeat another text of the batch as sent",
+    ["endpoint"],
+    buckets=(0.0, 0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99),
+    registry=inference_registry,
+)
+
+DEDUPLICATED_TEXTS_TOTAL = Counter(
+    "deduplicated_texts_total",
+    "Texts of batches predicted once with a duplicate of the same batch, either as sent or once cleaned",
+    ["step"],
+    registry=inference_registry,
+)
+
+COALESCED_TEXTS_TOTAL = Counter(
+    "coalesced_texts_total",
+    "Texts predicted by sharing the in-flight prediction of a concurrent request",
+    ["endpoint"],
+    registry=inference_registry,
+)
+
+MICRO_BATCH_SIZE = Histogram(
+    "micro_batch_size",
+    "Number of single-text requests coalesced into one batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+    registry=inference_registry,
+)
+
+MICRO_BATCH_QUEUE_WAIT_SECONDS = Histogram(
+    "micro_batch_queue_wait_seconds",
+    "Time a single-text request waits for its micro-batch to be flushed",
+    buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05),
+    registry=inference_registry,
+)
+
+INFERENCE_QUEUE_WAIT_SECONDS = Histogram(
+    "inference_queue_wait_seconds",
+    "Time an inference call waits for a free executor worker",
+    ["endpoint"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0),
+    registry=inference_registry,
+)
+
+INFERENCE_SUB_BATCH_SECONDS = Histogram(
+    "inference_sub_batch_seconds",
+    "Time a worker spends predicting a sub-batch of a batch",
+    ["endpoint"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+    registry=inference_registry,
+)
+
+INFERENCE_SUB_BATCH_SIZE = Histogram(
+    "inference_sub_batch_size",
+    "Number of texts in a sub-batch of a batch",
+    ["endpoint"],
+    buckets=(1, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000),
+    registry=inference_registry,
+)
+
+INFERENCE_IN_FLIGHT = Gauge(
+    "inference_in_flight",
+    "Number of inference calls running or waiting on the executor",
+    multiprocess_mode="livesum",
+    registry=inference_registry,
+)
+
+ADMISSION_ADMITTED_TOTAL = Counter(
+    "admission_admitted_total",
+    "Inference requests admitted by admission control",
+    ["endpoint"],
+    registry=inference_registry,
+)
+
+ADMISSION_REJECTED_TOTAL = Counter(
+    "admission_rejected_total",
+    "Inference requests rejected by admission control",
+    ["endpoint", "reason"],
+    registry=inference_registry,
+)
+
+ADMISSION_QUEUE_DELAY_SECONDS = Histogram(
+    "admission_queue_delay_seconds",
+    "Time an admitted inference request waits to be admitted",
+    ["endpoint"],
+    buckets=(0.0, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+    registry=inference_registry,
+)
+
+ADMISSION_IN_FLIGHT_TEXTS = Gauge(
+    "admission_in_flight_texts",
+    "Number of texts of the admitted inference requests",
+    ["endpoint"],
+    multiprocess_mode="livesum",
+    registry=inference_registry,
+)
+
+ADMISSION_QUEUED_TEXTS = Gauge(
+    "admission_queued_texts",
+    "Number of texts of the inference requests waiting to be admitted",
+    ["endpoint"],
+    multiprocess_mode="livesum",
+    registry=inference_registry,
+)
+
+PREDICTION_CACHE_HITS_TOTAL = Counter(
+    "prediction_cache_hits_total",
+    "Predictions served from the prediction cache",
+    registry=inference_registry,
+)
+
+PREDICTION_CACHE_MISSES_TOTAL = Counter(
+    "prediction_cache_misses_total",
+    "Predictions not found in the prediction cache",
+    registry=inference_registry,
+)
+
+PREDICTION_CACHE_EVICTIONS_TOTAL = Counter(
+    "prediction_cache_evictions_total",
+    "Entries evicted from the prediction cache",
+    ["reason"],
+    registry=inference_registry,
+)
+
+PREDICTION_CACHE_ENTRIES = Gauge(
+    "prediction_cache_entries",
+    "Number of entries in the prediction cache",
+    multiprocess_mode="livesum",
+    registry=inference_registry,
+)
+
+PREDICTION_CACHE_BYTES = Gauge(
+    "prediction_cache_bytes",
+    "Approximate memory used by the prediction cache",
+    multiprocess_mode="livesum",
+    registry=inference_registry,
+)
+
+MODEL_RESIDENT_BYTES = Gauge(
+    "model_resident_bytes",
+    "Approximate memory footprint of a loaded model",
+    ["model_id"],
+    multiprocess_mode="livemax",
+    registry=inference_registry,
+)
+
+MODEL_LOADS_TOTAL = Counter(
+    "model_loads_total",
+    "Number of times a model was loaded into memory",
+    ["model_id"],
+    registry=inference_registry,
+)
+
+MODEL_EVICTIONS_TOTAL = Counter(
+    "model_evictions_total",
+    "Number of times a model was evicted from memory to stay within the memory budget",
+    ["model_id"],
+    registry=inference_registry,
+)
+
+# The children of labelled metrics resolved by `child`, by metric and label values
+_children: dict[tuple[Any, tuple[str, ...]], Any] = {}
+
+
+def child(metric: Any, *labelvalues: str) -> Any:
+    """Return the child of a labelled metric for the label values, resolved once and cached.
+
+    Only use it for metrics whose series are never removed.
+    """
+    key = (metric, labelvalues)
+    try:
+        return _children[key]
+    except KeyError:
+        metric_child = _children[key] = metric.labels(*labelvalues)
+        return metric_child
+
+
+# Below this many values, observing them one by one is cheaper than building an array
+_MIN_BULK_OBSERVATIONS = 8
+
+# `observe_many` updates these private attributes of `prometheus_client` histograms, which other
+# releases may rename, so they're checked for on the first call
+_BULK_OBSERVATION_ATTRIBUTES = ("_upper_bounds", "_buckets", "_sum")
+_bulk_observations_supported: bool | None = None
+
+
+def _supports_bulk_observations(histogram: Histogram) -> bool:
+    """Check once whether histograms have the private attributes `observe_many` updates."""
+    global _bulk_observations_supported
+    if _bulk_observations_supported is None:
+        _bulk_observations_supported = all(hasattr(histogram, name) for name in _BULK_OBSERVATION_ATTRIBUTES)
+    return _bulk_observations_supported
+
+
+def observe_many(histogram: Histogram, values: Iterable[float]):
+    """Observe many values at once, with one update per non-empty bucket and one for the sum.
+
+    It's equivalent to observing each value in turn, which it falls back to if the installed
+    `prometheus_client` lays histograms out differently.
+
+    Args:
+        histogram: The histogram, or the child of a labelled histogram.
+        values: The observed values.
+    """
+    values = list(values)
+    if len(values) < _MIN_BULK_OBSERVATIONS or not _supports_bulk_observations(histogram):
+        for value in values:
+            histogram.observe(value)
+        return
+
+    values = np.array(values, dtype=np.float64)
+    # The first bucket whose upper bound is at least the value, as `Histogram.observe` finds it
+    buckets = np.searchsorted(histogram._upper_bounds, values, side="left")
+    counts = np.bincount(buckets, minlength=len(histogram._upper_bounds))
+
+    histogram._sum.inc(float(values.sum()))
+    for bucket, count in zip(histogram._buckets, counts.tolist()):
+        if count:
+            bucket.inc(count)
+
+
+# The inference metrics are served apart from the HTTP metrics of `prometheus_fastapi_instrumentator`
+INFERENCE_METRIC_NAMES = frozenset(metric.name for metric in inference_registry.collect())
+
+
+class _FilteredCollector(Collector):
+    """A collector that only keeps the metrics of another collector whose names pass a filter."""
+
+    def __init__(self, collector: Collector, keep: Callable[[str], bool]):
+        self._collector = collector
+        self._keep = keep
+
+    def collect(self):
+        return (metric for metric in self._collector.collect() if self._keep(metric.name))
+
+
+class _Scrape:
+    """The exposition of a registry, cached for a short time.
+
+    Multiprocess scrapes read and merge the files of every process, and any scrape costs more
+    as label cardinality grows, so concurrent and back-to-back scrapes share one exposition.
+    """
+
+    def __init__(self, registry: CollectorRegistry, ttl_seconds: float):
+        self._registry = registry
+        self._ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._output = b""
+        self._expires_at = 0.0
+
+    def generate(self) -> bytes:
+        with self._lock:
+            if time.monotonic() >= self._expires_at:
+                self._output = generate_latest(self._registry)
+                self._expires_at = time.monotonic() + self._ttl
+            return self._output
+
+
+def _multiprocess_registry(keep: Callable[[str], bool]) -> CollectorRegistry:
+    registry = CollectorRegistry()
+    registry.register(_FilteredCollector(multiprocess.MultiProcessCollector(None), keep))
+    return registry
+
+
+if MULTIPROCESS:
+    inference_scrape = _Scrape(
+        _multiprocess_registry(lambda name: name in INFERENCE_METRIC_NAMES),
+        settings.api.metrics_scrape_cache_seconds,
+    )
+    http_scrape = _Scrape(
+        _multiprocess_registry(lambda name: name not in INFERENCE_METRIC_NAMES),
+        settings.api.metrics_scrape_cache_seconds,
+    )
+else:
+    inference_scrape = _Scrape(inference_registry, settings.api.metrics_scrape_cache_seconds)
+    http_scrape = _Scrape(REGISTRY, settings.api.metrics_scrape_cache_seconds)
+
+
+def mark_process_dead():
+    """Drop the live gauges of this process from the multiprocess aggregation, on shutdown."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
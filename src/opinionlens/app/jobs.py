@@ -0,0 +1,174 @@
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable
+
+from opinionlens.app.exceptions import JobNotFoundError
+from opinionlens.common.utils import get_logger
+
+__all__ = ["Job", "JobRegistry"]
+
+
+class Job:
+    """A unit of background work with its status and progress.
+
+    Attributes:
+        job_id (str): The ID of the job.
+        kind (str): The kind of the job, e.g. 'fetch_model'.
+        status (str): One of 'pending', 'running', 'succeeded', or 'failed'.
+        stage (str | None): A short description of the current stage of the job.
+        progress (float): The fraction of the job that's done, between 0 and 1.
+        details (dict): Job specific information about its progress.
+        result (dict | None): The result of the job once it has succeeded.
+        error (str | None): The error message once the job has failed.
+    """
+
+    def __init__(self, kind: str):
+        """
+        Args:
+            kind: The kind of the job.
+        """
+        self.job_id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "pending"
+        self.stage = None
+        self.progress = 0.0
+        self.details = {}
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now().replace(microsecond=0)
+        self.started_at = None
+        self.finished_at = None
+
+    def update(self, stage: str | None = None, progress: float | None = None, **details):
+        """Update the stage and progress of the job.
+
+        Args:
+            stage: The new stage of the job.
+            progress: The new fraction of the job that's done.
+            **details: Job specific information about its progress.
+        """
+        if stage is not None:
+            self.stage = stage
+        if progress is not None:
+            self.progress = progress
+        if details:
+            self.details = {**self.details, **details}
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 4),
+            "details": self.details,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobRegistry:
+    """Run jobs in the background on a thread pool and keep track of them.
+
+    Only the most recent `max_finished_jobs` finished jobs are kept.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        max_finished_jobs: int = 100,
+        on_forget: Callable[[Job], None] | None = None,
+    ):
+        """
+        Args:
+            name: The name of the registry, used for logging and thread names.
+            max_workers: The maximum number of jobs running at once.
+            max_finished_jobs: The maximum number of finished jobs kept.
+            on_forget: A callable that cleans up after a finished job once it's forgotten.
+        """
+        self.name = name
+        self.max_finished_jobs = max_finished_jobs
+        self.on_forget = on_forget
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._logger = get_logger(f"{self.__class__.__name__}.{name}")
+
+    def _run(self, job: Job, func: Callable[..., dict[str, Any]], args: tuple):
+        job.status = "running"
+        job.started_at = datetime.now().replace(microsecond=0)
+        try:
+            job.result = func(job, *args)
+        except Exception as e:
+            job.status = "failed"
+            job.error = f"{type(e).__name__}: {getattr(e, 'message', str(e))}"
+            self._logger.exception(f"Job {job.job_id!r} failed.")
+        else:
+            job.status = "succeeded"
+            job.progress = 1.0
+            self._logger.info(f"Job {job.job_id!r} succeeded.")
+        finally:
+            job.finished_at = datetime.now().replace(microsecond=0)
+            self._prune()
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond the maximum kept."""
+        with self._lock:
+            finished = [job_id for job_id, job in self._jobs.items() if job.is_finished]
+            forgotten = [
+                self._jobs.pop(job_id)
+                for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]
+            ]
+
+        if self.on_forget is not None:
+            for job in forgotten:
+                self.on_forget(job)
+
+    def submit(self, kind: str, func: Callable[..., dict[str, Any]], *args) -> Job:
+        """Submit a job to run in the background.
+
+        Args:
+            kind: The kind of the job.
+            func: A callable that takes the job object followed by `args`, updates the job's
+                progress as it goes, and returns the result of the job.
+            *args: The arguments passed to `func` after the job object.
+
+        Returns:
+            The job object.
+        """
+        job = Job(kind)
+        with self._lock:
+            self._jobs[job.job_id] = job
+        self._pool.submit(self._run, job, func, args)
+        self._logger.info(f"Job {job.job_id!r} of kind {kind!r} submitted.")
+        return job
+
+    def get(self, job_id: str) -> Job:
+        """Return the job with the given ID.
+
+        Raises:
+            JobNotFoundError: The job doesn't exist.
+        """
+        try:
+            return self._jobs[job_id]
+        except KeyError:
+            raise JobNotFoundError(f"Job {job_id!r} doesn't exist.")
+
+    def list(self) -> list[Job]:
+        """Return all the tracked jobs, oldest first."""
+        return list(self._jobs.values())
+
+    def shutdown(self):
+        """Stop accepting jobs, cancelling the ones that haven't started."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
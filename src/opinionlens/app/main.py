@@ -1,26 +1,66 @@
-from contextlib import asynccontextmanager
+import time
+from contextlib import asynccontextmanager, contextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from prometheus_client import CONTENT_TYPE_LATEST
 from prometheus_fastapi_instrumentator import Instrumentator
-from starlette.middleware.base import BaseHTTPMiddleware
 
+from opinionlens.app import IMPORT_START_TIME, instruments, setup_mlflow
+from opinionlens.app.executors import inference_executor
 from opinionlens.app.info import app_info
-from opinionlens.app.middleware import log_error_responses
-from opinionlens.app.routers import api
+from opinionlens.app.managers import model_manager
+from opinionlens.app.middleware import ErrorResponseLoggingMiddleware
+from opinionlens.app.registry import registry_cache
+from opinionlens.app.routers import api, models, scoring
+from opinionlens.common.settings import get_settings
+from opinionlens.common.utils import get_logger
+
+settings = get_settings()
+
+logger = get_logger(__name__, level=settings.api.logging_level)
 
 instrumentator = Instrumentator()
 
 
+@contextmanager
+def startup_phase(phases: dict[str, float], name: str):
+    """Time a phase of the startup into `phases`."""
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = time.perf_counter() - start_time
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global instrumentator
-    instrumentator.expose(app)
+    # The imports and the app setup ran before the lifespan
+    phases = {"import": time.perf_counter() - IMPORT_START_TIME}
+    with startup_phase(phases, "mlflow"):
+        # Only point MLflow to the registry, the API doesn't log runs, and serves the saved
+        # models from their manifests even if the registry is down
+        setup_mlflow(set_experiment=False)
+    with startup_phase(phases, "models"):
+        model_manager.start()
+    with startup_phase(phases, "registry_cache"):
+        registry_cache.start()
+    logger.info(
+        "Startup took %.3f seconds: %s.",
+        sum(phases.values()),
+        ", ".join(f"{name} {seconds:.3f}" for name, seconds in phases.items()),
+    )
+
     yield
+    registry_cache.stop()
+    models.fetch_jobs.shutdown()
+    scoring.scoring_jobs.shutdown()
+    inference_executor.shutdown()
+    instruments.mark_process_dead()
 
 
 app = FastAPI(
@@ -31,7 +71,7 @@ app = FastAPI(
     openapi_url=None,
 )
 
-app.add_middleware(BaseHTTPMiddleware, dispatch=log_error_responses)
+app.add_middleware(ErrorResponseLoggingMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -63,6 +103,12 @@ instrumentator = instrumentator.instrument(app)
 templates = Jinja2Templates(directory="static/html")
 
 
+@app.get("/metrics")
+def http_metrics():
+    """Expose the HTTP metrics of the instrumentator, aggregated across processes in multiprocess mode."""
+    return Response(instruments.http_scrape.generate(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/health", include_in_schema=False)
 def health():
     return {"status": "ok"}
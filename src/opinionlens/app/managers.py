@@ -1,47 +1,159 @@
 import json
 import os
 import shutil
+import threading
+import time
+import uuid
 from datetime import datetime
-from typing import Any
-
-import mlflow
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Callable, Mapping, NamedTuple
 
+from opinionlens.app import instruments
+from opinionlens.app.artifacts import artifact_store
+from opinionlens.app.cache import prediction_cache
 from opinionlens.app.exceptions import ModelNotAvailableError, OperationalError
 from opinionlens.app.models import Model, SklearnModel
+from opinionlens.app.registry import registry_cache
 from opinionlens.common.settings import get_settings
-from opinionlens.common.utils import get_logger
+from opinionlens.common.utils import get_deep_size, get_logger
+
+if TYPE_CHECKING:
+    import mlflow
 
 settings = get_settings()
 
 __all__ = ["model_manager"]
 
+# Written next to each model directory as '<model_id>.manifest.json' with the model information,
+# read at startup. Manifests written inside model directories by older versions are still read.
+MANIFEST_FILENAME = "manifest.json"
+# Written inside the saved models directory with the ID of the default model
+DEFAULT_MODEL_FILENAME = "default_model"
+# Written inside the saved models directory with the ID the instance holds artifact store references with
+INSTANCE_ID_FILENAME = ".instance_id"
+
+
+class _ManagerState(NamedTuple):
+    """An immutable snapshot of the models managed by the model manager.
+
+    The default model, if any, is always loaded, and every loaded model is available.
+    """
+    models: Mapping[str, Model]
+    """The loaded models."""
+    model_infos: Mapping[str, dict[str, Any]]
+    """The information of all available models, loaded or not. Never mutated once published."""
+    default_model_id: str | None
+
 
 class __ModelManager:
     """A class to manage models saved on disk at the backend.
 
+    Saved models are registered as available from their manifests when the manager starts,
+    from the app's lifespan rather than at import. Only the default model is loaded eagerly,
+    the others are loaded in the background or on first use.
+
+    If a memory budget is set, the least recently used models other than the default are
+    evicted from memory when the loaded models exceed it. Evicted models stay on disk and
+    are loaded again on their next use.
+
+    Fetched models are links to the artifact store shared by the instances on the host. A
+    deleted model is removed from the store once no other instance uses it.
+
+    The managed models are kept in an immutable snapshot that writers replace as a whole.
+    Reads take no locks and always see a consistent snapshot, while writes (fetching, loading,
+    evicting, deleting, and setting the default) are serialized by a lock.
+
     **DO NOT INSTANTIATE**, use `opinionlens.app.manager.model_manager` instead.
     """
 
     def __init__(self):
-        self._models = {}
-        self._model_infos = {}
-        self._default_model_id = None
+        self._state = _ManagerState(
+            models=MappingProxyType({}),
+            model_infos=MappingProxyType({}),
+            default_model_id=None,
+        )
+        self._write_lock = threading.RLock()
+        self._listeners = []
+        self._last_used = {}
+        self._residency = {}
+        self._memory_budget = settings.api.model_memory_budget_mb * 1024 ** 2
         self._logger = get_logger(self.__class__.__name__, level=settings.api.logging_level)
+        self._request_logger = get_logger(
+            f"{self.__class__.__name__}.requests",
+            level=settings.api.logging_level,
+            rate_limit=settings.api.request_log_rate_per_second,
+        )
+        self._started = False
+
+    def start(self):
+        """Register the saved models, load the default model, and start loading the others.
+
+        Only the first call starts the manager, later calls do nothing.
+        """
+        with self._write_lock:
+            if self._started:
+                return
+            self._started = True
 
         os.makedirs(settings.api.saved_model_path, exist_ok=True)
 
-        for model_id in set(self._list_model_path_dirs()):
-            self.fetch_model("models:/" + model_id)
-            self.set_default(model_id)
+        self._register_saved_models()
+
+        default_model_id = self._read_default_model_id()
+        model_infos = self._state.model_infos
+        if default_model_id is None and model_infos:
+            # Fall back to the newest model
+            default_model_id = max(
+                model_infos, key=lambda model_id: model_infos[model_id]["model_creation"]
+            )
+        if default_model_id is not None:
+            self.set_default(default_model_id)
+
+        if settings.api.background_model_loading:
+            threading.Thread(
+                target=self._load_available_models, name="model-loader", daemon=True
+            ).start()
+
+        self._logger.info("Model manager started.")
 
-        self._logger.info("Model manager initialized.")
+    def _publish(self, **changes):
+        """Replace the state snapshot with a copy that has the given fields changed.
+
+        Must be called with the write lock held.
+        """
+        self._state = self._state._replace(**changes)
+
+    def _notify_listeners(self):
+        """Call the registered listeners after the loaded models or the default model change."""
+        for listener in self._listeners:
+            listener()
+
+    def add_listener(self, listener: Callable[[], None]):
+        """Register a callable to be called whenever a model is fetched, deleted, or set as default.
+
+        Args:
+            listener: A callable that takes no arguments.
+        """
+        self._listeners.append(listener)
 
     def _get_model_path(self, model_id: str) -> str:
         """Get the path of the model directory."""
         return os.path.join(settings.api.saved_model_path, model_id)
 
+    def _get_instance_id(self) -> str:
+        """Get the ID of this instance, created with the saved models directory, which it identifies."""
+        instance_id_path = os.path.join(settings.api.saved_model_path, INSTANCE_ID_FILENAME)
+        try:
+            with open(instance_id_path, "x") as f:
+                f.write(uuid.uuid4().hex)
+        except FileExistsError:
+            pass
+
+        with open(instance_id_path) as f:
+            return f.read().strip()
+
     def _download_model(self, model_uri: str, model_id: str) -> str:
-        """Download the model from the registry."""
+        """Download the model into the artifact store and link it in the saved models directory."""
         self._logger.info(
             f"Model {model_id!r} was requested with URI {model_uri!r} from the registry."
         )
@@ -49,11 +161,13 @@ class __ModelManager:
         dst_path = self._get_model_path(model_id)
 
         if not os.path.exists(dst_path):
-            dst_path = mlflow.artifacts.download_artifacts(
-                artifact_uri=model_uri,
-                dst_path=dst_path,
-            )
-            self._logger.debug(f"Model {model_id!r} downloaded and saved at {dst_path!r}.")
+            store_path = artifact_store.ensure(model_uri, model_id, self._get_instance_id())
+            if os.path.lexists(dst_path):
+                # A link left dangling by a cleaned up store
+                os.unlink(dst_path)
+            # A relative link resolves wherever the volumes are mounted, as long as they're side by side
+            os.symlink(os.path.relpath(store_path, settings.api.saved_model_path), dst_path)
+            self._logger.debug(f"Model {model_id!r} linked at {dst_path!r} to {store_path!r}.")
         else:
             self._logger.debug(f"Model {model_id!r} found at {dst_path!r}.")
 
@@ -64,31 +178,242 @@ class __ModelManager:
         _, dirs, _ = next(iter(os.walk(settings.api.saved_model_path)))
         return dirs
 
+    def _get_manifest_path(self, model_id: str) -> str:
+        """Get the path of the model manifest.
+
+        The manifest is kept in the saved models directory of this instance, outside the model
+        directory, which links to the artifact store shared with the other instances.
+        """
+        return os.path.join(settings.api.saved_model_path, f"{model_id}.{MANIFEST_FILENAME}")
+
+    def _write_manifest(self, model_id: str, model_info: dict[str, Any]):
+        """Save the model information next to the model on disk."""
+        manifest = dict(model_info)
+        manifest["model_creation"] = manifest["model_creation"].isoformat()
+
+        manifest_path = self._get_manifest_path(model_id)
+        # Written to a temporary file first, so a manifest on disk is always complete
+        tmp_path = f"{manifest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, manifest_path)
+
+    def _read_manifest(self, model_id: str) -> dict[str, Any] | None:
+        """Read the model information saved next to the model, if any."""
+        manifest_path = self._get_manifest_path(model_id)
+        if not os.path.exists(manifest_path):
+            manifest_path = os.path.join(self._get_model_path(model_id), MANIFEST_FILENAME)
+        if not os.path.exists(manifest_path):
+            return None
+
+        with open(manifest_path) as f:
+            model_info = json.load(f)
+
+        model_info["model_creation"] = datetime.fromisoformat(model_info["model_creation"])
+        model_info["saved_model_path"] = self._get_model_path(model_id)
+
+        return model_info
+
+    def _read_default_model_id(self) -> str | None:
+        """Read the ID of the saved default model, if it's still available."""
+        default_model_path = os.path.join(settings.api.saved_model_path, DEFAULT_MODEL_FILENAME)
+        if not os.path.exists(default_model_path):
+            return None
+
+        with open(default_model_path) as f:
+            model_id = f.read().strip()
+
+        return model_id if self._model_exists(model_id) else None
+
+    def _write_default_model_id(self, model_id: str | None):
+        """Save the ID of the default model so it's loaded eagerly on the next startup."""
+        default_model_path = os.path.join(settings.api.saved_model_path, DEFAULT_MODEL_FILENAME)
+        if model_id is None:
+            if os.path.exists(default_model_path):
+                os.remove(default_model_path)
+            return
+
+        with open(default_model_path, "w") as f:
+            f.write(model_id)
+
+    def _register_saved_models(self):
+        """Register the models saved on disk as available, without loading them."""
+        without_manifest = []
+
+        with self._write_lock:
+            model_infos = dict(self._state.model_infos)
+            for model_id in sorted(self._list_model_path_dirs()):
+                if model_id in model_infos:
+                    continue
+
+                if os.path.islink(self._get_model_path(model_id)):
+                    # Linked before the store kept references, or the reference was lost
+                    artifact_store.add_reference(model_id, self._get_instance_id())
+
+                model_info = self._read_manifest(model_id)
+                if model_info is None:
+                    without_manifest.append(model_id)
+                    continue
+
+                model_infos[model_id] = model_info
+                self._logger.debug(f"Model {model_id!r} registered from its manifest.")
+
+            self._publish(model_infos=MappingProxyType(model_infos))
+
+        if not without_manifest:
+            return
+
+        from mlflow.exceptions import MlflowException
+
+        # Models saved without a manifest are described by the registry once
+        for model_id in without_manifest:
+            try:
+                self.fetch_model("models:/" + model_id)
+            except MlflowException as e:
+                self._logger.error(
+                    f"Model {model_id!r} has no manifest and couldn't be fetched from the registry: {e.message}"
+                )
+
+    def _load_available_models(self):
+        """Load all available models that aren't loaded yet, as long as the memory budget allows."""
+        for model_id in list(self._state.model_infos.keys()):
+            if self._memory_budget and self._get_resident_bytes() >= self._memory_budget:
+                self._logger.info("Memory budget reached, remaining models will be loaded on first use.")
+                return
+
+            try:
+                self._load_model(model_id)
+            except ModelNotAvailableError:
+                # Deleted since the loop started
+                continue
+            except Exception:
+                self._logger.exception(f"Model {model_id!r} failed to load in the background.")
+
     def _model_exists(self, model_id: str) -> bool:
+        """Check if the model is available, whether it's loaded or not."""
+        return model_id in self._state.model_infos.keys()
+
+    def _model_loaded(self, model_id: str) -> bool:
         """Check if the model is loaded."""
-        return model_id in self._models.keys()
+        return model_id in self._state.models.keys()
+
+    @staticmethod
+    def _new_residency_info() -> dict[str, int]:
+        return {"resident_bytes": 0, "load_count": 0, "eviction_count": 0}
+
+    def _get_resident_bytes(self) -> int:
+        """Get the total memory footprint of the loaded models."""
+        return sum(
+            self._residency[model_id]["resident_bytes"]
+            for model_id in self._state.models.keys() if model_id in self._residency
+        )
+
+    def _evict_model(self, model_id: str):
+        """Unload a model from memory, keeping it on disk.
+
+        Must be called with the write lock held.
+        """
+        models = dict(self._state.models)
+        del models[model_id]
+        self._publish(models=MappingProxyType(models))
+        self._last_used.pop(model_id, None)
+
+        residency = self._residency[model_id]
+        residency["resident_bytes"] = 0
+        residency["eviction_count"] += 1
+
+        instruments.MODEL_RESIDENT_BYTES.labels(model_id).set(0)
+        instruments.MODEL_EVICTIONS_TOTAL.labels(model_id).inc()
+
+        self._logger.info(f"Model {model_id!r} evicted from memory.")
+
+    def _enforce_memory_budget(self, keep_model_id: str | None):
+        """Evict the least recently used models until the loaded models fit in the memory budget.
+
+        The default model and the model with the given ID are never evicted.
+        Must be called with the write lock held.
+        """
+        if not self._memory_budget:
+            return
+
+        candidates = sorted(
+            (
+                model_id for model_id in self._state.models.keys()
+                if model_id not in (self._state.default_model_id, keep_model_id)
+            ),
+            key=lambda model_id: self._last_used.get(model_id, 0),
+        )
+
+        evicted = False
+        while self._get_resident_bytes() > self._memory_budget and candidates:
+            self._evict_model(candidates.pop(0))
+            evicted = True
+
+        if self._get_resident_bytes() > self._memory_budget:
+            self._logger.warning(
+                f"Loaded models use {self._get_resident_bytes()} bytes, "
+                f"over the memory budget of {self._memory_budget} bytes."
+            )
+
+        if evicted:
+            self._notify_listeners()
 
     def _remove_model_dir(self, model_id: str):
-        """Delete the model directory from disk."""
+        """Delete the model directory and its manifest from disk.
+
+        A model linked to the artifact store is deleted from the store too, unless other
+        instances still use it.
+        """
+        manifest_path = self._get_manifest_path(model_id)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+
         model_path = self._get_model_path(model_id)
-        if os.path.exists(model_path):
+        if os.path.islink(model_path):
+            os.unlink(model_path)
+            self._logger.debug(f"Deleted model link {model_path!r}.")
+            artifact_store.release(model_id, self._get_instance_id())
+        elif os.path.exists(model_path):
             shutil.rmtree(model_path)
             self._logger.debug(f"Deleted model directory {model_path!r}.")
         else:
             raise OperationalError(f"Model directory {model_path!r} doesn't exist.")
 
-    def _load_model(self, model_id: str):
-        """Load a model from disk."""
-        if self._model_exists(model_id):
-            self._logger.info(f"Model {model_id!r} is already loaded.")
-            return
+    def _load_model(self, model_id: str) -> Model:
+        """Load an available model from disk.
 
-        model_path = self._get_model_path(model_id)
-        model = SklearnModel(model_id, model_path)
+        Raises:
+            ModelNotAvailableError: The model doesn't exist.
+        """
+        with self._write_lock:
+            state = self._state
+            if model_id in state.models:
+                self._logger.info(f"Model {model_id!r} is already loaded.")
+                return state.models[model_id]
 
-        self._models[model_id] = model
+            if model_id not in state.model_infos:
+                raise ModelNotAvailableError(f"Model {model_id!r} doesn't exist.")
+
+            # MLflow rejects model paths that resolve outside of themselves, as artifact store links do
+            model_path = os.path.realpath(self._get_model_path(model_id))
+            model = SklearnModel(model_id, model_path)
+            resident_bytes = get_deep_size(model.pyfunc_model)
+
+            self._publish(models=MappingProxyType({**state.models, model_id: model}))
+            self._last_used[model_id] = time.monotonic()
+
+            residency = self._residency.setdefault(model_id, self._new_residency_info())
+            residency["resident_bytes"] = resident_bytes
+            residency["load_count"] += 1
+
+            instruments.MODEL_RESIDENT_BYTES.labels(model_id).set(resident_bytes)
+            instruments.MODEL_LOADS_TOTAL.labels(model_id).inc()
+
+            self._enforce_memory_budget(keep_model_id=model_id)
+            self._notify_listeners()
 
         self._logger.info(f"Model {model_id!r} loaded.")
+        return model
 
     def _format_model_info(
         self,
@@ -99,7 +424,6 @@ class __ModelManager:
         """Format the model info."""
         result = {
             "model_name": model_info.name,
-            "is_default": True if self._default_model_id == model_info.model_id else False,
             "model_creation": datetime.fromtimestamp(model_info.creation_timestamp / 1000).replace(microsecond=0),
             "model_flavors": list(model_info.flavors.keys()),
             "registry_model_uri": model_uri,
@@ -113,6 +437,14 @@ class __ModelManager:
 
         return result
 
+    def _describe_model(self, state: _ManagerState, model_id: str) -> dict[str, Any]:
+        """Add the runtime state of the model to its information."""
+        model_info = dict(state.model_infos[model_id])
+        model_info["is_default"] = state.default_model_id == model_id
+        model_info["is_loaded"] = model_id in state.models
+        model_info["residency"] = dict(self._residency.get(model_id, self._new_residency_info()))
+        return model_info
+
     def get_default_model(self) -> Model:
         """Return the default model object to make predictions.
 
@@ -123,15 +455,67 @@ class __ModelManager:
             ModelNotAvailableError: No default model set.
             OperationalError: The default model doesn't exist.
         """
-        if self._default_model_id is None:
+        state = self._state
+
+        if state.default_model_id is None:
             raise ModelNotAvailableError("No default model set.")
 
-        if not self._model_exists(self._default_model_id):
-            raise OperationalError(f"Model {self._default_model_id!r} was requested but doesn't exist.")
+        try:
+            model = state.models[state.default_model_id]
+        except KeyError:
+            raise OperationalError(f"Model {state.default_model_id!r} was requested but doesn't exist.")
+
+        self._request_logger.info("Model %r was requested.", state.default_model_id)
 
-        self._logger.info(f"Model {self._default_model_id!r} was requested.")
+        return model
 
-        return self._models[self._default_model_id]
+    def get_model(self, model_id: str) -> Model:
+        """Return the model object with the given ID, loading it if it isn't loaded yet.
+
+        Args:
+            model_id: The ID of the model.
+
+        Returns:
+            The model object.
+
+        Raises:
+            ModelNotAvailableError: The requested model doesn't exist.
+        """
+        model = self._state.models.get(model_id)
+        if model is None:
+            model = self._load_model(model_id)
+
+        self._last_used[model_id] = time.monotonic()
+
+        return model
+
+    def get_loaded_model(self, model_id: str) -> Model:
+        """Return the model object with the given ID, only if it's already loaded.
+
+        Unlike `get_model`, it never loads the model, so it's safe to call from forked
+        inference workers, which must not change the state they inherited.
+
+        Args:
+            model_id: The ID of the model.
+
+        Returns:
+            The model object.
+
+        Raises:
+            ModelNotAvailableError: The requested model isn't loaded.
+        """
+        try:
+            return self._state.models[model_id]
+        except KeyError:
+            raise ModelNotAvailableError(f"Model {model_id!r} isn't loaded.")
+
+    def get_loaded_model_ids(self) -> frozenset[str]:
+        """Return the IDs of the loaded models."""
+        return frozenset(self._state.models.keys())
+
+    def _reset_after_fork(self):
+        """Replace the write lock in a forked child, where the thread holding it at fork time doesn't exist."""
+        self._write_lock = threading.RLock()
 
     def fetch_model(self, model_uri: str) -> tuple[str, str]:
         """Download and load the requested model from the registry.
@@ -147,25 +531,64 @@ class __ModelManager:
             MlflowException: An error occurred downloading the model.
                 Check MLflow service status or the provided URI.
         """
+        # Registry URIs of available models resolve without a round trip to the registry
+        model_id = registry_cache.resolve_model_id(model_uri)
+        if model_id is not None and self._model_exists(model_id):
+            self._logger.info(f"Model {model_id!r}, requested as {model_uri!r}, is already available.")
+            self._load_model(model_id)
+            return self._get_model_path(model_id), model_id
+
+        import mlflow
+
         # Propagate Mlflow exception
         model_info = mlflow.models.get_model_info(model_uri)
         model_id = model_info.model_id
+        registry_cache.remember(model_uri, model_id)
 
         if self._model_exists(model_id):
-            self._logger.info(f"Model {model_id!r}, requested as {model_uri!r}, is already loaded.")
+            self._logger.info(f"Model {model_id!r}, requested as {model_uri!r}, is already available.")
+            self._load_model(model_id)
             dst_path = self._get_model_path(model_id)
             return dst_path, model_id
 
         dst_path = self._download_model(model_uri, model_id)
-        self._load_model(model_id)
-        self._model_infos[model_id] = self._format_model_info(model_info, model_uri, dst_path)
+
+        with self._write_lock:
+            if not self._model_exists(model_id):
+                formatted_info = self._format_model_info(model_info, model_uri, dst_path)
+                self._write_manifest(model_id, formatted_info)
+                self._publish(
+                    model_infos=MappingProxyType({**self._state.model_infos, model_id: formatted_info})
+                )
+            self._load_model(model_id)
 
         return dst_path, model_id
 
+    def warm_up(self, model_id: str) -> float:
+        """Run the warm-up texts through the model.
+
+        Args:
+            model_id: The ID of the model.
+
+        Returns:
+            The latency of the warm-up batch in seconds.
+
+        Raises:
+            ModelNotAvailableError: The requested model doesn't exist.
+        """
+        model = self.get_model(model_id)
+
+        start_time = time.perf_counter()
+        model.batch_predict(settings.api.warmup_texts)
+        latency = time.perf_counter() - start_time
+
+        self._logger.info(f"Model {model_id!r} warmed up in {latency:.4f} seconds.")
+        return latency
+
     def get_model_info(
         self, model_id: str | None = None
     ) -> dict[str, Any] | dict[str, dict[str, Any]]:
-        """Return the model information of the given model ID or all loaded models.
+        """Return the model information of the given model ID or all available models.
 
         Args:
             model_id: The ID of the requested model.
@@ -173,18 +596,19 @@ class __ModelManager:
 
         Returns:
             A dictionary containing the requested model's information, or
-            a dictionary with all loaded model IDs pointing to the model's information.
+            a dictionary with all available model IDs pointing to the model's information.
 
         Raises:
             ModelNotAvailableError: The requested model doesn't exist.
         """
+        state = self._state
+
         if model_id:
-            try:
-                return self._model_infos[model_id]
-            except KeyError:
+            if model_id not in state.model_infos:
                 raise ModelNotAvailableError(f"Model {model_id!r} doesn't exist.")
+            return self._describe_model(state, model_id)
         else:
-            return self._model_infos
+            return {model_id: self._describe_model(state, model_id) for model_id in state.model_infos}
 
     def delete_model(self, model_id: str):
         """Delete the model from the backend.
@@ -198,20 +622,38 @@ class __ModelManager:
         Raises:
             ModelNotAvailableError: The requested model doesn't exist.
         """
-        if not self._model_exists(model_id):
-            raise ModelNotAvailableError(f"Model {model_id!r} doesn't exist.")
+        with self._write_lock:
+            state = self._state
+            if model_id not in state.model_infos:
+                raise ModelNotAvailableError(f"Model {model_id!r} doesn't exist.")
 
-        del self._models[model_id]
-        self._remove_model_dir(model_id)
-        del self._model_infos[model_id]
+            was_default = state.default_model_id == model_id
+            self._publish(
+                models=MappingProxyType({k: v for k, v in state.models.items() if k != model_id}),
+                model_infos=MappingProxyType({k: v for k, v in state.model_infos.items() if k != model_id}),
+                default_model_id=None if was_default else state.default_model_id,
+            )
+
+            self._last_used.pop(model_id, None)
+            self._residency.pop(model_id, None)
+            # Multiprocess mode keeps the last value of a removed series in the process's file
+            instruments.MODEL_RESIDENT_BYTES.labels(model_id).set(0)
+            try:
+                instruments.MODEL_RESIDENT_BYTES.remove(model_id)
+            except KeyError:
+                pass
+            prediction_cache.invalidate(model_id)
 
-        if self._default_model_id == model_id:
-            self._default_model_id = None
+            if was_default:
+                self._write_default_model_id(None)
+
+            self._notify_listeners()
+            self._remove_model_dir(model_id)
 
         self._logger.info(f"Model {model_id!r} deleted.")
 
     def set_default(self, model_id: str):
-        """Set the model with the given ID as the default model.
+        """Set the model with the given ID as the default model, loading it if it isn't loaded yet.
 
         Args:
             model_id: The ID of the model.
@@ -219,16 +661,24 @@ class __ModelManager:
         Raises:
             OperationalError: The model doesn't exist.
         """
-        if not self._model_exists(model_id):
-            raise OperationalError(f"Model {model_id!r} doesn't exist and can't be the default.")
+        with self._write_lock:
+            if not self._model_exists(model_id):
+                raise OperationalError(f"Model {model_id!r} doesn't exist and can't be the default.")
+
+            self._load_model(model_id)
 
-        if self._default_model_id is not None:
-            self._model_infos[self._default_model_id]["is_default"] = False
+            previous_model_id = self._state.default_model_id
+            self._publish(default_model_id=model_id)
 
-        self._default_model_id = model_id
-        self._model_infos[model_id]["is_default"] = True
+            if previous_model_id is not None and previous_model_id != model_id:
+                prediction_cache.invalidate(previous_model_id)
+
+            self._write_default_model_id(model_id)
+            self._notify_listeners()
 
         self._logger.info(f"Model {model_id!r} set as default.")
 
 
 model_manager = __ModelManager()
+
+os.register_at_fork(after_in_child=model_manager._reset_after_fork)
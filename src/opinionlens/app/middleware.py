@@ -1,22 +1,62 @@
-from fastapi import Request
-from starlette.concurrency import iterate_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from opinionlens.common.settings import get_settings
 from opinionlens.common.utils import get_logger
 
-logger = get_logger(__name__, filename="logs/app.log")
+settings = get_settings()
 
+logger = get_logger(
+    __name__,
+    filename="logs/app.log",
+    max_bytes=settings.api.log_file_max_bytes,
+    backup_count=settings.api.log_file_backup_count,
+)
 
-async def log_error_responses(request: Request, call_next):
-    url = request.url.path
-    response = await call_next(request)
-    if response.status_code >= 400:
-        if response.status_code == 404:
-            return response
 
-        response_body = [chunck async for chunck in response.body_iterator]
-        response_text = (b"".join(response_body)).decode()
-        logger.error(
-            f"Bad response to {url} with status code {response.status_code}: {response_text}"
-        )
-        response.body_iterator = iterate_in_threadpool(iter(response_body))
-    return response
+class ErrorResponseLoggingMiddleware:
+    """Log the responses with an error status code, with the start of their body.
+
+    404s and the 429s of requests shed by admission control aren't logged, as they're expected.
+
+    Responses are passed through as they're sent. Only the first `max_body_bytes` of error
+    bodies are kept, and they're logged once the response is sent.
+    """
+
+    def __init__(self, app: ASGIApp, max_body_bytes: int = settings.api.error_log_max_body_bytes):
+        """
+        Args:
+            app: The wrapped ASGI application.
+            max_body_bytes: The maximum number of bytes of an error body that are logged.
+        """
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = None
+        body = bytearray()
+        truncated = False
+
+        async def send_logging_errors(message: Message) -> None:
+            nonlocal status_code, truncated
+            await send(message)
+
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                return
+            if message["type"] != "http.response.body" or status_code < 400 or status_code in (404, 429):
+                return
+
+            chunk = message.get("body", b"")
+            remaining = self.max_body_bytes - len(body)
+            body.extend(chunk[:remaining])
+            truncated = truncated or len(chunk) > remaining
+
+            if not message.get("more_body", False):
+                text = body.decode(errors="replace") + ("..." if truncated else "")
+                logger.error("Bad response to %s with status code %s: %s", scope["path"], status_code, text)
+
+        await self.app(scope, receive, send_logging_errors)
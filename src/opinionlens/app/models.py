@@ -1,10 +1,15 @@
-import mlflow
-import numpy as np
-from scipy.sparse import spmatrix
+from typing import TYPE_CHECKING, Any
 
+from opinionlens.app import instruments
+from opinionlens.app.cache import prediction_cache
+from opinionlens.app.scorers import LinearTfidfScorer
+from opinionlens.app.timing import stage
 from opinionlens.common.settings import get_settings
 from opinionlens.common.utils import get_logger
-from opinionlens.preprocessing import clean_text, get_saved_tfidf_vectorizer, tokenizer
+from opinionlens.preprocessing import normalize_batch
+
+if TYPE_CHECKING:
+    from scipy.sparse import spmatrix
 
 settings = get_settings()
 
@@ -18,13 +23,24 @@ class Model:
     def batch_predict(self, batch: list[str]):
         raise NotImplementedError()
 
+    def preprocess_text(self, batch: list[str]):
+        raise NotImplementedError()
+
+    def predict_preprocessed(self, texts: list[str]):
+        raise NotImplementedError()
+
 
 class SklearnModel(Model):
     """A class for Scikit-learn models.
 
+    Texts repeated in a batch are predicted once, once cleaned. Per-request logs are rate
+    limited and formatted only if they're logged.
+
     Attributes:
         model_id (str): The ID of the model in the registry.
         pyfunc_model (mlflow.pyfunc.PyFuncModel): The mlflow model object with functional interface.
+        scorer (LinearTfidfScorer | None): The fast path scorer of the model, if it's a linear
+            TF-IDF pipeline and fast path scoring is enabled.
     """
 
     def __init__(self, model_id: str, model_path: str):
@@ -33,12 +49,32 @@ class SklearnModel(Model):
             model_id: The ID of the model.
             model_path: The path of the model directory.
         """
+        # Imported with the first model rather than with the app, as they take a while to import
+        import mlflow.sklearn
+        from sklearn.pipeline import Pipeline
+
         self.model_id = model_id
         self.pyfunc_model = mlflow.sklearn.load_model(model_path)
         # self._vectorizer = get_saved_tfidf_vectorizer()
         self._logger = get_logger(self.__class__.__name__, level=settings.api.logging_level)
-
-    def preprocess_text(self, batch: list[str]) -> spmatrix:
+        self._request_logger = get_logger(
+            f"{self.__class__.__name__}.requests",
+            level=settings.api.logging_level,
+            rate_limit=settings.api.request_log_rate_per_second,
+        )
+
+        self.scorer = None
+        if settings.api.fast_path_scoring:
+            self.scorer = LinearTfidfScorer.from_pipeline(self.pyfunc_model)
+        if self.scorer is not None:
+            self._logger.debug(f"Model {model_id!r} is scored with the linear TF-IDF fast path.")
+
+        # Pipelines run their transforms and their classifier apart, to time them apart
+        self._transforms = self._classifier = None
+        if isinstance(self.pyfunc_model, Pipeline) and len(self.pyfunc_model.steps) > 1:
+            self._transforms, self._classifier = self.pyfunc_model[:-1], self.pyfunc_model[-1]
+
+    def preprocess_text(self, batch: list[str]) -> "spmatrix":
         """Preprocess the input text.
 
         Args:
@@ -47,14 +83,72 @@ class SklearnModel(Model):
         Returns:
             The text encoding to be used as input to the model.
         """
-        tokenized_batch = [" ".join(tokenizer(clean_text(text))) for text in batch]
+        with stage("preprocess"):
+            tokenized_batch = normalize_batch(batch)
 
         # vectors = self._vectorizer.transform(np.array(tokenized_batch))
         vectors = tokenized_batch
 
-        self._logger.debug("Preprocessing done.")
+        self._request_logger.debug("Preprocessing done.")
         return vectors
 
+    def predict_preprocessed(self, texts: list[str]) -> list[int]:
+        """Predict the preprocessed texts, predicting each unique text once and scattering the predictions back.
+
+        Args:
+            texts: The texts returned by `preprocess_text`.
+
+        Returns:
+            A list of predictions, with 0 for negative sentiment, and 1 for positive sentiment.
+        """
+        if len(texts) < 2:
+            return self._predict_unique(texts)
+
+        with stage("deduplicate"):
+            # The position of each unique text in the order it first appears
+            positions = {}
+            indices = [positions.setdefault(text, len(positions)) for text in texts]
+
+        duplicates = len(texts) - len(positions)
+        if not duplicates:
+            return self._predict_unique(texts)
+
+        instruments.child(instruments.DEDUPLICATED_TEXTS_TOTAL, "cleaned").inc(duplicates)
+        predictions = self._predict_unique(list(positions))
+        return [predictions[i] for i in indices]
+
+    def _predict_unique(self, texts: list[str]) -> list[int]:
+        """Predict the unique preprocessed texts, running only texts not in the prediction cache through the model."""
+        with stage("cache_lookup"):
+            predictions = prediction_cache.get_many(self.model_id, texts)
+
+        misses = [i for i, prediction in enumerate(predictions) if prediction is None]
+        if misses:
+            miss_texts = [texts[i] for i in misses]
+            miss_predictions = [int(p) for p in self._score(miss_texts)]
+            for i, prediction in zip(misses, miss_predictions):
+                predictions[i] = prediction
+            with stage("cache_store"):
+                prediction_cache.put_many(self.model_id, miss_texts, miss_predictions)
+
+        return predictions
+
+    def _score(self, texts: list[str]) -> list[Any]:
+        """Run the preprocessed texts through the fast path scorer or the model."""
+        if self.scorer is not None:
+            # Vectorizing and classifying are fused into a single pass
+            with stage("score"):
+                return self.scorer.predict(texts)
+
+        if self._classifier is not None:
+            with stage("vectorize"):
+                vectors = self._transforms.transform(texts)
+            with stage("classify"):
+                return self._classifier.predict(vectors)
+
+        with stage("score"):
+            return self.pyfunc_model.predict(texts)
+
     def predict(self, text: str) -> int:
         """Predict the sentiment of the input text.
 
@@ -64,10 +158,10 @@ class SklearnModel(Model):
         Returns:
             Either 0 for negative sentiment, or 1 for positive sentiment.
         """
-        self._logger.debug(f"Asked to predict {text!r}.")
+        self._request_logger.debug("Asked to predict %r.", text)
         vectors = self.preprocess_text([text])
-        prediction = int(self.pyfunc_model.predict(vectors)[0])
-        self._logger.debug(f"Prediction result is {prediction!r}.")
+        prediction = self.predict_preprocessed(vectors)[0]
+        self._request_logger.debug("Prediction result is %r.", prediction)
         return prediction
 
     def batch_predict(self, batch: list[str]) -> list[int]:
@@ -79,7 +173,7 @@ class SklearnModel(Model):
         Returns:
             A list of predictions, with 0 for negative sentiment, and 1 for positive sentiment.
         """
-        self._logger.debug(f"Asked to batch predict a list of length {len(batch)!r}.")
+        self._request_logger.debug("Asked to batch predict a list of length %r.", len(batch))
         vectors = self.preprocess_text(batch)
-        predictions = [int(p) for p in self.pyfunc_model.predict(vectors)]
+        predictions = self.predict_preprocessed(vectors)
         return predictions
@@ -0,0 +1,149 @@
+import threading
+import time
+from datetime import datetime
+from typing import Any
+
+from opinionlens.common.settings import get_settings
+from opinionlens.common.utils import get_logger
+
+settings = get_settings()
+
+__all__ = ["registry_cache"]
+
+
+class RegistryCache:
+    """A cache of the MLflow registry metadata, refreshed in the background.
+
+    It holds the listing of the registered models of the experiment, and maps registry
+    `models:/<name>/<version>` URIs to model IDs. A registered version always points to
+    the same model, so the mapping stays valid however old it is.
+    """
+
+    def __init__(self, ttl_seconds: float, refresh_interval_seconds: float):
+        """
+        Args:
+            ttl_seconds: The age in seconds after which the listing is reported as stale.
+            refresh_interval_seconds: The number of seconds between background refreshes.
+        """
+        self.ttl = ttl_seconds
+        self.refresh_interval = refresh_interval_seconds
+        self._listing: list[dict[str, Any]] = []
+        self._model_ids: dict[str, str] = {}
+        self._last_refresh: datetime | None = None
+        self._last_refresh_time: float | None = None
+        self._last_error: str | None = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._logger = get_logger(self.__class__.__name__, level=settings.api.logging_level)
+
+    def refresh(self):
+        """Fetch the registry listing and the model IDs of all registered versions.
+
+        Errors are logged and reported with the listing, which keeps its last known value.
+        """
+        with self._refresh_lock:
+            try:
+                import mlflow
+
+                models = mlflow.search_registered_models()
+                versions = mlflow.search_model_versions()
+            except Exception as e:
+                # Keep the refresher alive whatever the registry does
+                self._last_error = f"{type(e).__name__}: {getattr(e, 'message', str(e))}"
+                self._logger.error(f"Registry refresh failed: {self._last_error}")
+                return
+
+            listing = []
+            for model in models:
+                if model.latest_versions[0].tags.get("experiment") == settings.mlflow.remote_experiment_name:
+                    listing.append({
+                        "name": model.name,
+                        "latest_version": int(model.latest_versions[0].version),
+                        "latest_version_creation": datetime.fromtimestamp(
+                            model.last_updated_timestamp / 1000
+                        ).isoformat(sep=" ", timespec="seconds"),
+                    })
+
+            model_ids = {
+                f"models:/{version.name}/{version.version}": version.model_id
+                for version in versions if version.model_id is not None
+            }
+
+            # Swap whole objects so readers never see a partial refresh
+            self._listing = listing
+            self._model_ids = {**self._model_ids, **model_ids}
+            self._last_refresh = datetime.now().replace(microsecond=0)
+            self._last_refresh_time = time.monotonic()
+            self._last_error = None
+
+        self._logger.debug(f"Registry refreshed with {len(listing)} models and {len(model_ids)} versions.")
+
+    def _refresh_periodically(self):
+        while not self._stop.wait(self.refresh_interval):
+            self.refresh()
+
+    def start(self):
+        """Start refreshing the cache in the background."""
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._refresh_periodically, name="registry-refresher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background refreshes."""
+        self._stop.set()
+        self._thread = None
+
+    @property
+    def is_populated(self) -> bool:
+        return self._last_refresh is not None
+
+    def get_listing(self) -> dict[str, Any]:
+        """Return the cached registry listing with its freshness.
+
+        Returns:
+            A dictionary with the registered models, the last refresh time, the age of the
+            listing in seconds, whether it's stale, and the error of the last refresh, if any.
+        """
+        age = None
+        if self._last_refresh_time is not None:
+            age = round(time.monotonic() - self._last_refresh_time, 3)
+
+        return {
+            "models": self._listing,
+            "last_refresh": self._last_refresh,
+            "age_seconds": age,
+            "is_stale": age is None or age > self.ttl,
+            "error": self._last_error,
+        }
+
+    def resolve_model_id(self, model_uri: str) -> str | None:
+        """Return the model ID of a registry URI, if it's cached.
+
+        Args:
+            model_uri: The URI of the model in the registry, e.g. 'models:/<name>/<version>'.
+
+        Returns:
+            The model ID, or `None` if it isn't cached.
+        """
+        return self._model_ids.get(model_uri)
+
+    def remember(self, model_uri: str, model_id: str):
+        """Cache the model ID of a registry URI resolved elsewhere.
+
+        Args:
+            model_uri: The URI of the model in the registry.
+            model_id: The ID of the model.
+        """
+        self._model_ids = {**self._model_ids, model_uri: model_id}
+
+
+registry_cache = RegistryCache(
+    ttl_seconds=settings.api.registry_cache_ttl_seconds,
+    refresh_interval_seconds=settings.api.registry_refresh_interval_seconds,
+)
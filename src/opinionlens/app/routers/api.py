@@ -1,16 +1,19 @@
 from fastapi import APIRouter
 from fastapi.responses import Response
-from prometheus_client import (
-    CONTENT_TYPE_LATEST,
-    generate_latest,
-)
+from prometheus_client import CONTENT_TYPE_LATEST
 
 from opinionlens.app import instruments
 from opinionlens.app.info import app_info
-from opinionlens.app.routers import inference, models
+from opinionlens.app.routers import inference, models, scoring
 
 router = APIRouter()
 
+router.include_router(
+    scoring.router,
+    prefix="/inference/jobs",
+    tags=["inference"],
+)
+
 router.include_router(
     inference.router,
     prefix="/inference",
@@ -35,8 +38,8 @@ async def about():
 
 
 @router.get("/metrics")
-async def inference_metrics():
+def inference_metrics():
     return Response(
-        generate_latest(registry=instruments.inference_registry),
+        instruments.inference_scrape.generate(),
         media_type=CONTENT_TYPE_LATEST,
     )
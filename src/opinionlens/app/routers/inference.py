@@ -1,14 +1,113 @@
+import json
+import math
 import time
-from typing import Annotated
+from contextlib import nullcontext
+from functools import partial
+from typing import Annotated, AsyncIterator
 
-from fastapi import APIRouter, BackgroundTasks, Body, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Body, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response
+from pydantic import ValidationError
+from starlette.requests import ClientDisconnect
 
-from opinionlens.app import instruments
-from opinionlens.app.exceptions import ModelNotAvailableError, OperationalError
+from opinionlens.app import instruments, timing
+from opinionlens.app.admission import AdmissionController
+from opinionlens.app.batching import MicroBatcher
+from opinionlens.app.coalescing import SingleFlight
+from opinionlens.app.encoding import (
+    BATCH_PARSERS,
+    BINARY_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    TEXT_MEDIA_TYPE,
+    negotiate,
+    pack_predictions,
+)
+from opinionlens.app.exceptions import ModelNotAvailableError, OperationalError, OverloadedError
+from opinionlens.app.executors import inference_executor
 from opinionlens.app.managers import model_manager
+from opinionlens.app.models import Model
+from opinionlens.app.streaming import (
+    RequestStreamingResponse,
+    iter_chunks,
+    iter_lines,
+    parse_line,
+    spool,
+)
+from opinionlens.common.settings import get_settings
+
+settings = get_settings()
 
 router = APIRouter()
 
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/jsonl", "application/json-lines")
+BATCH_RESPONSE_MEDIA_TYPES = (JSON_MEDIA_TYPE, BINARY_MEDIA_TYPE)
+
+micro_batcher = MicroBatcher(
+    inference_executor,
+    max_batch_size=settings.api.micro_batch_max_size,
+    max_wait_ms=settings.api.micro_batch_max_wait_ms,
+)
+
+admission_controllers = {
+    endpoint: AdmissionController(
+        endpoint,
+        max_in_flight=settings.api.admission_max_in_flight_texts,
+        max_queued=settings.api.admission_max_queued_texts,
+        max_queue_delay_ms=settings.api.admission_max_queue_delay_ms,
+    )
+    for endpoint in ("/predict", "/batch_predict", "/stream_predict")
+}
+
+single_flight = SingleFlight()
+
+
+def _admit(endpoint: str, weight: int):
+    """Wait for the request to be admitted to the endpoint, if admission control is enabled."""
+    if not settings.api.admission_control:
+        return nullcontext()
+    return admission_controllers[endpoint].admit(weight)
+
+
+async def _predict_single(model: Model, texts: list[str]) -> list[int]:
+    if settings.api.micro_batching:
+        return [await micro_batcher.predict(model, texts[0])]
+    return [await inference_executor.run(model, "predict", texts[0], endpoint="/predict")]
+
+
+async def _predict_batch(model: Model, texts: list[str]) -> list[int]:
+    return await inference_executor.run_batch(model, texts, endpoint="/batch_predict")
+
+
+async def _predict(model: Model, texts: list[str], endpoint: str) -> list[int]:
+    """Predict the texts, sharing the predictions in flight for concurrent requests to the endpoint if coalescing is enabled."""
+    predict_texts = partial(_predict_single if endpoint == "/predict" else _predict_batch, model)
+    if not settings.api.request_coalescing:
+        return await predict_texts(texts)
+    return await single_flight.predict(model, texts, predict_texts, endpoint)
+
+
+def _too_many_requests(e: OverloadedError) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=f"{type(e).__name__}: {e.message}",
+        headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+    )
+
+
+def _record_batch(endpoint: str, texts: list[str], predictions: list[int]):
+    """Record the text lengths and the predicted sentiments of a batch, with one update per metric."""
+    instruments.observe_many(
+        instruments.child(instruments.INPUT_TEXT_LENGTH_CHARS, endpoint),
+        map(len, texts),
+    )
+
+    positives = predictions.count(1)
+    for label, count in (("POSITIVE", positives), ("NEGATIVE", len(predictions) - positives)):
+        # Only labels that were predicted have a series, as with one increment per prediction
+        if count:
+            instruments.child(instruments.PREDICTED_SENTIMENT_TOTAL, label).inc(count)
+
 
 @router.get("/predict")
 async def predict(text: str, background_tasks: BackgroundTasks):
@@ -16,30 +115,39 @@ async def predict(text: str, background_tasks: BackgroundTasks):
     try:
         model = model_manager.get_default_model()
 
-        start_time = time.perf_counter()
-        prediction = model.predict(text)
-        end_time = time.perf_counter()
+        async with _admit("/predict", 1):
+            start_time = time.perf_counter()
+            prediction = (await _predict(model, [text], "/predict"))[0]
+            end_time = time.perf_counter()
 
+    except OverloadedError as e:
+        raise _too_many_requests(e)
     except (ModelNotAvailableError, OperationalError) as e:
         raise HTTPException(status_code=503, detail=f"{type(e).__name__}: {e.message}")
 
-    prediction = "POSITIVE" if prediction == 1 else "NEGATIVE"
+    with timing.record(timing.sample()) as timings, timing.stage("serialize"):
+        prediction = "POSITIVE" if prediction == 1 else "NEGATIVE"
+        response = JSONResponse({"prediction": prediction})
 
     def log_metrics():
-        instruments.INPUT_TEXT_LENGTH_CHARS.labels("/predict").observe(len(text))
+        timing.observe(timings, model.model_id, "/predict")
+
+        instruments.child(instruments.INPUT_TEXT_LENGTH_CHARS, "/predict").observe(len(text))
 
-        instruments.MODEL_INFERENCE_TIME_SECONDS.labels(
+        instruments.child(
+            instruments.MODEL_INFERENCE_TIME_SECONDS,
             "/predict",
             model.__class__.__name__,
         ).observe(end_time - start_time)
 
-        instruments.PREDICTED_SENTIMENT_TOTAL.labels(
+        instruments.child(
+            instruments.PREDICTED_SENTIMENT_TOTAL,
             prediction
         ).inc()
 
     background_tasks.add_task(log_metrics)
 
-    return {"prediction": prediction}
+    return response
 
 
 @router.post("/predict")
@@ -51,49 +159,197 @@ async def encrypted_predict(
     return await predict(text, background_tasks)
 
 
-@router.post("/batch_predict")
-async def batch_predict(
-    batch: Annotated[list[str], Body()],
-    background_tasks: BackgroundTasks,
-) -> list[str]:
-    """Predict the sentiments of multiple texts."""
+async def _parse_batch(request: Request) -> list[str]:
+    """Parse the texts of a batch request in the format of its content type, JSON by default, rejecting empty batches."""
+    media_type = request.headers.get("content-type", JSON_MEDIA_TYPE).split(";")[0].strip().lower()
+    parser = BATCH_PARSERS.get(media_type)
+    if parser is None:
+        raise HTTPException(status_code=415, detail=f"Unsupported media type {media_type!r}.")
+
+    body = await request.body()
+    try:
+        with timing.stage("parse"):
+            batch = parser(body)
+    except ValidationError as e:
+        # Reported as FastAPI reports invalid JSON bodies
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)],
+            body=body,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid request body: {e}")
+
+    if not batch:
+        raise HTTPException(status_code=422, detail="Batch has no texts.")
+
+    return batch
+
+
+@router.post(
+    "/batch_predict",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                JSON_MEDIA_TYPE: {"schema": {"type": "array", "items": {"type": "string"}}},
+                TEXT_MEDIA_TYPE: {"schema": {"type": "string"}},
+                BINARY_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+            },
+        },
+    },
+    responses={200: {"content": {BINARY_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}}}}},
+)
+async def batch_predict(request: Request, background_tasks: BackgroundTasks) -> list[str]:
+    """Predict the sentiments of multiple texts.
+
+    The request body is either a JSON array of strings, newline-delimited UTF-8 texts with the
+    'text/plain' content type, or length-prefixed UTF-8 texts with the 'application/octet-stream'
+    content type, each text following its length in bytes as a little-endian unsigned 32-bit integer.
+
+    The response is a JSON array of sentiments, or with 'Accept: application/octet-stream', the
+    class IDs packed as one unsigned byte per text, 0 for negative and 1 for positive.
+
+    Repeated texts are predicted once, and large batches are split into sub-batches predicted concurrently.
+    """
+    sampled = timing.sample()
+    with timing.record(sampled) as body_timings:
+        batch = await _parse_batch(request)
+
+    if len(batch) > settings.api.max_batch_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(batch)} texts exceeds the maximum of {settings.api.max_batch_size} texts.",
+        )
+
     try:
         model = model_manager.get_default_model()
 
-        start_time = time.perf_counter()
-        predictions = model.batch_predict(batch)
-        end_time = time.perf_counter()
+        async with _admit("/batch_predict", len(batch)):
+            start_time = time.perf_counter()
+            predictions = await _predict(model, batch, "/batch_predict")
+            end_time = time.perf_counter()
 
+    except OverloadedError as e:
+        raise _too_many_requests(e)
     except (ModelNotAvailableError, OperationalError) as e:
         raise HTTPException(status_code=503, detail=f"{type(e).__name__}: {e.message}")
 
-    response = [
-        "POSITIVE" if prediction == 1 else "NEGATIVE" for prediction in predictions
-    ]
+    with timing.record(sampled) as timings, timing.stage("serialize"):
+        if negotiate(request.headers.get("accept"), BATCH_RESPONSE_MEDIA_TYPES) == BINARY_MEDIA_TYPE:
+            response = Response(pack_predictions(predictions), media_type=BINARY_MEDIA_TYPE)
+        else:
+            labels = [
+                "POSITIVE" if prediction == 1 else "NEGATIVE" for prediction in predictions
+            ]
+            response = JSONResponse(labels)
 
     def log_metrics():
-        instruments.MODEL_INFERENCE_TIME_SECONDS.labels(
+        timing.observe(body_timings, model.model_id, "/batch_predict")
+        timing.observe(timings, model.model_id, "/batch_predict")
+
+        instruments.child(
+            instruments.MODEL_INFERENCE_TIME_SECONDS,
             "/batch_predict",
             model.__class__.__name__,
         ).observe(end_time - start_time)
 
-        instruments.BATCH_INFERENCE_TIME_PER_ITEM_SECONDS.labels(
+        instruments.child(
+            instruments.BATCH_INFERENCE_TIME_PER_ITEM_SECONDS,
             "/batch_predict",
             model.__class__.__name__,
         ).observe((end_time - start_time) / len(batch))
 
-        instruments.BATCH_SIZE_TEXT.labels(
+        instruments.child(
+            instruments.BATCH_SIZE_TEXT,
             "/batch_predict"
         ).observe(len(batch))
 
-        for text in batch:
-            instruments.INPUT_TEXT_LENGTH_CHARS.labels("/batch_predict").observe(len(text))
-
-        for prediction in response:
-            instruments.PREDICTED_SENTIMENT_TOTAL.labels(
-                prediction
-            ).inc()
+        _record_batch("/batch_predict", batch, predictions)
 
     background_tasks.add_task(log_metrics)
 
     return response
+
+
+async def _stream_predictions(model: Model, request: Request, ndjson: bool) -> AsyncIterator[str]:
+    """Score the lines of the request body chunk by chunk, yielding NDJSON results."""
+    lines = iter_lines(request.stream(), max_line_bytes=settings.api.stream_max_line_bytes)
+
+    try:
+        async for chunk in iter_chunks(lines, settings.api.stream_chunk_size):
+            results = {}
+            texts = []
+            for line_number, line in chunk:
+                try:
+                    texts.append((line_number, parse_line(line, ndjson)))
+                except ValueError as e:
+                    results[line_number] = {"line": line_number, "error": f"Invalid line: {e}"}
+
+            if texts:
+                # Each chunk is admitted on its own, so a long stream doesn't hold its place between chunks
+                async with _admit("/stream_predict", len(texts)):
+                    start_time = time.perf_counter()
+                    predictions = await inference_executor.run(
+                        model, "batch_predict", [text for _, text in texts], endpoint="/stream_predict"
+                    )
+                    end_time = time.perf_counter()
+
+                for (line_number, _), prediction in zip(texts, predictions):
+                    prediction = "POSITIVE" if prediction == 1 else "NEGATIVE"
+                    results[line_number] = {"line": line_number, "prediction": prediction}
+
+                _record_batch("/stream_predict", [text for _, text in texts], predictions)
+                instruments.child(instruments.BATCH_SIZE_TEXT, "/stream_predict").observe(len(texts))
+                instruments.child(
+                    instruments.MODEL_INFERENCE_TIME_SECONDS,
+                    "/stream_predict",
+                    model.__class__.__name__,
+                ).observe(end_time - start_time)
+                instruments.child(
+                    instruments.BATCH_INFERENCE_TIME_PER_ITEM_SECONDS,
+                    "/stream_predict",
+                    model.__class__.__name__,
+                ).observe((end_time - start_time) / len(texts))
+
+            with timing.record(timing.sample()) as timings, timing.stage("serialize"):
+                output = "".join(json.dumps(results[line_number]) + "\n" for line_number, _ in chunk)
+            timing.observe(timings, model.model_id, "/stream_predict")
+
+            yield output
+
+    except ClientDisconnect:
+        return
+    except OverloadedError as e:
+        # The lines after the last prediction can be sent again once the load drops
+        yield json.dumps({
+            "error": f"{type(e).__name__}: {e.message}",
+            "retry_after": max(1, math.ceil(e.retry_after)),
+        }) + "\n"
+    except (ValueError, ModelNotAvailableError, OperationalError) as e:
+        # The response has started, report the error as the last line
+        message = getattr(e, "message", str(e))
+        yield json.dumps({"error": f"{type(e).__name__}: {message}"}) + "\n"
+
+
+@router.post("/stream_predict")
+async def stream_predict(request: Request) -> RequestStreamingResponse:
+    """Predict the sentiments of newline-delimited texts, streaming the predictions back as they're made.
+
+    The request body is either NDJSON, with a JSON string or an object with a 'text' key per line,
+    or plain text with one text per line. Each response line is a JSON object with the input line
+    number and either its prediction or an error. A stream shed under load ends with an error line
+    with the number of seconds to wait before sending the remaining lines in 'retry_after'.
+    """
+    media_type = request.headers.get("content-type", "text/plain").split(";")[0].strip()
+    if media_type not in NDJSON_MEDIA_TYPES and media_type != "text/plain":
+        raise HTTPException(status_code=415, detail=f"Unsupported media type {media_type!r}.")
+
+    try:
+        model = model_manager.get_default_model()
+    except (ModelNotAvailableError, OperationalError) as e:
+        raise HTTPException(status_code=503, detail=f"{type(e).__name__}: {e.message}")
+
+    return RequestStreamingResponse(
+        spool(_stream_predictions(model, request, ndjson=media_type in NDJSON_MEDIA_TYPES)),
+        media_type="application/x-ndjson",
+    )
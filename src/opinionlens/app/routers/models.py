@@ -1,51 +1,81 @@
-from datetime import datetime
-from typing import Annotated
+import asyncio
+from typing import Annotated, Any
 
-import mlflow
 from fastapi import APIRouter, Body, HTTPException
-from mlflow.exceptions import MlflowException
 
-from opinionlens.app.exceptions import ModelNotAvailableError, OperationalError
+from opinionlens.app.exceptions import (
+    JobNotFoundError,
+    ModelNotAvailableError,
+    OperationalError,
+)
+from opinionlens.app.jobs import Job, JobRegistry
 from opinionlens.app.managers import model_manager
+from opinionlens.app.registry import registry_cache
 from opinionlens.common.settings import get_settings
 
 settings = get_settings()
 
 router = APIRouter()
 
+# A single worker keeps model fetches from running concurrently
+fetch_jobs = JobRegistry("fetch_jobs", max_workers=1)
 
-@router.post("/", status_code=201)
-def fetch_model(
-    model_name: Annotated[str, Body()],
-    model_version: Annotated[int, Body()],
-    set_default: Annotated[bool, Body()] = False,
-):
-    """Retrieve a new model from the model registry."""
-    model_uri = f"models:/{model_name}/{model_version}"
 
-    try:
-        model_path, model_id = model_manager.fetch_model(model_uri)
-    except MlflowException as e:
-        raise HTTPException(status_code=503, detail=f"Model registry error:\n{e.message}")
-    except OperationalError as e:
-            raise HTTPException(status_code=503, detail=f"{type(e).__name__}: {e.message}")
+def _fetch_model_job(job: Job, model_uri: str, set_default: bool) -> dict[str, Any]:
+    """Download, load, and warm up the model, then set it as default if requested."""
+    job.update(stage="fetching", progress=0.1)
+    model_path, model_id = model_manager.fetch_model(model_uri)
+
+    job.update(stage="warming_up", progress=0.7)
+    warmup_seconds = model_manager.warm_up(model_id)
 
     message = f"Model {model_id!r} saved at {model_path!r}"
 
     if set_default:
-        try:
-            model_manager.set_default(model_id)
-        except OperationalError as e:
-            raise HTTPException(status_code=503, detail=f"{type(e).__name__}: {e.message}")
-
+        job.update(stage="setting_default", progress=0.9)
+        model_manager.set_default(model_id)
         message += " and set as default"
 
     return {
         "model_id": model_id,
         "message": message,
+        "warmup_seconds": round(warmup_seconds, 6),
+    }
+
+
+@router.post("/", status_code=202)
+def fetch_model(
+    model_name: Annotated[str, Body()],
+    model_version: Annotated[int, Body()],
+    set_default: Annotated[bool, Body()] = False,
+):
+    """Retrieve a new model from the model registry in the background.
+
+    The model is downloaded, loaded, and warmed up before it's set as default, if requested.
+    Poll the returned job to follow its progress.
+    """
+    model_uri = f"models:/{model_name}/{model_version}"
+
+    job = fetch_jobs.submit("fetch_model", _fetch_model_job, model_uri, set_default)
+
+    return {
+        "job_id": job.job_id,
+        "status": job.status,
+        "message": f"Fetching model {model_uri!r}",
     }
 
 
+@router.get("/jobs/{job_id}")
+async def get_fetch_job(job_id: str):
+    """Display the status and progress of a model fetching job."""
+    try:
+        job = fetch_jobs.get(job_id)
+    except JobNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"{e.message}")
+
+    return job.to_dict()
+
+
 @router.get("/")
 async def list_models(brief: bool = False):
     """List the details of all available models."""
@@ -94,18 +124,12 @@ async def delete_model(model_id: str):
 
 @router.get("/registry")
 async def display_models_from_registry():
-    """Display models available at the MLflow model registry."""
-    models = mlflow.search_registered_models()
+    """Display models available at the MLflow model registry.
 
-    results = []
-    for model in models:
-        if model.latest_versions[0].tags.get("experiment") == settings.mlflow.remote_experiment_name:
-            results.append({
-                "name": model.name,
-                "latest_version": int(model.latest_versions[0].version),
-                "latest_version_creation": datetime.fromtimestamp(
-                    model.last_updated_timestamp / 1000
-                ).isoformat(sep=" ", timespec="seconds"),
-            })
+    The listing is served from a cache refreshed in the background, with its last refresh
+    time and staleness.
+    """
+    if not registry_cache.is_populated:
+        await asyncio.to_thread(registry_cache.refresh)
 
-    return results
+    return registry_cache.get_listing()
@@ -0,0 +1,146 @@
+import asyncio
+import os
+import shutil
+import uuid
+from typing import Annotated
+
+from fastapi import APIRouter, Form, HTTPException, UploadFile
+from fastapi.responses import FileResponse
+
+from opinionlens.app.exceptions import (
+    JobNotFoundError,
+    ModelNotAvailableError,
+    OperationalError,
+)
+from opinionlens.app.jobs import Job, JobRegistry
+from opinionlens.app.managers import model_manager
+from opinionlens.app.scoring import SUPPORTED_EXTENSIONS, get_results_path, score_file_job
+from opinionlens.common.settings import get_settings
+
+settings = get_settings()
+
+router = APIRouter()
+
+
+def _remove_results(job: Job):
+    results_path = get_results_path(job.job_id)
+    if os.path.exists(results_path):
+        os.remove(results_path)
+
+
+# Few workers keep scoring jobs from starving interactive predictions
+scoring_jobs = JobRegistry(
+    "scoring_jobs",
+    max_workers=settings.api.scoring_workers,
+    on_forget=_remove_results,
+)
+
+
+def _resolve_input_path(path: str) -> str:
+    """Resolve a server-side input path, which must be inside the scoring input directory."""
+    input_dir = os.path.realpath(settings.api.scoring_input_path)
+    input_path = os.path.realpath(os.path.join(input_dir, path))
+
+    if os.path.commonpath([input_dir, input_path]) != input_dir:
+        raise HTTPException(status_code=403, detail=f"Path {path!r} is outside the scoring input directory.")
+    if not os.path.isfile(input_path):
+        raise HTTPException(status_code=404, detail=f"File {path!r} doesn't exist.")
+
+    return input_path
+
+
+def _save_upload(file: UploadFile, extension: str) -> str:
+    """Save the uploaded file in the scoring jobs directory."""
+    upload_path = os.path.join(settings.api.scoring_jobs_path, f"upload-{uuid.uuid4().hex}{extension}")
+    with open(upload_path, "wb") as f:
+        shutil.copyfileobj(file.file, f, length=1024 ** 2)
+    return upload_path
+
+
+@router.post("/", status_code=202)
+async def submit_scoring_job(
+    file: UploadFile | None = None,
+    path: Annotated[str | None, Form()] = None,
+    model_id: Annotated[str | None, Form()] = None,
+    text_column: Annotated[str, Form()] = "text",
+):
+    """Score a CSV or JSONL file in the background.
+
+    Either upload the file, or give the path of a file inside the scoring input directory.
+    The job uses the given model, or the default model at submission time, until it's done.
+    Poll the returned job to follow its progress, then download its results.
+    """
+    if (file is None) == (path is None):
+        raise HTTPException(status_code=400, detail="Provide either a file or a path.")
+
+    filename = (file.filename or "") if file is not None else path
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in SUPPORTED_EXTENSIONS:
+        raise HTTPException(
+            status_code=415, detail=f"Unsupported file type {extension!r}, expected one of {SUPPORTED_EXTENSIONS}."
+        )
+
+    try:
+        if model_id is None:
+            model = await asyncio.to_thread(model_manager.get_default_model)
+        else:
+            model = await asyncio.to_thread(model_manager.get_model, model_id)
+    except ModelNotAvailableError as e:
+        status_code = 503 if model_id is None else 404
+        raise HTTPException(status_code=status_code, detail=f"{type(e).__name__}: {e.message}")
+    except OperationalError as e:
+        raise HTTPException(status_code=503, detail=f"{type(e).__name__}: {e.message}")
+
+    os.makedirs(settings.api.scoring_jobs_path, exist_ok=True)
+    if file is not None:
+        input_path = await asyncio.to_thread(_save_upload, file, extension)
+    else:
+        input_path = _resolve_input_path(path)
+
+    # The job predicts its chunks through the inference executor, on this event loop
+    job = scoring_jobs.submit(
+        "score_file",
+        score_file_job,
+        model,
+        input_path,
+        text_column,
+        file is not None,
+        asyncio.get_running_loop(),
+    )
+
+    return {
+        "job_id": job.job_id,
+        "status": job.status,
+        "message": f"Scoring {filename!r} with model {model.model_id!r}",
+    }
+
+
+@router.get("/")
+async def list_scoring_jobs():
+    """List the scoring jobs."""
+    return [job.to_dict() for job in scoring_jobs.list()]
+
+
+@router.get("/{job_id}")
+async def get_scoring_job(job_id: str):
+    """Display the status, progress, throughput, and ETA of a scoring job."""
+    try:
+        job = scoring_jobs.get(job_id)
+    except JobNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"{e.message}")
+
+    return job.to_dict()
+
+
+@router.get("/{job_id}/results")
+async def download_scoring_results(job_id: str):
+    """Download the predictions of a finished scoring job as a CSV file."""
+    try:
+        job = scoring_jobs.get(job_id)
+    except JobNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"{e.message}")
+
+    if job.status != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job {job_id!r} is {job.status}.")
+
+    return FileResponse(get_results_path(job_id), media_type="text/csv", filename=f"{job_id}.csv")
@@ -0,0 +1,161 @@
+import math
+from collections import Counter
+from typing import Any, Callable
+
+import numpy as np
+
+from opinionlens.preprocessing.fused import encode_text, uses_default_analyzer
+
+__all__ = ["LinearTfidfScorer"]
+
+
+class LinearTfidfScorer:
+    """A compact scorer for `make_pipeline(TfidfVectorizer, <linear binary classifier>)` pipelines.
+
+    Scoring a text maps its tokens to feature indices, looks up each feature's IDF and
+    IDF×coefficient product, accumulates the weighted sum and the norm of the TF-IDF vector
+    in a single pass, and normalizes the sum at the end. It skips sklearn's input validation,
+    sparse matrix construction, and pipeline dispatch, and makes the same predictions as the
+    pipeline.
+
+    Use `LinearTfidfScorer.from_pipeline` to build a scorer from a fitted pipeline.
+    """
+
+    def __init__(
+        self,
+        encoder: Callable[[str], list[int]],
+        idf: list[float],
+        idf_coef: list[float],
+        intercept: float,
+        classes: list[Any],
+        sublinear_tf: bool,
+        binary: bool,
+        norm: str | None,
+    ):
+        """
+        Args:
+            encoder: The callable mapping a text to the feature indices of its tokens.
+            idf: The IDF of each feature.
+            idf_coef: The product of the IDF and the classifier coefficient of each feature.
+            intercept: The intercept of the classifier.
+            classes: The negative and the positive class labels of the classifier.
+            sublinear_tf: Whether the term frequencies are replaced by `1 + log(tf)`.
+            binary: Whether the term frequencies are clipped to 1.
+            norm: The norm the TF-IDF vectors are normalized with, one of 'l2', 'l1', or `None`.
+        """
+        self.encoder = encoder
+        self.idf = idf
+        self.idf_coef = idf_coef
+        self.intercept = intercept
+        self.classes = classes
+        self.sublinear_tf = sublinear_tf
+        self.binary = binary
+        self.norm = norm
+
+    @classmethod
+    def from_pipeline(cls, pipeline: Any) -> "LinearTfidfScorer | None":
+        """Build a scorer from a fitted pipeline, if it's a linear TF-IDF pipeline.
+
+        Args:
+            pipeline: The fitted model object.
+
+        Returns:
+            The scorer, or `None` if the model isn't a pipeline of a fitted `TfidfVectorizer`
+            followed by a fitted linear binary classifier.
+        """
+        # Already imported by the loaded model
+        from sklearn.base import ClassifierMixin
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.pipeline import Pipeline
+
+        if not isinstance(pipeline, Pipeline) or len(pipeline.steps) != 2:
+            return None
+
+        vectorizer, classifier = pipeline[0], pipeline[-1]
+        if not isinstance(vectorizer, TfidfVectorizer) or not isinstance(classifier, ClassifierMixin):
+            return None
+        # Only fitted linear classifiers have coefficients, kernel SVMs raise an AttributeError for them
+        if not hasattr(vectorizer, "vocabulary_") or not all(hasattr(classifier, name) for name in ("coef_", "intercept_")):
+            return None
+        if vectorizer.norm not in ("l2", "l1", None) or len(classifier.classes_) != 2:
+            return None
+
+        coef = classifier.coef_
+        if hasattr(coef, "toarray"):
+            # Sparsified classifier
+            coef = coef.toarray()
+        coef = np.asarray(coef, dtype=np.float64).ravel()
+        if len(coef) != len(vectorizer.vocabulary_):
+            return None
+
+        if vectorizer.use_idf:
+            idf = np.asarray(vectorizer.idf_, dtype=np.float64)
+        else:
+            idf = np.ones(len(vectorizer.vocabulary_), dtype=np.float64)
+
+        vocabulary = dict(vectorizer.vocabulary_)
+        if uses_default_analyzer(vectorizer):
+            def encoder(text: str) -> list[int]:
+                return encode_text(text, vocabulary)
+        else:
+            analyzer = vectorizer.build_analyzer()
+
+            def encoder(text: str) -> list[int]:
+                return [vocabulary[token] for token in analyzer(text) if token in vocabulary]
+
+        return cls(
+            encoder=encoder,
+            idf=idf.tolist(),
+            idf_coef=(idf * coef).tolist(),
+            intercept=float(np.ravel(classifier.intercept_)[0]),
+            classes=classifier.classes_.tolist(),
+            sublinear_tf=vectorizer.sublinear_tf,
+            binary=vectorizer.binary,
+            norm=vectorizer.norm,
+        )
+
+    def decision_function(self, text: str) -> float:
+        """Compute the classifier's confidence score of the text.
+
+        Args:
+            text: The input text, preprocessed as for the pipeline.
+
+        Returns:
+            The signed distance of the text's TF-IDF vector to the decision boundary.
+        """
+        idf, idf_coef = self.idf, self.idf_coef
+        total = 0.0
+        norm = 0.0
+
+        for index, count in Counter(self.encoder(text)).items():
+            if self.binary:
+                tf = 1.0
+            elif self.sublinear_tf:
+                tf = math.log(count) + 1.0
+            else:
+                tf = float(count)
+
+            total += tf * idf_coef[index]
+            if self.norm == "l2":
+                norm += (tf * idf[index]) ** 2
+            elif self.norm == "l1":
+                norm += abs(tf * idf[index])
+
+        if self.norm == "l2":
+            norm = math.sqrt(norm)
+        if self.norm is not None and norm > 0.0:
+            total /= norm
+
+        return total + self.intercept
+
+    def predict(self, texts: list[str]) -> list[Any]:
+        """Predict the class labels of the texts.
+
+        Args:
+            texts: A list of input texts, preprocessed as for the pipeline.
+
+        Returns:
+            A list of class labels.
+        """
+        negative, positive = self.classes
+        return [positive if self.decision_function(text) > 0 else negative for text in texts]
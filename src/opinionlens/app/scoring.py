@@ -0,0 +1,133 @@
+import asyncio
+import csv
+import os
+import time
+from typing import Any, Iterator
+
+from opinionlens.app import instruments
+from opinionlens.app.exceptions import OperationalError
+from opinionlens.app.executors import inference_executor
+from opinionlens.app.jobs import Job
+from opinionlens.app.models import Model
+from opinionlens.common.settings import get_settings
+
+settings = get_settings()
+
+__all__ = ["SUPPORTED_EXTENSIONS", "get_results_path", "score_file_job"]
+
+SUPPORTED_EXTENSIONS = (".csv", ".jsonl")
+
+
+def get_results_path(job_id: str) -> str:
+    """Get the path of the results file of a scoring job."""
+    return os.path.join(settings.api.scoring_jobs_path, f"{job_id}.csv")
+
+
+def _read_chunks(f, extension: str, text_column: str, chunk_size: int) -> Iterator[list[str]]:
+    """Read the texts of a CSV or JSONL file in chunks."""
+    # Imported by the first scoring job rather than with the app
+    import pandas as pd
+
+    if extension == ".csv":
+        reader = pd.read_csv(f, usecols=[text_column], chunksize=chunk_size)
+    else:
+        reader = pd.read_json(f, lines=True, chunksize=chunk_size)
+
+    for chunk in reader:
+        if text_column not in chunk:
+            raise ValueError(f"Column {text_column!r} doesn't exist.")
+        yield chunk[text_column].fillna("").astype(str).to_list()
+
+
+def _predict_chunk(model: Model, texts: list[str], loop: asyncio.AbstractEventLoop) -> list[int]:
+    """Predict a chunk on a single worker of the inference pool, as background work of the API's event loop.
+
+    Raises:
+        OperationalError: The event loop was closed, the API is shutting down.
+    """
+    future = asyncio.run_coroutine_threadsafe(
+        inference_executor.run(model, "batch_predict", texts, endpoint="/jobs", background=True),
+        loop,
+    )
+    while True:
+        try:
+            return future.result(timeout=1)
+        except TimeoutError:
+            # A call scheduled right before the loop closed never finishes
+            if loop.is_closed():
+                future.cancel()
+                raise OperationalError("The API is shutting down.")
+
+
+def score_file_job(
+    job: Job,
+    model: Model,
+    input_path: str,
+    text_column: str,
+    remove_input: bool,
+    loop: asyncio.AbstractEventLoop,
+) -> dict[str, Any]:
+    """Score the texts of a CSV or JSONL file chunk by chunk, writing the predictions to the results file.
+
+    The model object is pinned for the whole job, so setting another default model or
+    evicting the model doesn't affect a running job. The chunks are predicted on the
+    inference pool, through the event loop `loop` of the API.
+    """
+    extension = os.path.splitext(input_path)[1].lower()
+    total_bytes = max(os.path.getsize(input_path), 1)
+    results_path = get_results_path(job.job_id)
+
+    job.update(stage="scoring", model_id=model.model_id, processed_texts=0)
+    start_time = time.perf_counter()
+    processed = 0
+
+    try:
+        with open(input_path, "rb") as f, open(results_path, "w", newline="") as results:
+            writer = csv.writer(results)
+            writer.writerow(["row", "prediction"])
+
+            for texts in _read_chunks(f, extension, text_column, settings.api.scoring_chunk_size):
+                # Yield to the interactive predictions in flight, up to the maximum wait
+                inference_executor.wait_idle(settings.api.scoring_max_yield_ms / 1000)
+
+                chunk_start_time = time.perf_counter()
+                predictions = _predict_chunk(model, texts, loop)
+                chunk_end_time = time.perf_counter()
+
+                writer.writerows(
+                    (processed + i, "POSITIVE" if prediction == 1 else "NEGATIVE")
+                    for i, prediction in enumerate(predictions)
+                )
+                processed += len(texts)
+
+                instruments.BATCH_SIZE_TEXT.labels("/jobs").observe(len(texts))
+                instruments.MODEL_INFERENCE_TIME_SECONDS.labels(
+                    "/jobs",
+                    model.__class__.__name__,
+                ).observe(chunk_end_time - chunk_start_time)
+
+                # The parser reads ahead, so the file position slightly overestimates the progress
+                progress = min(f.tell() / total_bytes, 0.99)
+                elapsed = chunk_end_time - start_time
+                job.update(
+                    progress=progress,
+                    processed_texts=processed,
+                    throughput_texts_per_second=round(processed / elapsed, 2),
+                    eta_seconds=round(elapsed * (1 - progress) / progress, 2),
+                )
+    finally:
+        if remove_input:
+            os.remove(input_path)
+
+    elapsed = time.perf_counter() - start_time
+    job.update(
+        stage="done",
+        throughput_texts_per_second=round(processed / elapsed, 2) if elapsed else None,
+        eta_seconds=0,
+    )
+
+    return {
+        "model_id": model.model_id,
+        "processed_texts": processed,
+        "elapsed_seconds": round(elapsed, 4),
+    }
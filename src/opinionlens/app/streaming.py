@@ -0,0 +1,151 @@
+import asyncio
+import json
+import tempfile
+from typing import AsyncIterator
+
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+__all__ = ["RequestStreamingResponse", "spool", "iter_lines", "iter_chunks", "parse_line"]
+
+
+class RequestStreamingResponse(StreamingResponse):
+    """A streaming response whose body iterator reads the request body while it's sent.
+
+    `StreamingResponse` listens for the client disconnecting on the request's receive channel,
+    which would consume the request body messages the body iterator is still reading. This
+    response leaves the channel to the body iterator, which sees the disconnect itself.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def spool(producer: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    """Spool the producer's output to a temporary file in the background, yielding it as it's spooled.
+
+    The producer keeps reading the request while the client isn't reading the response, which
+    many clients only do once they've sent the whole request. The output is kept on disk, so
+    memory stays flat either way.
+
+    Args:
+        producer: An iterator of response text.
+
+    Yields:
+        The spooled output, in order.
+    """
+    written = asyncio.Event()
+    with tempfile.TemporaryFile() as f:
+
+        async def produce():
+            async for text in producer:
+                f.seek(0, 2)
+                f.write(text.encode("utf-8"))
+                written.set()
+
+        task = asyncio.create_task(produce())
+        position = 0
+        try:
+            while True:
+                waiter = asyncio.ensure_future(written.wait())
+                await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+                waiter.cancel()
+                written.clear()
+
+                while True:
+                    # The producer moves the file position while the output is sent
+                    f.seek(position)
+                    data = f.read(64 * 1024)
+                    if not data:
+                        break
+                    position += len(data)
+                    yield data
+
+                if task.done():
+                    # Raise the producer's error, if any
+                    task.result()
+                    return
+        finally:
+            task.cancel()
+
+
+async def iter_lines(stream: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[bytes]:
+    """Split a byte stream into lines as the chunks arrive, keeping at most one line in memory.
+
+    Args:
+        stream: The byte stream, e.g. `Request.stream()`.
+        max_line_bytes: The maximum length of a line in bytes.
+
+    Yields:
+        The lines without their line endings.
+
+    Raises:
+        ValueError: A line is longer than `max_line_bytes`.
+    """
+    buffer = b""
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r")
+        if len(buffer) > max_line_bytes:
+            raise ValueError(f"A line is longer than {max_line_bytes} bytes.")
+
+    if buffer:
+        yield buffer.rstrip(b"\r")
+
+
+async def iter_chunks(
+    lines: AsyncIterator[bytes], chunk_size: int
+) -> AsyncIterator[list[tuple[int, bytes]]]:
+    """Group the non-empty lines into chunks of a fixed size.
+
+    Args:
+        lines: The lines of the stream.
+        chunk_size: The maximum number of lines in a chunk.
+
+    Yields:
+        Lists of (line number, line) pairs, counting lines from 1.
+    """
+    chunk = []
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+
+        chunk.append((line_number, line))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def parse_line(line: bytes, ndjson: bool) -> str:
+    """Extract the text of a line.
+
+    Args:
+        line: The raw line.
+        ndjson: Whether the line is JSON, either a string or an object with a 'text' key,
+            instead of plain text.
+
+    Returns:
+        The text of the line.
+
+    Raises:
+        ValueError: The line isn't valid UTF-8 or valid JSON, or it has no text.
+    """
+    if not ndjson:
+        return line.decode("utf-8")
+
+    value = json.loads(line)
+    if isinstance(value, dict):
+        value = value.get("text")
+    if not isinstance(value, str):
+        raise ValueError("Expected a JSON string or an object with a 'text' string.")
+
+    return value
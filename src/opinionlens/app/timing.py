@@ -0,0 +1,91 @@
+import random
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+from opinionlens.app import instruments
+from opinionlens.common.settings import get_settings
+
+settings = get_settings()
+
+__all__ = ["sample", "record", "stage", "observe"]
+
+# The stage timings of the sampled call running in the current thread or task, if any
+_timings: ContextVar[dict[str, float] | None] = ContextVar("stage_timings", default=None)
+
+# Reused by every stage of calls that aren't sampled, so they cost a context variable lookup
+_NOT_RECORDED = nullcontext()
+
+
+class _Stage:
+    __slots__ = ("timings", "name", "start_time")
+
+    def __init__(self, timings: dict[str, float], name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.start_time = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start_time
+        self.timings[self.name] = self.timings.get(self.name, 0.0) + elapsed
+
+
+def sample() -> bool:
+    """Decide whether to record the stage timings of a call, at the configured sample rate."""
+    rate = settings.api.stage_timing_sample_rate
+    return rate > 0 and (rate >= 1 or random.random() < rate)
+
+
+@contextmanager
+def record(sampled: bool = True):
+    """Record the timings of the stages run inside the block.
+
+    Args:
+        sampled: Whether the call is sampled, nothing is recorded if it isn't.
+
+    Yields:
+        A dictionary of the seconds spent in each stage, filled as the stages run, or `None`
+        if the call isn't sampled.
+    """
+    if not sampled:
+        yield None
+        return
+
+    timings = {}
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def stage(name: str):
+    """Time a stage of the recorded call, if any, adding up repeated stages.
+
+    Args:
+        name: The name of the stage, e.g. 'preprocess'.
+
+    Returns:
+        A context manager timing the block.
+    """
+    timings = _timings.get()
+    if timings is None:
+        return _NOT_RECORDED
+    return _Stage(timings, name)
+
+
+def observe(timings: dict[str, float] | None, model_id: str, endpoint: str):
+    """Export the stage timings of a recorded call to the stage latency histogram.
+
+    Args:
+        timings: The stage timings, or `None` if the call wasn't sampled.
+        model_id: The ID of the model the call was made to.
+        endpoint: The endpoint the call was made for.
+    """
+    if not timings:
+        return
+
+    for name, seconds in timings.items():
+        instruments.child(instruments.INFERENCE_STAGE_SECONDS, name, model_id, endpoint).observe(seconds)
@@ -1,5 +1,6 @@
 import os
 from functools import lru_cache
+from typing import Literal
 
 from pydantic import (
     BaseModel,
@@ -7,6 +8,7 @@ from pydantic import (
     Field,
     HttpUrl,
     field_validator,
+    model_validator,
 )
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -42,10 +44,196 @@ class APISettings(BaseModel):
         "./models",
         description="The path to the models fetched by the API from the model registry",
     )
+    artifact_store_path: str = Field(
+        "./artifact_store",
+        description="The path to the model artifacts downloaded from the registry, can be shared by replicas on the same host",
+    )
+    artifact_download_workers: int = Field(
+        4,
+        ge=1,
+        description="The number of model artifact files downloaded in parallel",
+    )
     logging_level: str = Field(
         "DEBUG",
         description="The logging level for the API",
     )
+    request_log_rate_per_second: float = Field(
+        10.0,
+        ge=0,
+        description="The maximum number of per-request debug and info log records per second, 0 disables them",
+    )
+    log_file_max_bytes: int = Field(
+        10 * 1024 ** 2,
+        gt=0,
+        description="The size in bytes at which log files are rotated",
+    )
+    log_file_backup_count: int = Field(
+        5,
+        ge=0,
+        description="The number of rotated log files kept",
+    )
+    error_log_max_body_bytes: int = Field(
+        2048,
+        ge=0,
+        description="The maximum number of bytes of an error response body that are logged",
+    )
+    background_model_loading: bool = Field(
+        True,
+        description="Load the non-default saved models in the background at startup instead of on first use",
+    )
+    model_memory_budget_mb: int = Field(
+        0,
+        ge=0,
+        description="The memory budget in MB of the loaded models, 0 means no limit",
+    )
+    warmup_texts: list[str] = Field(
+        [
+            "I loved this, it was great!",
+            "This is the worst thing I have ever bought.",
+            "<p>Not bad at all :)</p>",
+            "Terrible service, never again :(",
+        ],
+        description="The texts run through a fetched model to warm it up before it's used",
+    )
+    fast_path_scoring: bool = Field(
+        True,
+        description="Score linear TF-IDF pipelines with a compact scorer instead of the sklearn pipeline",
+    )
+    registry_cache_ttl_seconds: float = Field(
+        300.0,
+        gt=0,
+        description="The age in seconds after which the cached registry listing is reported as stale",
+    )
+    registry_refresh_interval_seconds: float = Field(
+        60.0,
+        gt=0,
+        description="The number of seconds between background refreshes of the cached registry metadata",
+    )
+    micro_batching: bool = Field(
+        False,
+        description="Coalesce concurrent single-text predictions into batches",
+    )
+    micro_batch_max_size: int = Field(
+        32,
+        gt=0,
+        description="The maximum number of single-text predictions in a micro-batch",
+    )
+    micro_batch_max_wait_ms: float = Field(
+        5.0,
+        ge=0,
+        description="The maximum time in milliseconds a single-text prediction waits for its micro-batch",
+    )
+    inference_executor: Literal["thread", "process"] = Field(
+        "thread",
+        description="The type of the worker pool running inference off the event loop",
+    )
+    inference_workers: int = Field(
+        2,
+        gt=0,
+        description="The number of workers in the inference pool",
+    )
+    inference_queue_size: int = Field(
+        64,
+        ge=0,
+        description="The maximum number of inference calls waiting for a free worker",
+    )
+    request_coalescing: bool = Field(
+        True,
+        description="Share the in-flight predictions of texts between concurrent requests for the same texts",
+    )
+    inference_sub_batch_size: int = Field(
+        1000,
+        ge=0,
+        description="The maximum number of texts of the sub-batches large batches are split into, 0 disables splitting",
+    )
+    max_batch_size: int = Field(
+        10_000,
+        gt=0,
+        description="The maximum number of texts of a batch prediction request",
+    )
+    admission_control: bool = Field(
+        True,
+        description="Shed inference requests that would wait longer than the queue delay objective",
+    )
+    admission_max_in_flight_texts: int = Field(
+        512,
+        gt=0,
+        description="The maximum number of texts an inference endpoint runs at once",
+    )
+    admission_max_queued_texts: int = Field(
+        10_000,
+        ge=0,
+        description="The maximum number of texts waiting to run per inference endpoint, at least the maximum batch size",
+    )
+    admission_max_queue_delay_ms: float = Field(
+        500.0,
+        ge=0,
+        description="The queue delay objective in milliseconds, requests estimated to wait longer are rejected",
+    )
+    stream_chunk_size: int = Field(
+        256,
+        gt=0,
+        description="The number of lines of a streamed batch scored at once",
+    )
+    stream_max_line_bytes: int = Field(
+        1_000_000,
+        gt=0,
+        description="The maximum length in bytes of a line of a streamed batch",
+    )
+    scoring_input_path: str = Field(
+        "./data",
+        description="The directory scoring jobs can read server-side input files from",
+    )
+    scoring_jobs_path: str = Field(
+        "./scoring_jobs",
+        description="The directory scoring jobs keep uploaded input files and results in",
+    )
+    scoring_workers: int = Field(
+        1,
+        gt=0,
+        description="The maximum number of scoring jobs running at once",
+    )
+    scoring_chunk_size: int = Field(
+        500,
+        gt=0,
+        description="The number of texts a scoring job predicts at once",
+    )
+    scoring_max_yield_ms: float = Field(
+        50.0,
+        ge=0,
+        description="The maximum time in milliseconds a scoring job waits between chunks for interactive predictions to finish",
+    )
+    stage_timing_sample_rate: float = Field(
+        0.05,
+        ge=0,
+        le=1,
+        description="The fraction of inference calls whose per-stage timings are recorded",
+    )
+    metrics_scrape_cache_seconds: float = Field(
+        1.0,
+        ge=0,
+        description="The number of seconds a metrics exposition is reused by the following scrapes",
+    )
+    prediction_cache_size: int = Field(
+        10_000,
+        ge=0,
+        description="The maximum number of cached predictions, 0 disables the cache",
+    )
+    prediction_cache_ttl_seconds: float = Field(
+        3600.0,
+        gt=0,
+        description="The number of seconds a cached prediction stays valid",
+    )
+
+    @model_validator(mode="after")
+    def check_admission_fits_batches(self) -> "APISettings":
+        # A batch larger than the queue could only wait for an idle endpoint, behind single predictions
+        if self.admission_control and self.admission_max_queued_texts < self.max_batch_size:
+            raise ValueError(
+                f"admission_max_queued_texts ({self.admission_max_queued_texts}) must be at least "
+                f"max_batch_size ({self.max_batch_size}), so the largest batches can queue."
+            )
+        return self
 
 
 class Settings(BaseSettings):
@@ -1,6 +1,15 @@
+import atexit
+import copy
+import gc
 import logging
 import os
+import queue
+import sys
+import threading
+import time
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from types import FunctionType, ModuleType
 
 
 def get_csv_files(path: str, prefix: str | None = None) -> list[str]:
@@ -19,30 +28,143 @@ def get_csv_files(path: str, prefix: str | None = None) -> list[str]:
     return paths
 
 
+class RateLimitFilter(logging.Filter):
+    """Let at most `rate` records per second through, in bursts of up to `burst` records.
+
+    Warnings and errors always go through. The first record let through after some were dropped
+    says how many were.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        """
+        Args:
+            rate: The number of records let through per second, 0 drops every record below warnings.
+            burst: The maximum number of records let through at once.
+        """
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last_time = time.monotonic()
+        self._suppressed = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool | logging.LogRecord:
+        if record.levelno >= logging.WARNING:
+            return True
+        if self.rate <= 0:
+            return False
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last_time) * self.rate)
+            self._last_time = now
+            if self._tokens < 1:
+                self._suppressed += 1
+                return False
+            self._tokens -= 1
+            suppressed, self._suppressed = self._suppressed, 0
+
+        if not suppressed:
+            return True
+
+        # Other handlers of the record get it unchanged
+        record = copy.copy(record)
+        record.msg = f"{record.getMessage()} ({suppressed} records suppressed by the rate limit)"
+        record.args = None
+        return record
+
+
+class _LazyRotatingFileHandler(RotatingFileHandler):
+    """A rotating file handler that creates the log file, and its directory, with the first record."""
+
+    def __init__(self, filename: str, max_bytes: int, backup_count: int):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+# The queue handler and listener of each log file, `None` for the console only.
+# Loggers put records on a queue, and a background thread formats and writes them.
+_listeners: dict[str | None, tuple[QueueHandler, QueueListener]] = {}
+_listeners_lock = threading.Lock()
+
+
+def _get_queue_handler(filename: str | None, max_bytes: int, backup_count: int) -> QueueHandler:
+    with _listeners_lock:
+        if filename in _listeners:
+            return _listeners[filename][0]
+
+        fmt = "%(asctime)s %(name)s %(levelname)s: %(message)s"
+        date_fmt = "%H:%M:%S"
+        formatter = logging.Formatter(fmt=fmt, datefmt=date_fmt)
+
+        handlers = [logging.StreamHandler()]
+        if filename is not None:
+            handlers.append(_LazyRotatingFileHandler(filename, max_bytes, backup_count))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, *handlers)
+        listener.start()
+        _listeners[filename] = QueueHandler(log_queue), listener
+
+        return _listeners[filename][0]
+
+
+def _restart_listeners():
+    """Give the listeners a new queue and thread in a forked process, which only inherits the caller thread."""
+    for queue_handler, listener in _listeners.values():
+        queue_handler.queue = listener.queue = queue.SimpleQueue()
+        listener._thread = None
+        listener.start()
+
+
+def _stop_listeners():
+    """Write the queued records before exiting."""
+    for _, listener in _listeners.values():
+        if listener._thread is not None:
+            listener.stop()
+
+
+os.register_at_fork(after_in_child=_restart_listeners)
+atexit.register(_stop_listeners)
+
+
 def get_logger(
     name: str,
     level: int = logging.INFO,
-    filename: str | None = None
+    filename: str | None = None,
+    max_bytes: int = 10 * 1024 ** 2,
+    backup_count: int = 5,
+    rate_limit: float | None = None,
 ) -> logging.Logger:
-    fmt = "%(asctime)s %(name)s %(levelname)s: %(message)s"
-    date_fmt = "%H:%M:%S"
-    formatter = logging.Formatter(fmt=fmt, datefmt=date_fmt)
+    """Get a logger whose records are written to the console, and to a file, by a background thread.
+
+    Args:
+        name: The name of the logger.
+        level: The logging level of the logger.
+        filename: The file the records are also written to, rotated by size.
+        max_bytes: The size of the log file in bytes at which it's rotated.
+        backup_count: The number of rotated log files kept.
+        rate_limit: The maximum number of records below warnings logged per second, if any.
 
+    Returns:
+        The logger.
+    """
     logger = logging.getLogger(name)
     logger.handlers.clear()
+    logger.filters.clear()
     logger.setLevel(level)
+    # Child loggers, like per-request loggers, would be written twice through their parent
+    logger.propagate = False
 
-    stream_handler = logging.StreamHandler()
-    stream_handler.setLevel(level)
-    stream_handler.setFormatter(formatter)
-    logger.addHandler(stream_handler)
-
-    if filename is not None:
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        file_handler = logging.FileHandler(filename, mode="a+")
-        file_handler.setLevel(level)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+    logger.addHandler(_get_queue_handler(filename, max_bytes, backup_count))
+    if rate_limit is not None:
+        logger.addFilter(RateLimitFilter(rate_limit, burst=max(int(rate_limit), 1)))
 
     return logger
 
@@ -52,3 +174,20 @@ def get_timestamp() -> str:
     replacements = str.maketrans("", "", "T:-")
     time = time.translate(replacements)
     return time
+
+
+def get_deep_size(obj: object) -> int:
+    """Approximate the memory used by an object and every object it references, in bytes."""
+    seen = set()
+    size = 0
+    objects = [obj]
+    while objects:
+        current = []
+        for o in objects:
+            if id(o) in seen or isinstance(o, (type, ModuleType, FunctionType)):
+                continue
+            seen.add(id(o))
+            size += sys.getsizeof(o)
+            current.append(o)
+        objects = gc.get_referents(*current)
+    return size
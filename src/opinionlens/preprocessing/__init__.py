@@ -1,8 +1,10 @@
 from .clean import clean_text
+from .fused import encode_batch, encode_text, normalize_batch, normalize_text
 from .tokenize import tokenizer, tokenizer_porter
 from .vectorize import get_saved_tfidf_vectorizer, get_tfidf_vectorizer
 
 __all__ = [
     "clean_text", "tokenizer", "tokenizer_porter", "get_tfidf_vectorizer",
-    "get_saved_tfidf_vectorizer",
+    "get_saved_tfidf_vectorizer", "normalize_text", "normalize_batch", "encode_text",
+    "encode_batch",
 ]
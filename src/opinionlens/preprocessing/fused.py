@@ -0,0 +1,106 @@
+import re
+from typing import TYPE_CHECKING, Mapping
+
+if TYPE_CHECKING:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+__all__ = [
+    "normalize_text", "normalize_batch", "encode_text", "encode_batch",
+    "uses_default_analyzer",
+]
+
+# The patterns of `clean_text`, compiled once
+TAG_PATTERN = re.compile(r"<[^>]*>")
+EMOTICON_PATTERN = re.compile(r"(?::|;|=)(?:-)?(?:\)|\(|D|P)")
+WORD_PATTERN = re.compile(r"\w+")
+# The tokens `TfidfVectorizer` extracts with its default token pattern
+TOKEN_PATTERN = re.compile(r"\w\w+")
+DEFAULT_TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+
+
+def normalize_text(text: str) -> str:
+    """Clean and tokenize the text, joining the tokens with single spaces.
+
+    Same result as `" ".join(tokenizer(clean_text(text)))`, without the intermediate strings.
+
+    Args:
+        text: The raw input text.
+
+    Returns:
+        The normalized text.
+    """
+    text = TAG_PATTERN.sub("", text)
+    emoticons = EMOTICON_PATTERN.findall(text)
+    lowered = text.lower()
+    normalized = " ".join(WORD_PATTERN.findall(lowered))
+
+    if emoticons:
+        emoticons = " ".join(emoticons).replace("-", "")
+        # `clean_text` appends the emoticons right after the last character, so the first
+        # one sticks to the last word when the text ends with a word character
+        if normalized and not WORD_PATTERN.match(lowered[-1]):
+            normalized += " "
+        normalized += emoticons
+
+    return normalized
+
+
+def normalize_batch(texts: list[str]) -> list[str]:
+    """Normalize a batch of texts with `normalize_text`.
+
+    Args:
+        texts: A list of raw input texts.
+
+    Returns:
+        A list of normalized texts.
+    """
+    return [normalize_text(text) for text in texts]
+
+
+def encode_text(text: str, vocabulary: Mapping[str, int]) -> list[int]:
+    """Map the text straight to the vocabulary indices of its tokens in one pass.
+
+    The tokens are the ones a `TfidfVectorizer` with the default analyzer extracts from the
+    normalized text, tokens outside the vocabulary are dropped. Raw and normalized texts
+    give the same indices.
+
+    Args:
+        text: The raw or normalized input text.
+        vocabulary: The tokens pointing to their feature index.
+
+    Returns:
+        The vocabulary indices of the tokens, in order and with repetitions.
+    """
+    lookup = vocabulary.get
+    indices = []
+    for token in TOKEN_PATTERN.findall(TAG_PATTERN.sub("", text).lower()):
+        index = lookup(token)
+        if index is not None:
+            indices.append(index)
+    return indices
+
+
+def encode_batch(texts: list[str], vocabulary: Mapping[str, int]) -> list[list[int]]:
+    """Encode a batch of texts with `encode_text`.
+
+    Args:
+        texts: A list of raw or normalized input texts.
+        vocabulary: The tokens pointing to their feature index.
+
+    Returns:
+        A list with the vocabulary indices of each text.
+    """
+    return [encode_text(text, vocabulary) for text in texts]
+
+
+def uses_default_analyzer(vectorizer: "TfidfVectorizer") -> bool:
+    """Check if the vectorizer extracts the same tokens from normalized texts as `encode_text`."""
+    return (
+        vectorizer.analyzer == "word"
+        and vectorizer.preprocessor is None
+        and vectorizer.tokenizer is None
+        and vectorizer.strip_accents is None
+        and vectorizer.stop_words is None
+        and tuple(vectorizer.ngram_range) == (1, 1)
+        and vectorizer.token_pattern == DEFAULT_TOKEN_PATTERN
+    )
@@ -4,16 +4,12 @@ import pandas as pd
 from omegaconf import OmegaConf
 
 from opinionlens.common.utils import get_csv_files
-from opinionlens.preprocessing import clean_text, eval, tokenizer
+from opinionlens.preprocessing import eval, normalize_text
 from opinionlens.preprocessing.utils import save_preprocessed_data
 
 conf = OmegaConf.load("./params.yaml")
 
 
-def tokenize_text(text: str) -> str:
-    return " ".join(tokenizer(clean_text(text)))
-
-
 def preprocess_imdb_dataset():
     raw_data_path = "data/raw/IMDB Dataset/IMDB Dataset.csv"
     assert os.path.exists(raw_data_path), f"{raw_data_path!r} doesn't exist!"
@@ -23,7 +19,7 @@ def preprocess_imdb_dataset():
     imdb_data["score"] = imdb_data["sentiment"].map(
         {"positive": 1, "negative": 0}
     )
-    imdb_data["text"] = imdb_data["review"].apply(tokenize_text)
+    imdb_data["text"] = imdb_data["review"].apply(normalize_text)
     imdb_data.drop(columns=["review", "sentiment"], inplace=True)
     imdb_data = imdb_data.sample(
         frac=1, random_state=conf.base.random_seed
@@ -42,7 +38,7 @@ def preprocess_amazon_food_dataset():
     data["score"] = data["Score"].map(
         {1: 0, 2: 0, 3: 1, 4: 1, 5: 1}
     )
-    data["text"] = data["Text"].apply(tokenize_text)
+    data["text"] = data["Text"].apply(normalize_text)
 
     data = data[["text", "score"]].sample(
         frac=1, random_state=conf.base.random_seed
@@ -65,7 +61,7 @@ def preprocess_airline_tweets():
         {"positive": 1, "negative": 0}
     )
 
-    data["text"] = data["text"].apply(tokenize_text)
+    data["text"] = data["text"].apply(normalize_text)
     data = data[["text", "score"]].sample(
         frac=1, random_state=conf.base.random_seed
     ).reset_index(drop=True)
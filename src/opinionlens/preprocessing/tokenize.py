@@ -1,9 +1,16 @@
-from nltk.stem.porter import PorterStemmer
+from functools import cache
 
-porter = PorterStemmer()
+
+@cache
+def _get_porter_stemmer():
+    """Import NLTK and build the stemmer on first use, as only training stems."""
+    from nltk.stem.porter import PorterStemmer
+
+    return PorterStemmer()
 
 
 def tokenizer_porter(word_list: list[str]) -> list[str]:
+    porter = _get_porter_stemmer()
     return [porter.stem(word) for word in word_list]
 
 
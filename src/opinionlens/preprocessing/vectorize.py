@@ -1,13 +1,16 @@
 import os
-from typing import Collection
+from typing import TYPE_CHECKING, Collection
 
-import joblib
-from sklearn.feature_extraction.text import TfidfVectorizer
+if TYPE_CHECKING:
+    from sklearn.feature_extraction.text import TfidfVectorizer
 
 SAVED_VECTORIZER_PATH = "./objects/vectorizer.pkl"
 
 
-def get_tfidf_vectorizer(training_corpus: Collection, save=False) -> TfidfVectorizer:
+def get_tfidf_vectorizer(training_corpus: Collection, save=False) -> "TfidfVectorizer":
+    import joblib
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
     vectorizer = TfidfVectorizer(
         strip_accents=None, lowercase=False, preprocessor=None, tokenizer=None
     )
@@ -20,7 +23,9 @@ def get_tfidf_vectorizer(training_corpus: Collection, save=False) -> TfidfVector
     return vectorizer
 
 
-def get_saved_tfidf_vectorizer() -> TfidfVectorizer:
+def get_saved_tfidf_vectorizer() -> "TfidfVectorizer":
+    import joblib
+
     assert os.path.exists(SAVED_VECTORIZER_PATH), f"{SAVED_VECTORIZER_PATH!r} doesn't exist!"
     vectorizer = joblib.load(SAVED_VECTORIZER_PATH)
     return vectorizer
@@ -0,0 +1,141 @@
+import argparse
+import csv
+import os
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Iterator
+
+import mlflow
+import pandas as pd
+
+from opinionlens.app import setup_mlflow
+from opinionlens.app.models import SklearnModel
+from opinionlens.common.settings import get_settings
+
+settings = get_settings()
+
+# The model of the worker process, loaded once by `_init_worker`
+_model = None
+
+
+def _init_worker(model_id: str, model_path: str):
+    global _model
+    _model = SklearnModel(model_id, model_path)
+
+
+def _score_chunk(index: int, texts: list[str]) -> tuple[int, list[int], int, float]:
+    start_time = time.perf_counter()
+    predictions = _model.batch_predict(texts)
+    return index, predictions, os.getpid(), time.perf_counter() - start_time
+
+
+def resolve_model_path(model: str, download_path: str) -> str:
+    """Resolve a model to a local directory the workers load it from.
+
+    Args:
+        model: A model ID saved in `saved_model_path`, a model directory, or an MLflow URI.
+        download_path: The directory MLflow URIs are downloaded to, once for all the workers.
+
+    Returns:
+        The path of the model directory.
+    """
+    saved_model_path = os.path.join(settings.api.saved_model_path, model)
+    if os.path.isdir(saved_model_path):
+        # Saved models may link to the artifact store
+        return os.path.realpath(saved_model_path)
+    if os.path.isdir(model):
+        return model
+
+    # MLflow URIs are resolved by the tracking server
+    setup_mlflow(set_experiment=False)
+    return mlflow.artifacts.download_artifacts(artifact_uri=model, dst_path=download_path)
+
+
+def read_chunks(path: str, text_column: str, chunk_size: int) -> Iterator[list[str]]:
+    """Read the texts of a CSV or Parquet file in chunks of `chunk_size` rows."""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=[text_column])
+        chunks = (batch.to_pandas() for batch in batches)
+    else:
+        chunks = pd.read_csv(path, usecols=[text_column], chunksize=chunk_size)
+
+    for chunk in chunks:
+        yield chunk[text_column].fillna("").astype(str).to_list()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score the texts of a CSV or Parquet file.")
+    parser.add_argument("input_path", help="The CSV or Parquet file to score")
+    parser.add_argument("output_path", help="The CSV file the predictions are written to")
+    parser.add_argument(
+        "-m", "--model", required=True,
+        help="A model ID saved in `saved_model_path`, a model directory, or an MLflow URI",
+    )
+    parser.add_argument("-c", "--text-column", default="text", help="The column of the texts")
+    parser.add_argument("-s", "--chunk-size", type=int, default=10_000, help="The number of rows per chunk")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="The number of worker processes")
+    args = parser.parse_args()
+
+    download_dir = tempfile.TemporaryDirectory()
+    model_path = resolve_model_path(args.model, download_dir.name)
+    # Chunks in flight or waiting to be written, bounding the memory to a few chunks per worker
+    max_pending = 2 * args.workers
+
+    worker_rows = defaultdict(int)
+    worker_seconds = defaultdict(float)
+    pending: set[Future] = set()
+    # Chunks finished out of order, waiting for the earlier chunks to be written
+    finished = {}
+    next_index = 0
+    row = 0
+
+    start_time = time.perf_counter()
+    with (
+        download_dir,
+        ProcessPoolExecutor(args.workers, initializer=_init_worker, initargs=(args.model, model_path)) as pool,
+        open(args.output_path, "w", newline="") as f,
+    ):
+        writer = csv.writer(f)
+        writer.writerow(["row", "prediction"])
+
+        def write_finished(futures):
+            nonlocal next_index, row
+            for future in futures:
+                index, predictions, pid, seconds = future.result()
+                finished[index] = predictions
+                worker_rows[pid] += len(predictions)
+                worker_seconds[pid] += seconds
+
+            while next_index in finished:
+                predictions = finished.pop(next_index)
+                writer.writerows(
+                    (row + i, "POSITIVE" if prediction == 1 else "NEGATIVE")
+                    for i, prediction in enumerate(predictions)
+                )
+                row += len(predictions)
+                next_index += 1
+
+        for index, texts in enumerate(read_chunks(args.input_path, args.text_column, args.chunk_size)):
+            while len(pending) + len(finished) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                write_finished(done)
+            pending.add(pool.submit(_score_chunk, index, texts))
+
+        write_finished(wait(pending).done)
+
+    elapsed = time.perf_counter() - start_time
+
+    for pid in sorted(worker_rows):
+        print(
+            f"Worker {pid}: {worker_rows[pid]} rows in {worker_seconds[pid]:.2f}s, "
+            f"{worker_rows[pid] / worker_seconds[pid]:.0f} rows/s"
+        )
+    print(f"Scored {row} rows in {elapsed:.2f}s, {row / elapsed:.0f} rows/s, written to {args.output_path!r}")
+
+
+if __name__ == "__main__":
+    main()
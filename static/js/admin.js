@@ -7,6 +7,7 @@ document.addEventListener("DOMContentLoaded", () => {
     const themeToggle = document.getElementById("themeToggle");
     const root = document.documentElement;
     const modelsTableBody = document.querySelector("#modelsTable tbody");
+    const registryFreshness = document.getElementById("registryFreshness");
     const loadedModelsTableBody = document.querySelector("#loadedModelsTable tbody");
     const modelNameSelect = document.getElementById("modelNameSelect");
     const modelVersionSelect = document.getElementById("modelVersionSelect");
@@ -41,9 +42,11 @@ document.addEventListener("DOMContentLoaded", () => {
             const response = await fetch("/api/v1/models/registry");
             if (!response.ok) throw new Error(`Status: ${response.status}`);
 
-            const models = await response.json();
+            const registry = await response.json();
+            const models = registry.models;
             localStorage.setItem("availableModels", JSON.stringify(models));
             renderRegistryTable(models);
+            renderRegistryFreshness(registry);
             populateModelNames(models);
         } catch (err) {
             console.error("Failed to load available models:", err);
@@ -63,6 +66,18 @@ document.addEventListener("DOMContentLoaded", () => {
         }
     };
 
+    const renderRegistryFreshness = (registry) => {
+        if (!registry.last_refresh) {
+            registryFreshness.textContent = "The registry couldn't be reached yet.";
+        } else {
+            const lastRefresh = new Date(registry.last_refresh).toLocaleString();
+            registryFreshness.textContent = `Last refreshed ${lastRefresh}${registry.is_stale ? " (stale)" : ""}.`;
+        }
+        if (registry.error) {
+            registryFreshness.textContent += ` Last refresh failed: ${registry.error}`;
+        }
+    };
+
     const renderRegistryTable = (models) => {
         modelsTableBody.innerHTML = "";
         models.forEach(model => {
@@ -102,6 +117,37 @@ document.addEventListener("DOMContentLoaded", () => {
         });
     };
 
+    /**
+     * Model Fetching Jobs
+     */
+    const fetchModel = async (body) => {
+        const response = await fetch("/api/v1/models/", {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify(body)
+        });
+
+        if (response.status !== 202) {
+            throw new Error(`Unexpected response: ${response.status}`);
+        }
+
+        const { job_id } = await response.json();
+        return waitForJob(job_id);
+    };
+
+    const waitForJob = async (jobId, interval = 1000) => {
+        while (true) {
+            const response = await fetch(`/api/v1/models/jobs/${jobId}`);
+            if (!response.ok) throw new Error(`Status: ${response.status}`);
+
+            const job = await response.json();
+            if (job.status === "succeeded") return job;
+            if (job.status === "failed") throw new Error(job.error);
+
+            await new Promise(resolve => setTimeout(resolve, interval));
+        }
+    };
+
     /**
      * Form and Actions
      */
@@ -182,17 +228,8 @@ document.addEventListener("DOMContentLoaded", () => {
         downloadSpinner.style.display = "block";
 
         try {
-            const response = await fetch("/api/v1/models/", {
-                method: "POST",
-                headers: { "Content-Type": "application/json" },
-                body: JSON.stringify({ model_name: name, model_version: version, set_default: setDefault })
-            });
-
-            if (response.status === 201) {
-                window.location.reload();
-            } else {
-                console.error("Unexpected response:", response.status);
-            }
+            await fetchModel({ model_name: name, model_version: version, set_default: setDefault });
+            window.location.reload();
         } catch (err) {
             console.error("Failed to download model:", err);
         } finally {
@@ -208,12 +245,8 @@ document.addEventListener("DOMContentLoaded", () => {
             const name = setActiveBtn.dataset.name;
             const version = Number(setActiveBtn.dataset.version);
             try {
-                const response = await fetch("/api/v1/models/", {
-                    method: "POST",
-                    headers: { "Content-Type": "application/json" },
-                    body: JSON.stringify({ model_name: name, model_version: version, set_default: true })
-                });
-                if (response.status === 201) window.location.reload();
+                await fetchModel({ model_name: name, model_version: version, set_default: true });
+                window.location.reload();
             } catch (err) {
                 console.error("Set active failed:", err);
             }
@@ -0,0 +1,171 @@
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+
+from opinionlens.app.admission import AdmissionController
+from opinionlens.app.exceptions import OverloadedError
+from opinionlens.common.settings import APISettings
+
+
+def make_controller(max_in_flight=10, max_queued=20, max_queue_delay_ms=1000.0):
+    return AdmissionController(
+        "/test",
+        max_in_flight=max_in_flight,
+        max_queued=max_queued,
+        max_queue_delay_ms=max_queue_delay_ms,
+    )
+
+
+async def hold(controller, weight, release, admitted, name):
+    async with controller.admit(weight):
+        admitted.append(name)
+        await release.wait()
+
+
+def test_waiting_requests_are_admitted_in_order():
+    async def main():
+        controller = make_controller()
+        release = asyncio.Event()
+        admitted = []
+
+        first = asyncio.create_task(hold(controller, 8, release, admitted, "first"))
+        await asyncio.sleep(0)
+        # Both wait, even though the small one would fit, so the large one isn't starved
+        large = asyncio.create_task(hold(controller, 5, asyncio.Event(), admitted, "large"))
+        small = asyncio.create_task(hold(controller, 1, asyncio.Event(), admitted, "small"))
+        await asyncio.sleep(0)
+
+        assert admitted == ["first"]
+        assert (controller.in_flight, controller.queued) == (8, 6)
+
+        release.set()
+        await first
+        await asyncio.sleep(0)
+
+        assert admitted == ["first", "large", "small"]
+        assert (controller.in_flight, controller.queued) == (6, 0)
+
+        for task in (large, small):
+            task.cancel()
+        await asyncio.gather(large, small, return_exceptions=True)
+        assert (controller.in_flight, controller.queued) == (0, 0)
+
+    asyncio.run(main())
+
+
+def test_oversized_request_is_admitted_alone():
+    async def main():
+        controller = make_controller()
+        async with controller.admit(50):
+            assert controller.in_flight == 50
+
+    asyncio.run(main())
+
+
+def test_request_larger_than_the_queue_waits_alone():
+    async def main():
+        controller = make_controller(max_queued=20)
+        # Measured while saturated, 1000 texts per second
+        controller._drain_rate = 1000.0
+        release = asyncio.Event()
+        admitted = []
+        holder = asyncio.create_task(hold(controller, 1, release, admitted, "holder"))
+        await asyncio.sleep(0)
+
+        # Admitted alone once the single text ahead of it finishes, in about 1 ms
+        assert controller.estimate_queue_delay(30) == pytest.approx(0.001)
+        large = asyncio.create_task(hold(controller, 30, release, admitted, "large"))
+        await asyncio.sleep(0)
+        assert controller.queued == 30
+
+        # Nothing queues behind it
+        with pytest.raises(OverloadedError):
+            async with controller.admit(1):
+                pass
+
+        release.set()
+        await asyncio.gather(holder, large)
+        assert admitted == ["holder", "large"]
+        assert (controller.in_flight, controller.queued) == (0, 0)
+
+    asyncio.run(main())
+
+
+def test_settings_reject_a_queue_smaller_than_batches():
+    with pytest.raises(ValidationError):
+        APISettings(max_batch_size=10_000, admission_max_queued_texts=2048)
+
+    APISettings(max_batch_size=10_000, admission_max_queued_texts=2048, admission_control=False)
+
+
+def test_full_queue_rejects():
+    async def main():
+        controller = make_controller(max_queued=5)
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(controller, 10, release, [], "holder"))
+        waiter = asyncio.create_task(hold(controller, 5, release, [], "waiter"))
+        await asyncio.sleep(0)
+
+        with pytest.raises(OverloadedError) as e:
+            async with controller.admit(1):
+                pass
+        assert e.value.retry_after > 0
+
+        release.set()
+        await asyncio.gather(holder, waiter)
+
+    asyncio.run(main())
+
+
+def test_estimated_queue_delay_over_objective_rejects():
+    async def main():
+        controller = make_controller(max_queue_delay_ms=100.0)
+        # Measured while saturated, 100 texts per second
+        controller._drain_rate = 100.0
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(controller, 10, release, [], "holder"))
+        await asyncio.sleep(0)
+
+        # 5 texts must finish before it fits, in about 50 ms
+        waiter = asyncio.create_task(hold(controller, 5, release, [], "waiter"))
+        await asyncio.sleep(0)
+        assert controller.queued == 5
+
+        # 5 queued, 10 in flight, and 10 more texts, 15 texts must finish first
+        assert controller.estimate_queue_delay(10) == pytest.approx(0.15)
+        with pytest.raises(OverloadedError) as e:
+            async with controller.admit(10):
+                pass
+        assert e.value.retry_after == pytest.approx(0.15)
+
+        release.set()
+        await asyncio.gather(holder, waiter)
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def main():
+        controller = make_controller()
+        release = asyncio.Event()
+        admitted = []
+        holder = asyncio.create_task(hold(controller, 8, release, admitted, "holder"))
+        await asyncio.sleep(0)
+        large = asyncio.create_task(hold(controller, 5, release, admitted, "large"))
+        small = asyncio.create_task(hold(controller, 2, release, admitted, "small"))
+        await asyncio.sleep(0)
+
+        # The large request leaving the head of the queue lets the small one in
+        large.cancel()
+        await asyncio.gather(large, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        assert admitted == ["holder", "small"]
+        assert (controller.in_flight, controller.queued) == (10, 0)
+
+        release.set()
+        await asyncio.gather(holder, small)
+        assert (controller.in_flight, controller.queued) == (0, 0)
+
+    asyncio.run(main())
@@ -1,4 +1,18 @@
-from .conftest import added_model_id, test_app
+import json
+import os
+import subprocess
+import sys
+
+import mlflow
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+
+from opinionlens.common.settings import get_settings
+
+from .conftest import added_model_id, test_app, wait_for_job
+
+settings = get_settings()
 
 
 def test_root_route(test_app):
@@ -20,26 +34,36 @@ def test_about_route(test_app):
 def test_add_model_route(test_app):
     url = "/api/v1/models"
     body = {
-        "model_uri": "basic_model/1",
+        "model_name": "basic_model",
+        "model_version": 1,
         "set_default": True,
     }
     response = test_app.post(url, json=body)
 
-    assert response.status_code == 201
+    assert response.status_code == 202
 
     response_body = response.json()
 
     assert type(response_body) is dict
 
+    job = wait_for_job(test_app, response_body["job_id"])
+
+    assert job["status"] == "succeeded"
+
 
 def test_add_wrong_model(test_app):
     url = "/api/v1/models"
     body = {
-        "model_uri": "nonexistent-model",
+        "model_name": "nonexistent-model",
+        "model_version": 1,
     }
     response = test_app.post(url, json=body)
 
-    assert response.status_code == 503
+    assert response.status_code == 202
+
+    job = wait_for_job(test_app, response.json()["job_id"])
+
+    assert job["status"] == "failed"
 
 
 def test_list_models_route(test_app, added_model_id):
@@ -56,7 +80,7 @@ def test_list_models_route(test_app, added_model_id):
         element = list(response_body.values())[0]
 
         assert type(element) is dict
-        assert len(element) == 7
+        assert len(element) == 9
 
 
 def test_list_single_model_route(test_app, added_model_id):
@@ -68,7 +92,7 @@ def test_list_single_model_route(test_app, added_model_id):
     response_body = response.json()
 
     assert type(response_body) is dict
-    assert len(response_body) == 7
+    assert len(response_body) == 9
     assert response_body["is_default"] is True
 
 
@@ -127,6 +151,51 @@ def test_batch_prediction_route(test_app, added_model_id):
     assert len(response_body) == len(body)
 
 
+def test_oversized_batch_prediction(test_app):
+    url = "/api/v1/inference/batch_predict"
+    body = ["I love this!"] * (settings.api.max_batch_size + 1)
+    response = test_app.post(url, json=body)
+
+    assert response.status_code == 413
+
+
+def test_stream_prediction_route(test_app, added_model_id):
+    url = "/api/v1/inference/stream_predict"
+    lines = ['"I love this!"', '{"text": "This product is awful"}', "not json"]
+    response = test_app.post(
+        url, content="\n".join(lines), headers={"content-type": "application/x-ndjson"}
+    )
+
+    assert response.status_code == 200
+
+    response_body = [json.loads(line) for line in response.text.splitlines()]
+
+    assert len(response_body) == len(lines)
+    assert "prediction" in response_body[0]
+    assert "prediction" in response_body[1]
+    assert "error" in response_body[2]
+
+
+def test_scoring_job_route(test_app, added_model_id):
+    url = "/api/v1/inference/jobs/"
+    content = "\n".join(['{"text": "I love this!"}', '{"text": "This product is awful"}'])
+    response = test_app.post(url, files={"file": ("reviews.jsonl", content)})
+
+    assert response.status_code == 202
+
+    job_id = response.json()["job_id"]
+    job = wait_for_job(test_app, job_id, url=url)
+
+    assert job["status"] == "succeeded"
+    assert job["result"]["model_id"] == added_model_id
+    assert job["result"]["processed_texts"] == 2
+
+    response = test_app.get(f"{url}{job_id}/results")
+
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 3
+
+
 def test_delete_model_route(test_app, added_model_id):
     url = f"/api/v1/models/{added_model_id}"
     response  = test_app.delete(url)
@@ -140,3 +209,81 @@ def test_delete_wrong_model(test_app):
     response = test_app.delete(url)
 
     assert response.status_code == 404
+
+
+def test_batch_prediction_formats(test_app, added_model_id):
+    url = "/api/v1/inference/batch_predict"
+    body = ["I love this!", "This product is awful", ""]
+    expected = test_app.post(url, json=body).json()
+    class_ids = bytes(1 if label == "POSITIVE" else 0 for label in expected)
+
+    text_response = test_app.post(
+        url, content="\r\n".join(body) + "\n", headers={"content-type": "text/plain"}
+    )
+    assert text_response.json() == expected
+
+    binary_body = b"".join(len(text.encode()).to_bytes(4, "little") + text.encode() for text in body)
+    binary_response = test_app.post(
+        url,
+        content=binary_body,
+        headers={"content-type": "application/octet-stream", "accept": "application/octet-stream"},
+    )
+    assert binary_response.headers["content-type"] == "application/octet-stream"
+    assert binary_response.content == class_ids
+
+
+def test_invalid_batch_prediction_body(test_app):
+    url = "/api/v1/inference/batch_predict"
+
+    assert test_app.post(url, json=["text", 1]).status_code == 422
+    assert test_app.post(
+        url, content=b"\x05\x00\x00\x00abc", headers={"content-type": "application/octet-stream"}
+    ).status_code == 422
+    assert test_app.post(url, content=b"text", headers={"content-type": "text/csv"}).status_code == 415
+
+
+def test_empty_batch_prediction(test_app):
+    url = "/api/v1/inference/batch_predict"
+
+    assert test_app.post(url, json=[]).status_code == 422
+    assert test_app.post(url, content=b"", headers={"content-type": "text/plain"}).status_code == 422
+    assert test_app.post(url, content=b"", headers={"content-type": "application/octet-stream"}).status_code == 422
+
+
+def test_app_starts_with_the_registry_down(tmp_path):
+    # A saved model with its manifest, which the app can serve without the registry
+    model_path = tmp_path / "models"
+    model_path.mkdir()
+    pipeline = make_pipeline(TfidfVectorizer(), LogisticRegression()).fit(["good", "bad"], [1, 0])
+    mlflow.sklearn.save_model(pipeline, str(model_path / "saved_model"))
+    with open(model_path / "saved_model" / "manifest.json", "w") as f:
+        json.dump({
+            "model_name": "saved_model",
+            "model_creation": "2025-01-01T00:00:00",
+            "model_flavors": ["sklearn"],
+            "registry_model_uri": "models:/saved_model/1",
+            "saved_model_path": str(model_path / "saved_model"),
+            "model_tags": {},
+        }, f)
+
+    script = """
+from fastapi.testclient import TestClient
+from opinionlens.app.main import app
+
+with TestClient(app, base_url="http://localhost") as client:
+    response = client.get("/api/v1/inference/predict", params={"text": "good"})
+    assert response.status_code == 200, response.text
+"""
+    env = {
+        **os.environ,
+        # Nothing listens on the discard port
+        "MLFLOW__REMOTE_TRACKING_URI": "http://127.0.0.1:9",
+        "MLFLOW_HTTP_REQUEST_MAX_RETRIES": "0",
+        "API__SAVED_MODEL_PATH": str(model_path),
+        "API__ARTIFACT_STORE_PATH": str(tmp_path / "artifact_store"),
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=os.getcwd(), env=env, capture_output=True, text=True, timeout=120
+    )
+
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,133 @@
+import os
+import threading
+
+import pytest
+from mlflow.store.artifact.local_artifact_repo import LocalArtifactRepository
+
+from opinionlens.app import artifacts
+
+FILES = {
+    "MLmodel": b"flavors: {}\n",
+    "model.pkl": os.urandom(256 * 1024),
+    "nested/requirements.txt": b"scikit-learn\n",
+}
+
+
+@pytest.fixture(scope="function")
+def registry(tmp_path):
+    """A local file-based artifact root standing in for the registry."""
+    root = tmp_path / "registry" / "m-1"
+    for path, content in FILES.items():
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_bytes(content)
+    return "file://" + str(root)
+
+
+@pytest.fixture(scope="function")
+def store(tmp_path):
+    return artifacts.ArtifactStore(str(tmp_path / "store"), max_workers=4)
+
+
+@pytest.fixture(scope="function")
+def downloads(monkeypatch):
+    """Record the downloaded files, failing on the files listed in `fail`."""
+    downloads = {"files": [], "fail": set()}
+    lock = threading.Lock()
+    download_artifacts = LocalArtifactRepository.download_artifacts
+
+    def record(self, artifact_path, dst_path=None):
+        if artifact_path in downloads["fail"]:
+            raise OSError(f"Failed to download {artifact_path!r}.")
+        with lock:
+            downloads["files"].append(artifact_path)
+        return download_artifacts(self, artifact_path, dst_path)
+
+    monkeypatch.setattr(LocalArtifactRepository, "download_artifacts", record)
+    return downloads
+
+
+def assert_complete(path):
+    for file, content in FILES.items():
+        with open(os.path.join(path, file), "rb") as f:
+            assert f.read() == content
+    assert not any(name.startswith(".incoming-") for name in os.listdir(path))
+
+
+def test_ensure_downloads_every_file_once(store, registry, downloads):
+    # The store directory is only created by the first download
+    assert not os.path.exists(store.root)
+
+    path = store.ensure(registry, "m-1", "replica-1")
+
+    assert path == store.get_path("m-1")
+    assert_complete(path)
+    assert sorted(downloads["files"]) == sorted(FILES)
+
+    # Reused as is by the next fetch, here or in another replica
+    assert store.ensure(registry, "m-1", "replica-1") == path
+    assert len(downloads["files"]) == len(FILES)
+
+
+def test_failed_download_resumes_on_retry(store, registry, downloads):
+    downloads["fail"].add("model.pkl")
+
+    with pytest.raises(OSError):
+        store.ensure(registry, "m-1", "replica-1")
+    # Only complete models are visible in the store
+    assert not os.path.exists(store.get_path("m-1"))
+
+    downloads["fail"].clear()
+    downloaded_before = list(downloads["files"])
+    path = store.ensure(registry, "m-1", "replica-1")
+
+    assert_complete(path)
+    assert downloads["files"][len(downloaded_before):] == ["model.pkl"]
+    assert not os.path.exists(os.path.join(store.root, artifacts.PARTIAL_PREFIX + "m-1"))
+
+
+def test_concurrent_ensures_download_once(store, registry, downloads):
+    paths = []
+
+    def ensure():
+        paths.append(store.ensure(registry, "m-1", "replica-1"))
+
+    threads = [threading.Thread(target=ensure) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert paths == [store.get_path("m-1")] * 8
+    assert_complete(paths[0])
+    assert sorted(downloads["files"]) == sorted(FILES)
+
+
+def test_model_is_deleted_once_the_last_owner_releases_it(store, registry, downloads):
+    path = store.ensure(registry, "m-1", "replica-1")
+    store.ensure(registry, "m-1", "replica-2")
+
+    assert store.get_owners("m-1") == ["replica-1", "replica-2"]
+
+    assert not store.release("m-1", "replica-1")
+    assert_complete(path)
+
+    assert store.release("m-1", "replica-2")
+    assert not os.path.exists(path)
+    assert store.get_owners("m-1") == []
+    assert not any(name.startswith(artifacts.DELETING_PREFIX) for name in os.listdir(store.root))
+
+    # Downloaded again by the next fetch
+    store.ensure(registry, "m-1", "replica-1")
+    assert_complete(path)
+    assert len(downloads["files"]) == 2 * len(FILES)
+
+
+def test_add_reference_to_a_model_linked_before_references(store, registry, downloads):
+    assert not store.add_reference("m-1", "replica-1")
+
+    path = store.ensure(registry, "m-1", "replica-1")
+    assert store.add_reference("m-1", "replica-2")
+
+    assert not store.release("m-1", "replica-1")
+    assert_complete(path)
+    assert store.release("m-1", "replica-2")
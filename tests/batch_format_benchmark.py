@@ -0,0 +1,75 @@
+"""Benchmark the request and response formats of the batch prediction endpoint end to end.
+
+Sends batches of 1k and 10k texts to a running app as JSON, newline-delimited text, and
+length-prefixed binary, the latter answered with packed class IDs, and reports the latency
+per batch, including encoding the request and decoding the response on the client:
+
+    python tests/batch_format_benchmark.py [base_url] [n_batches]
+
+Every text is unique, so the prediction cache doesn't hide the model's work.
+"""
+import sys
+import time
+
+import httpx
+
+from benchmarking import make_texts
+
+BATCH_SIZES = (1000, 10_000)
+URL = "/api/v1/inference/batch_predict"
+
+
+def send_json(client: httpx.Client, texts: list[str]) -> list[int]:
+    response = client.post(URL, json=texts)
+    response.raise_for_status()
+    return [int(label == "POSITIVE") for label in response.json()]
+
+
+def send_text(client: httpx.Client, texts: list[str]) -> list[int]:
+    response = client.post(URL, content="\n".join(texts).encode(), headers={"content-type": "text/plain"})
+    response.raise_for_status()
+    return [int(label == "POSITIVE") for label in response.json()]
+
+
+def send_binary(client: httpx.Client, texts: list[str]) -> list[int]:
+    encoded = [text.encode() for text in texts]
+    body = b"".join(len(text).to_bytes(4, "little") + text for text in encoded)
+    response = client.post(
+        URL,
+        content=body,
+        headers={"content-type": "application/octet-stream", "accept": "application/octet-stream"},
+    )
+    response.raise_for_status()
+    return list(response.content)
+
+
+FORMATS = {
+    "JSON": send_json,
+    "text lines -> JSON": send_text,
+    "binary -> packed": send_binary,
+}
+
+
+def main():
+    base_url = sys.argv[1] if len(sys.argv) > 1 else "http://localhost:8000"
+    n_batches = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    with httpx.Client(base_url=base_url, timeout=120) as client:
+        for batch_size in BATCH_SIZES:
+            print(f"Batches of {batch_size} texts:")
+            # Warm up, and check every format predicts the same
+            texts = make_texts(batch_size)
+            predictions = {name: send(client, texts) for name, send in FORMATS.items()}
+            assert all(p == predictions["JSON"] for p in predictions.values())
+
+            for name, send in FORMATS.items():
+                batches = [make_texts(batch_size) for _ in range(n_batches)]
+                start_time = time.perf_counter()
+                for batch in batches:
+                    send(client, batch)
+                latency = (time.perf_counter() - start_time) / n_batches * 1000
+                print(f"  {name:>18}: {latency:8.1f} ms/batch")
+
+
+if __name__ == "__main__":
+    main()
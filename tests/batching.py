@@ -0,0 +1,131 @@
+import asyncio
+import time
+
+import pytest
+
+from opinionlens.app.batching import MicroBatcher
+from opinionlens.app.exceptions import OperationalError
+
+
+class FakeModel:
+    def __init__(self, model_id):
+        self.model_id = model_id
+
+
+class FakeExecutor:
+    """Predict each text as its number, recording the batches it runs, or fail every batch."""
+
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+
+    async def run(self, model, method, payload, endpoint):
+        self.batches.append((model.model_id, list(payload)))
+        # Give cancelled callers a chance to run before the batch resolves
+        await asyncio.sleep(0)
+        if self.error is not None:
+            raise self.error
+        return [int(text) for text in payload]
+
+
+def test_batch_is_flushed_once_full():
+    executor = FakeExecutor()
+    batcher = MicroBatcher(executor, max_batch_size=3, max_wait_ms=10_000)
+    model = FakeModel("m")
+
+    async def main():
+        return await asyncio.wait_for(
+            asyncio.gather(*(batcher.predict(model, str(i)) for i in range(3))), timeout=5
+        )
+
+    assert asyncio.run(main()) == [0, 1, 2]
+    assert executor.batches == [("m", ["0", "1", "2"])]
+
+
+def test_batch_is_flushed_after_the_wait():
+    executor = FakeExecutor()
+    batcher = MicroBatcher(executor, max_batch_size=100, max_wait_ms=50)
+    model = FakeModel("m")
+
+    async def main():
+        start_time = time.perf_counter()
+        predictions = await asyncio.gather(batcher.predict(model, "1"), batcher.predict(model, "2"))
+        return predictions, time.perf_counter() - start_time
+
+    predictions, elapsed = asyncio.run(main())
+
+    assert predictions == [1, 2]
+    assert elapsed >= 0.05
+    assert executor.batches == [("m", ["1", "2"])]
+
+
+def test_models_are_batched_apart():
+    executor = FakeExecutor()
+    batcher = MicroBatcher(executor, max_batch_size=2, max_wait_ms=10_000)
+    first, second = FakeModel("a"), FakeModel("b")
+
+    async def main():
+        return await asyncio.wait_for(
+            asyncio.gather(
+                batcher.predict(first, "1"),
+                batcher.predict(second, "2"),
+                batcher.predict(first, "3"),
+                batcher.predict(second, "4"),
+            ),
+            timeout=5,
+        )
+
+    assert asyncio.run(main()) == [1, 2, 3, 4]
+    assert sorted(executor.batches) == [("a", ["1", "3"]), ("b", ["2", "4"])]
+
+
+def test_batch_error_is_raised_to_every_caller():
+    error = OperationalError("Inference queue is full, try again later.")
+    batcher = MicroBatcher(FakeExecutor(error), max_batch_size=3, max_wait_ms=10_000)
+    model = FakeModel("m")
+
+    async def main():
+        return await asyncio.gather(
+            *(batcher.predict(model, str(i)) for i in range(3)), return_exceptions=True
+        )
+
+    assert asyncio.run(main()) == [error] * 3
+
+
+def test_cancelled_caller_is_left_out_of_the_batch():
+    executor = FakeExecutor()
+    batcher = MicroBatcher(executor, max_batch_size=100, max_wait_ms=50)
+    model = FakeModel("m")
+
+    async def main():
+        tasks = [asyncio.create_task(batcher.predict(model, str(i))) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks[1].cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await tasks[1]
+        return await tasks[0], await tasks[2]
+
+    assert asyncio.run(main()) == (0, 2)
+    assert executor.batches == [("m", ["0", "2"])]
+
+
+def test_caller_cancelled_during_the_batch_doesnt_affect_the_others():
+    executor = FakeExecutor()
+    batcher = MicroBatcher(executor, max_batch_size=2, max_wait_ms=10_000)
+    model = FakeModel("m")
+
+    async def main():
+        first = asyncio.create_task(batcher.predict(model, "1"))
+        await asyncio.sleep(0)
+        # Fills the batch, which starts running
+        second = asyncio.create_task(batcher.predict(model, "2"))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == 2
+    assert executor.batches == [("m", ["1", "2"])]
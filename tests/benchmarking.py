@@ -0,0 +1,36 @@
+"""Helpers shared by the benchmark scripts, which import them when run as `python tests/<name>_benchmark.py`."""
+import random
+import tempfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+import mlflow
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+
+WORDS = "good great love bad awful hate movie food service plot acting price taste never again".split()
+
+
+def make_texts(n: int) -> list[str]:
+    """Make random reviews, each ending in a random number so neither deduplication nor the prediction cache skips it."""
+    return [" ".join(random.choices(WORDS, k=random.randint(5, 40))) + f" {random.random()}" for _ in range(n)]
+
+
+@contextmanager
+def saved_pipeline(n_train_texts: int = 2000) -> Iterator[str]:
+    """Train a small TF-IDF pipeline and save it as an MLflow model in a temporary directory.
+
+    Args:
+        n_train_texts: The number of random reviews to train on.
+
+    Yields:
+        The path of the saved model, removed on exit.
+    """
+    train_texts = make_texts(n_train_texts)
+    labels = [int("good" in text or "great" in text) for text in train_texts]
+    pipeline = make_pipeline(TfidfVectorizer(), LogisticRegression()).fit(train_texts, labels)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        mlflow.sklearn.save_model(pipeline, tmp_dir + "/model")
+        yield tmp_dir + "/model"
@@ -0,0 +1,111 @@
+from types import SimpleNamespace
+
+import pytest
+
+from opinionlens.app import cache, managers
+from opinionlens.app.cache import PredictionCache
+
+from .managers import MODEL_IDS, model_manager
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(scope="function")
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def test_get_many_returns_cached_predictions():
+    prediction_cache = PredictionCache(max_size=10, ttl_seconds=60)
+    prediction_cache.put_many("m", ["a", "b"], [1, 0])
+
+    assert prediction_cache.get_many("m", ["a", "b", "c"]) == [1, 0, None]
+    assert prediction_cache.get_many("other", ["a"]) == [None]
+
+
+def test_least_recently_used_entries_are_evicted():
+    prediction_cache = PredictionCache(max_size=3, ttl_seconds=60)
+    prediction_cache.put_many("m", ["a", "b", "c"], [1, 1, 1])
+    # Looking up 'a' makes 'b' the least recently used
+    prediction_cache.get_many("m", ["a"])
+
+    prediction_cache.put_many("m", ["d"], [0])
+
+    assert prediction_cache.get_many("m", ["a", "b", "c", "d"]) == [1, None, 1, 0]
+
+
+def test_capacity_is_never_exceeded():
+    prediction_cache = PredictionCache(max_size=100, ttl_seconds=60)
+    for i in range(10):
+        prediction_cache.put_many("m", [f"{i}-{j}" for j in range(30)], [1] * 30)
+
+    assert len(prediction_cache._entries) == 100
+    # The latest entries are kept
+    assert prediction_cache.get_many("m", [f"9-{j}" for j in range(30)]) == [1] * 30
+
+
+def test_entries_expire(clock):
+    prediction_cache = PredictionCache(max_size=10, ttl_seconds=60)
+    prediction_cache.put_many("m", ["a"], [1])
+    clock.now = 30.0
+    prediction_cache.put_many("m", ["b"], [0])
+
+    clock.now = 60.0
+    assert prediction_cache.get_many("m", ["a", "b"]) == [None, 0]
+
+    clock.now = 90.0
+    assert prediction_cache.get_many("m", ["b"]) == [None]
+    assert len(prediction_cache._entries) == 0
+
+
+def test_disabled_cache_stores_nothing():
+    prediction_cache = PredictionCache(max_size=0, ttl_seconds=60)
+    prediction_cache.put_many("m", ["a"], [1])
+
+    assert prediction_cache.get_many("m", ["a"]) == [None]
+
+
+def test_invalidate_removes_only_the_model_entries():
+    prediction_cache = PredictionCache(max_size=10, ttl_seconds=60)
+    prediction_cache.put_many("m", ["a"], [1])
+    prediction_cache.put_many("other", ["a"], [0])
+
+    prediction_cache.invalidate("m")
+
+    assert prediction_cache.get_many("m", ["a"]) == [None]
+    assert prediction_cache.get_many("other", ["a"]) == [0]
+    assert prediction_cache._bytes == prediction_cache._entry_size("a")
+
+
+@pytest.fixture(scope="function")
+def manager_cache(monkeypatch):
+    prediction_cache = PredictionCache(max_size=100, ttl_seconds=60)
+    monkeypatch.setattr(managers, "prediction_cache", prediction_cache)
+    for model_id in MODEL_IDS:
+        prediction_cache.put_many(model_id, ["a"], [1])
+    return prediction_cache
+
+
+def test_deleting_a_model_invalidates_its_predictions(model_manager, manager_cache):
+    model_manager.delete_model(MODEL_IDS[1])
+
+    assert manager_cache.get_many(MODEL_IDS[1], ["a"]) == [None]
+    assert manager_cache.get_many(MODEL_IDS[2], ["a"]) == [1]
+
+
+def test_setting_the_default_invalidates_the_previous_default(model_manager, manager_cache):
+    previous_model_id = model_manager.get_default_model().model_id
+    model_id = next(model_id for model_id in MODEL_IDS if model_id != previous_model_id)
+
+    model_manager.set_default(model_id)
+
+    assert manager_cache.get_many(previous_model_id, ["a"]) == [None]
+    assert manager_cache.get_many(model_id, ["a"]) == [1]
@@ -0,0 +1,140 @@
+import asyncio
+
+import mlflow
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+
+from opinionlens.app.cache import prediction_cache
+from opinionlens.app.coalescing import SingleFlight
+from opinionlens.app.exceptions import OperationalError
+from opinionlens.app.models import SklearnModel
+
+from .scorers import TRAIN_SCORES, TRAIN_TEXTS
+
+
+class FakeModel:
+    model_id = "fake"
+
+
+class SlowPredictions:
+    """Predict the length of each text once released, recording the texts of each call."""
+
+    def __init__(self):
+        self.calls = []
+        self.release = asyncio.Event()
+        self.error = None
+
+    async def __call__(self, texts):
+        self.calls.append(list(texts))
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return [len(text) for text in texts]
+
+
+def test_concurrent_requests_share_in_flight_texts():
+    async def main():
+        single_flight = SingleFlight()
+        predictions = SlowPredictions()
+
+        first = asyncio.create_task(single_flight.predict(FakeModel(), ["a", "bb"], predictions, "/test"))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(single_flight.predict(FakeModel(), ["bb", "ccc", "a"], predictions, "/test"))
+        await asyncio.sleep(0)
+        predictions.release.set()
+
+        assert await first == [1, 2]
+        assert await second == [2, 3, 1]
+        assert predictions.calls == [["a", "bb"], ["ccc"]]
+        # Nothing is shared once predicted
+        assert not single_flight._in_flight
+
+    asyncio.run(main())
+
+
+def test_endpoints_dont_share_predictions():
+    async def main():
+        single_flight = SingleFlight()
+        predictions = SlowPredictions()
+
+        batch = asyncio.create_task(single_flight.predict(FakeModel(), ["a", "bb"], predictions, "/batch_predict"))
+        await asyncio.sleep(0)
+        # Doesn't wait for the batch, which may be much larger
+        single = asyncio.create_task(single_flight.predict(FakeModel(), ["a"], predictions, "/predict"))
+        await asyncio.sleep(0)
+        predictions.release.set()
+
+        assert await batch == [1, 2]
+        assert await single == [1]
+        assert predictions.calls == [["a", "bb"], ["a"]]
+
+    asyncio.run(main())
+
+
+def test_cancelled_request_still_shares_its_predictions():
+    async def main():
+        single_flight = SingleFlight()
+        predictions = SlowPredictions()
+
+        owner = asyncio.create_task(single_flight.predict(FakeModel(), ["a"], predictions, "/test"))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(single_flight.predict(FakeModel(), ["a"], predictions, "/test"))
+        await asyncio.sleep(0)
+
+        owner.cancel()
+        await asyncio.gather(owner, return_exceptions=True)
+        predictions.release.set()
+
+        assert await waiter == [1]
+        assert predictions.calls == [["a"]]
+
+    asyncio.run(main())
+
+
+def test_errors_reach_every_waiting_request():
+    async def main():
+        single_flight = SingleFlight()
+        predictions = SlowPredictions()
+        predictions.error = OperationalError("Inference queue is full, try again later.")
+
+        requests = [
+            asyncio.create_task(single_flight.predict(FakeModel(), ["a"], predictions, "/test"))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        predictions.release.set()
+
+        results = await asyncio.gather(*requests, return_exceptions=True)
+        assert all(isinstance(result, OperationalError) for result in results)
+        assert not single_flight._in_flight
+
+    asyncio.run(main())
+
+
+@pytest.fixture(scope="module")
+def model(tmp_path_factory):
+    model_path = str(tmp_path_factory.mktemp("model") / "model")
+    pipeline = make_pipeline(TfidfVectorizer(), LogisticRegression()).fit(TRAIN_TEXTS, TRAIN_SCORES)
+    mlflow.sklearn.save_model(pipeline, model_path)
+    return SklearnModel("dedup", model_path)
+
+
+def test_batch_predicts_each_cleaned_text_once(model, monkeypatch):
+    monkeypatch.setattr(prediction_cache, "max_size", 0)
+    scored = []
+    score = model._score
+
+    def record(texts):
+        scored.append(list(texts))
+        return score(texts)
+
+    monkeypatch.setattr(model, "_score", record)
+    batch = ["Great food!", "<b>Great</b> food", "never again", "Great food!", "never again :("]
+
+    predictions = model.batch_predict(batch)
+
+    assert predictions == [model.predict(text) for text in batch]
+    # The three spellings of 'great food' are one text once cleaned, the emoticon makes the last text unique
+    assert len(scored[0]) == 3
@@ -1,3 +1,5 @@
+import time
+
 import pytest
 from fastapi.testclient import TestClient
 
@@ -6,21 +8,34 @@ from opinionlens.app.main import app
 
 @pytest.fixture(scope="module")
 def test_app():
-    client = TestClient(app)
-    yield client
+    # Entering the client runs the lifespan, which starts the model manager.
+    # The host must be one the trusted host middleware allows.
+    with TestClient(app, base_url="http://localhost") as client:
+        yield client
+
+
+def wait_for_job(test_app, job_id, timeout=60, url="/api/v1/models/jobs/"):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = test_app.get(f"{url}{job_id}").json()
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.1)
+    raise TimeoutError(f"Job {job_id!r} didn't finish in {timeout} seconds.")
 
 
 @pytest.fixture(scope="function")
 def added_model_id(test_app):
     url = "/api/v1/models"
     body = {
-        "model_uri": "basic_model/1",
+        "model_name": "basic_model",
+        "model_version": 1,
         "set_default": True,
     }
     response = test_app.post(url, json=body)
-    response_body = response.json()
+    job = wait_for_job(test_app, response.json()["job_id"])
 
-    model_id = response_body["model_id"]
+    model_id = job["result"]["model_id"]
     yield model_id
 
     try:
@@ -0,0 +1,68 @@
+import pytest
+
+from opinionlens.app.encoding import (
+    BINARY_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    negotiate,
+    pack_predictions,
+    parse_binary_batch,
+    parse_text_batch,
+)
+
+TEXTS = ["I love this!", "", "Ça ne marche pas 👎", "line\tending"]
+
+
+def length_prefixed(texts):
+    return b"".join(len(text.encode()).to_bytes(4, "little") + text.encode() for text in texts)
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        "\n".join(TEXTS).encode(),
+        ("\n".join(TEXTS) + "\n").encode(),
+        ("\r\n".join(TEXTS) + "\r\n").encode(),
+    ],
+)
+def test_parse_text_batch(body):
+    assert parse_text_batch(body) == TEXTS
+
+
+def test_parse_empty_batches():
+    assert parse_text_batch(b"") == []
+    assert parse_binary_batch(b"") == []
+
+
+def test_parse_binary_batch():
+    assert parse_binary_batch(length_prefixed(TEXTS)) == TEXTS
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        length_prefixed(TEXTS)[:-1],
+        length_prefixed(TEXTS) + b"\x01\x00",
+        b"\x02\x00\x00\x00\xff\xfe",
+    ],
+)
+def test_parse_invalid_binary_batch(body):
+    with pytest.raises(ValueError):
+        parse_binary_batch(body)
+
+
+def test_pack_predictions():
+    assert pack_predictions([1, 0, 0, 1]) == b"\x01\x00\x00\x01"
+
+
+@pytest.mark.parametrize(
+    "accept, media_type",
+    [
+        (None, JSON_MEDIA_TYPE),
+        ("*/*", JSON_MEDIA_TYPE),
+        ("application/octet-stream", BINARY_MEDIA_TYPE),
+        ("application/json, application/octet-stream", JSON_MEDIA_TYPE),
+        ("text/html, Application/Octet-Stream;q=0.9", BINARY_MEDIA_TYPE),
+    ],
+)
+def test_negotiate(accept, media_type):
+    assert negotiate(accept, (JSON_MEDIA_TYPE, BINARY_MEDIA_TYPE)) == media_type
@@ -0,0 +1,329 @@
+import asyncio
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+from opinionlens.app import executors, managers
+from opinionlens.app.exceptions import ModelNotAvailableError, OperationalError
+from opinionlens.app.executors import InferenceExecutor
+
+from .managers import save_fake_model
+
+
+class EchoModel:
+    """Predict each text as its number, recording the sizes of the batches it predicts.
+
+    Texts are cleaned by stripping their whitespace.
+    """
+
+    model_id = "echo"
+
+    def __init__(self):
+        self.batch_sizes = []
+        self._lock = threading.Lock()
+
+    def preprocess_text(self, batch):
+        return [text.strip() for text in batch]
+
+    def predict_preprocessed(self, texts):
+        with self._lock:
+            self.batch_sizes.append(len(texts))
+        return [int(text) for text in texts]
+
+    def batch_predict(self, batch):
+        return self.predict_preprocessed(self.preprocess_text(batch))
+
+
+class SavedEchoModel(EchoModel):
+    """An echo model the model manager loads from disk."""
+
+    def __init__(self, model_id, model_path):
+        super().__init__()
+        self.model_id = model_id
+        self.pyfunc_model = [0] * 1000
+
+    def get_batch_sizes(self, _):
+        return self.batch_sizes
+
+
+def make_executor(sub_batch_size, max_workers=4, max_queue_size=16, kind="thread"):
+    return InferenceExecutor(
+        kind=kind, max_workers=max_workers, max_queue_size=max_queue_size, sub_batch_size=sub_batch_size
+    )
+
+
+@pytest.mark.parametrize(
+    "n_texts, sub_batch_size, sizes",
+    [
+        (10, 0, [10]),
+        (10, 10, [10]),
+        (2500, 1000, [834, 834, 832]),
+        (3000, 1000, [1000, 1000, 1000]),
+        (1001, 1000, [501, 500]),
+    ],
+)
+def test_split_into_even_sub_batches(n_texts, sub_batch_size, sizes):
+    executor = make_executor(sub_batch_size)
+    texts = [str(i) for i in range(n_texts)]
+
+    sub_batches = executor.split(texts)
+
+    assert [len(sub_batch) for sub_batch in sub_batches] == sizes
+    assert [text for sub_batch in sub_batches for text in sub_batch] == texts
+
+
+def test_run_batch_reassembles_predictions_in_order():
+    executor = make_executor(sub_batch_size=100)
+    model = EchoModel()
+    texts = [str(i) for i in range(1050)]
+
+    try:
+        predictions = asyncio.run(executor.run_batch(model, texts, endpoint="/test"))
+    finally:
+        executor.shutdown()
+
+    assert predictions == list(range(1050))
+    assert sorted(model.batch_sizes) == [90] + [96] * 10
+
+
+def test_run_batch_fails_as_a_whole_when_the_queue_is_full():
+    executor = make_executor(sub_batch_size=10, max_workers=1, max_queue_size=2)
+
+    try:
+        with pytest.raises(OperationalError):
+            asyncio.run(executor.run_batch(EchoModel(), [str(i) for i in range(100)], endpoint="/test"))
+    finally:
+        executor.shutdown()
+
+    assert executor.in_flight == 0
+
+
+def test_run_batch_predicts_repeated_texts_once():
+    executor = make_executor(sub_batch_size=100)
+    model = EchoModel()
+    texts = [str(i % 150) for i in range(1000)]
+
+    try:
+        predictions = asyncio.run(executor.run_batch(model, texts, endpoint="/test"))
+    finally:
+        executor.shutdown()
+
+    assert predictions == [i % 150 for i in range(1000)]
+    # Deduplicated before splitting, so the 150 unique texts make two sub-batches
+    assert sorted(model.batch_sizes) == [75, 75]
+
+
+def test_run_batch_predicts_texts_repeated_once_cleaned_once_across_sub_batches():
+    executor = make_executor(sub_batch_size=100)
+    model = EchoModel()
+    # Each number is spelled three ways, spread over different sub-batches
+    texts = [pad.format(i) for pad in ("{}", " {}", "{} ") for i in range(100)]
+
+    try:
+        predictions = asyncio.run(executor.run_batch(model, texts, endpoint="/test"))
+    finally:
+        executor.shutdown()
+
+    assert predictions == list(range(100)) * 3
+    assert sorted(model.batch_sizes) == [100]
+
+
+@pytest.fixture(scope="function")
+def process_executor(tmp_path, monkeypatch):
+    for model_id in ("m-default", "m-other"):
+        save_fake_model(str(tmp_path), model_id)
+
+    monkeypatch.setattr(managers.settings.api, "saved_model_path", str(tmp_path))
+    monkeypatch.setattr(managers.settings.api, "background_model_loading", False)
+    monkeypatch.setattr(managers.settings.api, "warmup_texts", ["7"])
+    monkeypatch.setattr(managers, "SklearnModel", SavedEchoModel)
+
+    manager = type(managers.model_manager)()
+    manager.start()
+    # The workers look the models up in the manager they inherit
+    monkeypatch.setattr(executors, "model_manager", manager)
+
+    executor = make_executor(sub_batch_size=0, max_workers=2, kind="process")
+    manager.add_listener(executor.recycle)
+    yield executor, manager
+    executor.shutdown()
+
+
+def test_process_workers_are_forked_again_for_evicted_models(process_executor):
+    executor, manager = process_executor
+    model = manager.get_model("m-other")
+
+    async def main():
+        assert await executor.run_batch(model, ["1", "2"], endpoint="/test") == [1, 2]
+
+        with manager._write_lock:
+            manager._evict_model("m-other")
+            manager._notify_listeners()
+        # The replacement workers are forked without the model
+        while "m-other" in executor._pool_model_ids:
+            await asyncio.sleep(0.01)
+
+        # The API process loads the model again and forks workers that have it
+        return await asyncio.wait_for(executor.run_batch(model, ["3"], endpoint="/test"), timeout=20)
+
+    assert asyncio.run(main()) == [3]
+    assert "m-other" in manager.get_loaded_model_ids()
+
+
+def test_process_pool_is_replaced_off_the_request_path(process_executor):
+    executor, manager = process_executor
+    asyncio.run(executor.run_batch(manager.get_default_model(), ["1"], endpoint="/test"))
+    pool = executor._pool
+
+    # Loading a model forks a replacement pool with it in the background
+    manager.get_model("m-other")
+    deadline = time.monotonic() + 20
+    while executor._pool is pool and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert executor._pool is not pool
+    assert "m-other" in executor._pool_model_ids
+
+
+def test_process_workers_warm_up_their_models(process_executor):
+    executor, manager = process_executor
+    model = manager.get_default_model()
+
+    batch_sizes = asyncio.run(executor.run(model, "get_batch_sizes", None, endpoint="/test"))
+
+    # The warm-up batch, not recorded by the model of the API process
+    assert batch_sizes == [1]
+    assert model.batch_sizes == []
+
+
+def test_process_workers_reject_deleted_models(process_executor):
+    executor, manager = process_executor
+    model = manager.get_model("m-other")
+    manager.delete_model("m-other")
+
+    with pytest.raises(ModelNotAvailableError):
+        asyncio.run(asyncio.wait_for(executor.run_batch(model, ["1"], endpoint="/test"), timeout=20))
+
+
+def test_process_workers_fork_while_the_model_manager_is_locked(process_executor):
+    executor, manager = process_executor
+    model = manager.get_default_model()
+    locked = threading.Event()
+    release = threading.Event()
+
+    def hold_lock():
+        with manager._write_lock:
+            locked.set()
+            release.wait()
+
+    holder = threading.Thread(target=hold_lock)
+    holder.start()
+    locked.wait()
+    try:
+        # The workers inherit the lock as it was held, and must not wait for it
+        predictions = asyncio.run(asyncio.wait_for(executor.run_batch(model, ["1"], endpoint="/test"), timeout=20))
+    finally:
+        release.set()
+        holder.join()
+
+    assert predictions == [1]
+
+
+def test_process_workers_exit_on_sigterm(process_executor):
+    executor, manager = process_executor
+    # Like the server, the API process only takes note of SIGTERM
+    previous_handler = signal.signal(signal.SIGTERM, lambda signum, frame: None)
+    try:
+        asyncio.run(executor.run_batch(manager.get_default_model(), ["1"], endpoint="/test"))
+    finally:
+        signal.signal(signal.SIGTERM, previous_handler)
+
+    pid, process = next(iter(executor._pool._processes.items()))
+    os.kill(pid, signal.SIGTERM)
+    process.join(timeout=10)
+
+    assert process.exitcode == -signal.SIGTERM
+
+
+def test_calls_waiting_for_the_process_pool_count_against_the_queue(process_executor, monkeypatch):
+    executor, manager = process_executor
+    monkeypatch.setattr(executor, "max_queue_size", 0)
+    model = manager.get_default_model()
+
+    async def main():
+        # The pool is forked by the first call, while the others wait for it
+        return await asyncio.gather(
+            *(executor.run(model, "batch_predict", ["1"], endpoint="/test") for _ in range(5)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(main())
+
+    assert results.count([1]) == executor.max_workers
+    assert sum(isinstance(result, OperationalError) for result in results) == 5 - executor.max_workers
+    assert executor.in_flight == 0
+
+
+class BlockingModel(EchoModel):
+    """An echo model whose calls block until released."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def batch_predict(self, batch):
+        self.release.wait(5)
+        return super().batch_predict(batch)
+
+
+def test_wait_idle_returns_once_the_interactive_calls_finish():
+    executor = make_executor(sub_batch_size=0)
+    model = BlockingModel()
+    idle = []
+
+    async def main():
+        call = asyncio.ensure_future(executor.run(model, "batch_predict", ["1"], endpoint="/test"))
+        await asyncio.sleep(0.05)
+        waiter = asyncio.ensure_future(asyncio.to_thread(executor.wait_idle, 5))
+        await asyncio.sleep(0.05)
+        idle.append(waiter.done())
+        model.release.set()
+        await call
+        idle.append(await waiter)
+
+    try:
+        assert executor.wait_idle(0)
+        asyncio.run(main())
+    finally:
+        executor.shutdown()
+
+    assert idle == [False, True]
+
+
+def test_background_calls_are_not_rejected_and_dont_keep_wait_idle_waiting():
+    executor = make_executor(sub_batch_size=0, max_workers=1, max_queue_size=0)
+    model = BlockingModel()
+
+    async def main():
+        calls = [
+            asyncio.ensure_future(executor.run(model, "batch_predict", [str(i)], endpoint="/test", background=True))
+            for i in range(3)
+        ]
+        await asyncio.sleep(0.05)
+        idle = executor.wait_idle(0)
+        with pytest.raises(OperationalError):
+            await executor.run(model, "batch_predict", ["3"], endpoint="/test")
+        model.release.set()
+        return idle, await asyncio.gather(*calls)
+
+    try:
+        idle, predictions = asyncio.run(main())
+    finally:
+        executor.shutdown()
+
+    assert idle
+    assert predictions == [[0], [1], [2]]
+    assert executor.in_flight == 0
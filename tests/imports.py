@@ -0,0 +1,48 @@
+import subprocess
+import sys
+
+import pytest
+
+# Heavy dependencies imported with the first model or job, rather than with the app
+DEFERRED_MODULES = ("mlflow", "sklearn", "scipy", "nltk", "pandas", "joblib")
+# The cumulative import time of the app, about twice what it takes on a developer machine
+IMPORT_TIME_BUDGET_SECONDS = 1.5
+
+
+def import_times(module: str) -> dict[str, float]:
+    """Import the module in a fresh interpreter, and return the cumulative seconds each module took."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        times[name.strip()] = int(cumulative_us) / 1e6
+    return times
+
+
+@pytest.fixture(scope="module")
+def app_import_times():
+    return import_times("opinionlens.app.main")
+
+
+def test_app_import_defers_heavy_dependencies(app_import_times):
+    imported = {name.split(".")[0] for name in app_import_times}
+    assert imported.isdisjoint(DEFERRED_MODULES), sorted(imported.intersection(DEFERRED_MODULES))
+
+
+def test_app_import_time_within_budget(app_import_times):
+    assert app_import_times["opinionlens.app.main"] < IMPORT_TIME_BUDGET_SECONDS
+
+
+def test_app_import_creates_nothing(tmp_path):
+    # The app serves its static files from the working directory
+    (tmp_path / "static").mkdir()
+
+    subprocess.run([sys.executable, "-c", "import opinionlens.app.main"], cwd=tmp_path, check=True)
+
+    assert [path.name for path in tmp_path.iterdir()] == ["static"]
@@ -0,0 +1,134 @@
+import os
+import random
+import subprocess
+import sys
+
+from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.parser import text_string_to_metric_families
+
+from opinionlens.app import instruments
+
+BUCKETS = (10, 50, 100, 200, 500, 1000, 2000)
+
+
+def exposition(registry: CollectorRegistry) -> list[str]:
+    # Creation timestamps differ between registries
+    return [line for line in generate_latest(registry).decode().splitlines() if "_created" not in line]
+
+
+def test_observe_many_matches_observe():
+    values = [random.randint(0, 3000) for _ in range(1000)] + list(BUCKETS) + [0, 2001]
+
+    one_by_one, bulk = CollectorRegistry(), CollectorRegistry()
+    histogram = Histogram("lengths", "Lengths", ["endpoint"], buckets=BUCKETS, registry=one_by_one)
+    bulk_histogram = Histogram("lengths", "Lengths", ["endpoint"], buckets=BUCKETS, registry=bulk)
+
+    for value in values:
+        histogram.labels("/batch_predict").observe(value)
+    instruments.observe_many(instruments.child(bulk_histogram, "/batch_predict"), values)
+    instruments.observe_many(instruments.child(bulk_histogram, "/batch_predict"), [])
+
+    assert exposition(bulk) == exposition(one_by_one)
+
+
+def test_observe_many_falls_back_to_observe(monkeypatch):
+    # As if the installed prometheus_client had renamed the private attributes of histograms
+    monkeypatch.setattr(instruments, "_BULK_OBSERVATION_ATTRIBUTES", ("_renamed",))
+    monkeypatch.setattr(instruments, "_bulk_observations_supported", None)
+    values = [random.randint(0, 3000) for _ in range(100)]
+
+    one_by_one, bulk = CollectorRegistry(), CollectorRegistry()
+    histogram = Histogram("lengths", "Lengths", buckets=BUCKETS, registry=one_by_one)
+    bulk_histogram = Histogram("lengths", "Lengths", buckets=BUCKETS, registry=bulk)
+
+    for value in values:
+        histogram.observe(value)
+    instruments.observe_many(bulk_histogram, values)
+
+    assert instruments._bulk_observations_supported is False
+    assert exposition(bulk) == exposition(one_by_one)
+
+
+def test_child_is_cached():
+    counter = Counter("predictions", "Predictions", ["label"], registry=CollectorRegistry())
+
+    assert instruments.child(counter, "POSITIVE") is instruments.child(counter, "POSITIVE")
+    assert instruments.child(counter, "POSITIVE") is counter.labels("POSITIVE")
+
+
+def test_latency_histograms_keep_their_buckets():
+    # Dashboards and alerts select these series by their `le` labels
+    for histogram in (instruments.MODEL_INFERENCE_TIME_SECONDS, instruments.BATCH_INFERENCE_TIME_PER_ITEM_SECONDS):
+        instruments.child(histogram, "/test", "TestModel")
+        upper_bounds = [
+            sample.labels["le"]
+            for sample in histogram.collect()[0].samples
+            if sample.name.endswith("_bucket") and sample.labels["endpoint"] == "/test"
+        ]
+
+        assert upper_bounds == ["0.01", "0.05", "0.1", "0.2", "0.5", "1.0", "+Inf"]
+
+
+# Records the metrics of one process, as a server worker would
+RECORD_SCRIPT = """
+import sys
+from prometheus_client import Counter
+from opinionlens.app import instruments
+
+instruments.MODEL_INFERENCE_TIME_SECONDS.labels("/predict", "SklearnModel").observe(0.02)
+instruments.INFERENCE_IN_FLIGHT.inc(int(sys.argv[1]))
+# Stands in for the HTTP metrics of the instrumentator, in the default registry
+Counter("http_requests", "HTTP requests", ["handler"]).labels("/predict").inc()
+if sys.argv[2] == "dead":
+    instruments.mark_process_dead()
+"""
+
+SCRAPE_SCRIPT = """
+import sys
+from opinionlens.app import instruments
+
+for scrape, path in ((instruments.inference_scrape, sys.argv[1]), (instruments.http_scrape, sys.argv[2])):
+    with open(path, "wb") as f:
+        f.write(scrape.generate())
+"""
+
+
+def scrape_processes(tmp_path) -> tuple[dict, dict]:
+    """Record metrics in two processes, then scrape both expositions from a third one.
+
+    Returns:
+        The samples of the inference and the HTTP expositions, by metric name.
+    """
+    multiproc_dir = tmp_path / "multiproc"
+    multiproc_dir.mkdir()
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(multiproc_dir)}
+    for in_flight, state in ((3, "alive"), (5, "dead")):
+        subprocess.run([sys.executable, "-c", RECORD_SCRIPT, str(in_flight), state], env=env, check=True)
+
+    paths = [tmp_path / "inference.txt", tmp_path / "http.txt"]
+    subprocess.run([sys.executable, "-c", SCRAPE_SCRIPT, *map(str, paths)], env=env, check=True)
+    return tuple(
+        {family.name: family.samples for family in text_string_to_metric_families(path.read_text())}
+        for path in paths
+    )
+
+
+def sample_value(samples, name, **labels) -> float:
+    return next(sample.value for sample in samples if sample.name == name and sample.labels == labels)
+
+
+def test_multiprocess_metrics_are_aggregated_and_split_by_registry(tmp_path):
+    inference, http = scrape_processes(tmp_path)
+
+    # Only the inference metrics on the inference endpoint, and only the others on the HTTP endpoint
+    assert set(inference) <= instruments.INFERENCE_METRIC_NAMES
+    assert set(inference) >= {"model_inference_time_seconds", "inference_in_flight"}
+    assert set(http) == {"http_requests"}
+
+    latency = inference["model_inference_time_seconds"]
+    labels = {"endpoint": "/predict", "model_class": "SklearnModel"}
+    assert sample_value(latency, "model_inference_time_seconds_count", **labels) == 2
+    assert sample_value(latency, "model_inference_time_seconds_bucket", **labels, le="0.05") == 2
+    assert sample_value(http["http_requests"], "http_requests_total", handler="/predict") == 2
+    # The live gauges of a process marked dead are dropped
+    assert sample_value(inference["inference_in_flight"], "inference_in_flight") == 3
@@ -0,0 +1,181 @@
+import json
+import os
+import random
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from opinionlens.app import artifacts, managers
+from opinionlens.app.exceptions import ModelNotAvailableError, OperationalError
+
+MODEL_IDS = [f"m-{i}" for i in range(4)]
+
+
+class FakeModel:
+    def __init__(self, model_id, model_path):
+        self.model_id = model_id
+        self.pyfunc_model = [0] * 1000
+
+
+def save_fake_model(model_path, model_id):
+    os.makedirs(os.path.join(model_path, model_id), exist_ok=True)
+    manifest = {
+        "model_name": model_id,
+        "model_creation": "2025-01-01T00:00:00",
+        "model_flavors": ["sklearn"],
+        "registry_model_uri": f"models:/{model_id}",
+        "saved_model_path": os.path.join(model_path, model_id),
+        "model_tags": {},
+    }
+    with open(os.path.join(model_path, model_id, managers.MANIFEST_FILENAME), "w") as f:
+        json.dump(manifest, f)
+
+
+@pytest.fixture(scope="function")
+def model_manager(tmp_path, monkeypatch):
+    for model_id in MODEL_IDS:
+        save_fake_model(str(tmp_path), model_id)
+
+    monkeypatch.setattr(managers.settings.api, "saved_model_path", str(tmp_path))
+    monkeypatch.setattr(managers.settings.api, "background_model_loading", False)
+    monkeypatch.setattr(managers, "SklearnModel", FakeModel)
+
+    manager = type(managers.model_manager)()
+    manager.start()
+    # Small enough to keep evicting models as they're loaded
+    manager._memory_budget = 2 * managers.get_deep_size([0] * 1000)
+    return manager
+
+
+def test_concurrent_reads_and_writes(model_manager, tmp_path):
+    start = threading.Event()
+    stop = threading.Event()
+    errors = []
+
+    def reader():
+        start.wait()
+        while not stop.is_set():
+            try:
+                model = model_manager.get_default_model()
+                assert model.model_id in MODEL_IDS
+
+                state = model_manager._state
+                if state.default_model_id is not None:
+                    assert state.default_model_id in state.models
+                assert set(state.models) <= set(state.model_infos)
+            except ModelNotAvailableError:
+                # The default model was deleted
+                pass
+            except Exception as e:
+                errors.append(e)
+                return
+
+    def writer(seed):
+        rng = random.Random(seed)
+        start.wait()
+        while not stop.is_set():
+            model_id = rng.choice(MODEL_IDS)
+            try:
+                match rng.randrange(4):
+                    case 0:
+                        model_manager.set_default(model_id)
+                    case 1:
+                        model_manager.get_model(model_id)
+                    case 2:
+                        model_manager.delete_model(model_id)
+                        save_fake_model(str(tmp_path), model_id)
+                        model_manager._register_saved_models()
+                    case 3:
+                        model_manager.get_model_info()
+            except (ModelNotAvailableError, OperationalError):
+                # The model was deleted by another writer
+                pass
+            except Exception as e:
+                errors.append(e)
+                return
+
+    readers = [threading.Thread(target=reader) for _ in range(100)]
+    writers = [threading.Thread(target=writer, args=(seed,)) for seed in range(4)]
+    for thread in readers + writers:
+        thread.start()
+
+    start.set()
+    stop.wait(3)
+    stop.set()
+    for thread in readers + writers:
+        thread.join()
+
+    assert not errors, errors
+
+    state = model_manager._state
+    assert set(state.models) <= set(state.model_infos)
+    if state.default_model_id is not None:
+        assert state.default_model_id in state.models
+
+
+def test_fetch_resolves_cached_registry_uri_without_network(model_manager, monkeypatch):
+    def get_model_info(model_uri):
+        raise AssertionError("The registry was queried.")
+
+    monkeypatch.setattr("mlflow.models.get_model_info", get_model_info)
+    monkeypatch.setattr(managers.registry_cache, "_model_ids", {"models:/fake/1": MODEL_IDS[0]})
+
+    model_path, model_id = model_manager.fetch_model("models:/fake/1")
+
+    assert model_id == MODEL_IDS[0]
+    assert model_path == model_manager._get_model_path(MODEL_IDS[0])
+    assert MODEL_IDS[0] in model_manager._state.models
+
+
+def test_deleted_model_leaves_the_artifact_store_once_unused(tmp_path, monkeypatch):
+    registry = tmp_path / "registry" / "m-store"
+    (registry / "MLmodel").parent.mkdir(parents=True)
+    (registry / "MLmodel").write_text("flavors: {}\n")
+    model_uri = "file://" + str(registry)
+
+    model_info = SimpleNamespace(
+        model_id="m-store",
+        name="store",
+        creation_timestamp=0,
+        flavors={"sklearn": {}},
+        tags={"mlflow.modelVersions": None},
+    )
+    monkeypatch.setattr("mlflow.models.get_model_info", lambda model_uri: model_info)
+    monkeypatch.setattr(managers.registry_cache, "_model_ids", {})
+    monkeypatch.setattr(managers, "artifact_store", artifacts.ArtifactStore(str(tmp_path / "store"), max_workers=1))
+    monkeypatch.setattr(managers.settings.api, "background_model_loading", False)
+    monkeypatch.setattr(managers, "SklearnModel", FakeModel)
+
+    store_path = managers.artifact_store.get_path("m-store")
+    replicas = []
+    for name in ("replica-1", "replica-2"):
+        saved_model_path = tmp_path / name
+        saved_model_path.mkdir()
+        monkeypatch.setattr(managers.settings.api, "saved_model_path", str(saved_model_path))
+
+        manager = type(managers.model_manager)()
+        manager.start()
+        manager.fetch_model(model_uri)
+        replicas.append((saved_model_path, manager))
+
+        # The manifest is kept by the instance, outside the shared store
+        assert os.path.exists(manager._get_manifest_path("m-store"))
+        assert os.path.dirname(manager._get_manifest_path("m-store")) == str(saved_model_path)
+        assert os.listdir(store_path) == ["MLmodel"]
+
+    for i, (saved_model_path, manager) in enumerate(replicas):
+        monkeypatch.setattr(managers.settings.api, "saved_model_path", str(saved_model_path))
+        manager.delete_model("m-store")
+
+        assert sorted(os.listdir(saved_model_path)) == [managers.INSTANCE_ID_FILENAME]
+        # Deleted from the store by the last replica using it
+        assert os.path.exists(store_path) == (i == 0)
+
+
+def test_manifests_inside_model_directories_are_still_read(model_manager, tmp_path):
+    # Saved inside the model directories, as older versions did
+    assert set(MODEL_IDS) <= set(model_manager._state.model_infos)
+
+    model_manager.delete_model(MODEL_IDS[0])
+    assert not os.path.exists(os.path.join(tmp_path, MODEL_IDS[0]))
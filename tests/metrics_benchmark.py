@@ -0,0 +1,43 @@
+"""Benchmark recording the metrics of a batch one text at a time against recording them in bulk.
+
+    python tests/metrics_benchmark.py [n_batches]
+"""
+import random
+import sys
+import time
+
+
+from opinionlens.app import instruments
+from opinionlens.app.routers.inference import _record_batch
+
+
+def one_by_one(endpoint, texts, predictions):
+    for text in texts:
+        instruments.INPUT_TEXT_LENGTH_CHARS.labels(endpoint).observe(len(text))
+    for prediction in predictions:
+        instruments.PREDICTED_SENTIMENT_TOTAL.labels("POSITIVE" if prediction == 1 else "NEGATIVE").inc()
+
+
+def measure(func, batch_size: int, n_batches: int) -> float:
+    """Return the time in microseconds per batch."""
+    texts = ["x" * random.randint(1, 3000) for _ in range(batch_size)]
+    predictions = [random.randint(0, 1) for _ in range(batch_size)]
+
+    start_time = time.perf_counter()
+    for _ in range(n_batches):
+        func("/benchmark", texts, predictions)
+    return (time.perf_counter() - start_time) / n_batches * 1e6
+
+
+def main():
+    n_batches = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    for batch_size in (1, 10, 100, 1000, 10000):
+        print(f"Batch of {batch_size}:")
+        for label, func in (("one by one", one_by_one), ("bulk", _record_batch)):
+            latency = measure(func, batch_size, max(n_batches * 100 // batch_size, 10))
+            print(f"  {label:>10}: {latency:10.2f} us/batch")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from opinionlens.app import middleware
+from opinionlens.app.middleware import ErrorResponseLoggingMiddleware
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.errors = []
+
+    def error(self, msg, *args):
+        self.errors.append(msg % args)
+
+
+def stream(chunks):
+    async def iterate():
+        for chunk in chunks:
+            yield chunk
+
+    return iterate()
+
+
+@pytest.fixture(scope="function")
+def logged(monkeypatch):
+    logger = RecordingLogger()
+    monkeypatch.setattr(middleware, "logger", logger)
+    return logger.errors
+
+
+def make_app(max_body_bytes):
+    app = FastAPI()
+    app.add_middleware(ErrorResponseLoggingMiddleware, max_body_bytes=max_body_bytes)
+
+    @app.get("/ok")
+    def ok():
+        return {"status": "ok"}
+
+    @app.get("/stream")
+    def streamed():
+        return StreamingResponse(stream([b"first\n", b"second\n", b"third\n"]), media_type="text/plain")
+
+    @app.get("/error")
+    def error():
+        return PlainTextResponse("Something went wrong", status_code=500)
+
+    @app.get("/streamed_error")
+    def streamed_error():
+        return StreamingResponse(stream([b"12345", b"67890", b"abcde"]), status_code=503)
+
+    @app.get("/shed")
+    def shed():
+        return PlainTextResponse("Too many requests", status_code=429)
+
+    return app
+
+
+@pytest.fixture(scope="function")
+def client(logged):
+    with TestClient(make_app(max_body_bytes=10)) as client:
+        yield client
+
+
+def test_success_responses_pass_through_unlogged(client, logged):
+    response = client.get("/ok")
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+    assert logged == []
+
+
+def test_streaming_responses_pass_through_unlogged(client, logged):
+    response = client.get("/stream")
+
+    assert response.status_code == 200
+    assert response.text == "first\nsecond\nthird\n"
+    assert logged == []
+
+
+def test_error_responses_are_logged_with_a_capped_body(client, logged):
+    response = client.get("/error")
+
+    # The client still gets the whole body
+    assert response.text == "Something went wrong"
+    assert logged == ["Bad response to /error with status code 500: Something ..."]
+
+
+def test_streamed_error_bodies_are_capped_across_chunks(client, logged):
+    response = client.get("/streamed_error")
+
+    assert response.text == "1234567890abcde"
+    assert logged == ["Bad response to /streamed_error with status code 503: 1234567890..."]
+
+
+def test_short_error_bodies_are_logged_whole(logged):
+    with TestClient(make_app(max_body_bytes=100)) as client:
+        client.get("/error")
+
+    assert logged == ["Bad response to /error with status code 500: Something went wrong"]
+
+
+@pytest.mark.parametrize("path, status_code", [("/missing", 404), ("/shed", 429)])
+def test_expected_errors_are_not_logged(client, logged, path, status_code):
+    assert client.get(path).status_code == status_code
+    assert logged == []
@@ -0,0 +1,43 @@
+import random
+
+from locust import HttpUser, between, constant, task
+
+from load_test import text_pool
+
+# The number of texts of each batch sent by the overloading users
+OVERLOAD_BATCH_SIZE = 1000
+
+
+class OverloadingUsers(HttpUser):
+    """Users sending large batches back to back, pushing the app past its capacity.
+
+    Admission control rejects what can't be served within the queue delay objective, so the
+    latency of the admitted requests stays bounded. Rejections are reported apart, as they're
+    expected under overload.
+    """
+    wait_time = constant(0)
+
+    @task
+    def batch_predict(self):
+        batch = random.choices(text_pool, k=OVERLOAD_BATCH_SIZE)
+        url = "/api/v1/inference/batch_predict"
+
+        with self.client.post(url, json=batch, catch_response=True) as response:
+            if response.status_code == 429:
+                response.request_meta["name"] = url + " (rejected)"
+                response.success()
+
+
+class InteractiveUsers(HttpUser):
+    """Users predicting single texts, whose latency admission control keeps low under overload."""
+    wait_time = between(0.5, 1)
+
+    @task
+    def predict(self):
+        text = random.choice(text_pool)
+        url = "/api/v1/inference/predict"
+
+        with self.client.get(url, params={"text": text}, name=url, catch_response=True) as response:
+            if response.status_code == 429:
+                response.request_meta["name"] = url + " (rejected)"
+                response.success()
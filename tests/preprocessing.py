@@ -0,0 +1,65 @@
+import random
+
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from opinionlens.preprocessing import (
+    clean_text,
+    encode_text,
+    normalize_batch,
+    normalize_text,
+    tokenizer,
+)
+
+TEXTS = [
+    "",
+    "   ",
+    "I loved this movie, it was great!",
+    "<p>Not bad at all :)</p>",
+    "Terrible service, never again :(",
+    "great:)",
+    "great :-) and :D then ;P",
+    ":) only emoticons =( ;-D",
+    "=P",
+    "a b c d",
+    "<br /><br />Tags<i>inside</i>words<b>",
+    "unclosed <tag and > stray",
+    "Ünïcödé ÇAFÉ naïve İstanbul ß",
+    "snake_case and digits 123 4 x2",
+    "tabs\tand\nnew lines\r\n:)",
+    "ends with a single letter x :P",
+]
+
+
+def reference_normalize(text):
+    return " ".join(tokenizer(clean_text(text)))
+
+
+def random_texts(n, seed=0):
+    rng = random.Random(seed)
+    alphabet = "abcXYZ É_1 :;=-)(DP<>/!?.,\t\n"
+    return ["".join(rng.choices(alphabet, k=rng.randint(0, 40))) for _ in range(n)]
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_normalize_text_matches_clean_text(text):
+    assert normalize_text(text) == reference_normalize(text)
+
+
+def test_normalize_batch_matches_clean_text_on_random_texts():
+    texts = random_texts(5000)
+    assert normalize_batch(texts) == [reference_normalize(text) for text in texts]
+
+
+def test_encode_text_matches_vectorizer_analyzer():
+    texts = TEXTS + random_texts(2000, seed=1)
+    normalized = [reference_normalize(text) for text in texts]
+
+    vectorizer = TfidfVectorizer(lowercase=False).fit(normalized)
+    vocabulary = vectorizer.vocabulary_
+    analyzer = vectorizer.build_analyzer()
+
+    for text, normalized_text in zip(texts, normalized):
+        expected = [vocabulary[token] for token in analyzer(normalized_text)]
+        assert encode_text(text, vocabulary) == expected
+        assert encode_text(normalized_text, vocabulary) == expected
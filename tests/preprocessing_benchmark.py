@@ -0,0 +1,73 @@
+"""Benchmark the fused preprocessing against the clean → tokenize → join → vectorizer path.
+
+Run from the repository root after pulling the raw data with DVC:
+
+    python tests/preprocessing_benchmark.py [n_texts]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+from opinionlens.preprocessing import clean_text, encode_text, get_tfidf_vectorizer, normalize_text, tokenizer
+
+CORPORA = {
+    "IMDB": ("data/raw/IMDB Dataset/IMDB Dataset.csv", "review"),
+    "Amazon": ("data/raw/Amazon Food Reviews/Reviews.csv", "Text"),
+}
+
+
+def current_path(texts, vocabulary, analyzer):
+    for text in texts:
+        tokenized = " ".join(tokenizer(clean_text(text)))
+        [vocabulary[token] for token in analyzer(tokenized) if token in vocabulary]
+
+
+def fused_path(texts, vocabulary, analyzer):
+    for text in texts:
+        normalize_text(text)
+        encode_text(text, vocabulary)
+
+
+def measure(func, texts, vocabulary, analyzer) -> tuple[float, float]:
+    """Return the time in microseconds and the peak memory of the intermediate objects in bytes per text."""
+    start_time = time.perf_counter()
+    func(texts, vocabulary, analyzer)
+    latency = (time.perf_counter() - start_time) / len(texts) * 1e6
+
+    peaks = 0
+    tracemalloc.start()
+    for text in texts:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        func([text], vocabulary, analyzer)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks += peak - baseline
+    tracemalloc.stop()
+
+    return latency, peaks / len(texts)
+
+
+def main():
+    n_texts = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    for name, (path, column) in CORPORA.items():
+        if not os.path.exists(path):
+            print(f"{name}: {path!r} doesn't exist, skipping.")
+            continue
+
+        texts = pd.read_csv(path, usecols=[column], nrows=n_texts)[column].astype(str).to_list()
+        vectorizer = get_tfidf_vectorizer([normalize_text(text) for text in texts])
+        vocabulary = vectorizer.vocabulary_
+        analyzer = vectorizer.build_analyzer()
+
+        print(f"{name} ({len(texts)} texts):")
+        for label, func in (("current", current_path), ("fused", fused_path)):
+            latency, allocated = measure(func, texts, vocabulary, analyzer)
+            print(f"  {label:>8}: {latency:8.2f} us/text, {allocated:10.0f} bytes/text peak")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import os
+
+import pandas as pd
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.svm import LinearSVC, SVC
+from sklearn.tree import DecisionTreeClassifier
+
+from opinionlens.app.scorers import LinearTfidfScorer
+from opinionlens.common.utils import get_csv_files
+from opinionlens.preprocessing import clean_text, tokenizer
+
+EVAL_DATA_PATH = "data/eval_data/"
+
+TRAIN_TEXTS = [
+    "I loved this movie, it was great!",
+    "What a wonderful and great experience :)",
+    "Great food, great service, would come again",
+    "The best purchase I have made this year",
+    "This is the worst thing I have ever bought.",
+    "Terrible service, never again :(",
+    "Awful, boring and way too long",
+    "The food was cold and the staff was rude",
+]
+TRAIN_SCORES = [1, 1, 1, 1, 0, 0, 0, 0]
+
+TEST_TEXTS = [
+    "great great great",
+    "never again, the worst",
+    "<p>Not bad at all :)</p>",
+    "words the vocabulary has never seen",
+    "",
+    "rude rude rude staff but great food",
+]
+
+
+def preprocess(texts):
+    return [" ".join(tokenizer(clean_text(text))) for text in texts]
+
+
+@pytest.fixture(scope="module")
+def eval_texts():
+    if not os.path.exists(EVAL_DATA_PATH):
+        pytest.skip(f"{EVAL_DATA_PATH!r} doesn't exist.")
+
+    data = pd.concat([pd.read_csv(file) for file in get_csv_files(EVAL_DATA_PATH)])
+    return preprocess(data["text"].astype(str)), data["score"].tolist()
+
+
+PIPELINES = [
+    lambda: make_pipeline(TfidfVectorizer(), LogisticRegression()),
+    lambda: make_pipeline(TfidfVectorizer(sublinear_tf=True), LogisticRegression()),
+    lambda: make_pipeline(TfidfVectorizer(norm="l1", ngram_range=(1, 2)), LinearSVC()),
+    lambda: make_pipeline(TfidfVectorizer(use_idf=False, binary=True), LinearSVC()),
+    lambda: make_pipeline(TfidfVectorizer(), SVC(kernel="linear")),
+]
+
+
+@pytest.mark.parametrize("get_pipeline", PIPELINES)
+def test_scorer_parity(get_pipeline):
+    pipeline = get_pipeline().fit(preprocess(TRAIN_TEXTS), TRAIN_SCORES)
+    scorer = LinearTfidfScorer.from_pipeline(pipeline)
+
+    texts = preprocess(TRAIN_TEXTS + TEST_TEXTS)
+    assert scorer.predict(texts) == pipeline.predict(texts).tolist()
+    assert [scorer.decision_function(text) for text in texts] == pytest.approx(
+        pipeline.decision_function(texts).tolist()
+    )
+
+
+@pytest.mark.parametrize("get_pipeline", PIPELINES[:3])
+def test_scorer_parity_on_eval_data(get_pipeline, eval_texts):
+    texts, scores = eval_texts
+    pipeline = get_pipeline().fit(texts, scores)
+    scorer = LinearTfidfScorer.from_pipeline(pipeline)
+
+    assert scorer.predict(texts) == pipeline.predict(texts).tolist()
+
+
+@pytest.mark.parametrize("classifier", [DecisionTreeClassifier(), SVC(kernel="rbf")])
+def test_non_linear_pipeline_is_not_compiled(classifier):
+    pipeline = make_pipeline(TfidfVectorizer(), classifier)
+    pipeline.fit(preprocess(TRAIN_TEXTS), TRAIN_SCORES)
+
+    assert LinearTfidfScorer.from_pipeline(pipeline) is None
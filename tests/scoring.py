@@ -0,0 +1,91 @@
+import asyncio
+import csv
+import json
+import threading
+
+import pytest
+
+from opinionlens.app import scoring
+from opinionlens.app.exceptions import OperationalError
+from opinionlens.app.jobs import Job
+
+
+class FakeModel:
+    model_id = "fake"
+
+    def batch_predict(self, batch):
+        raise AssertionError("Scoring jobs predict through the inference executor.")
+
+
+class FakeExecutor:
+    """Record the calls and the idle waits of a scoring job, predicting each text as its number."""
+
+    def __init__(self):
+        self.calls = []
+        self.idle_waits = []
+
+    def wait_idle(self, timeout):
+        self.idle_waits.append(timeout)
+        return True
+
+    async def run(self, model, method, payload, endpoint, background=False):
+        self.calls.append((threading.current_thread().name, method, len(payload), endpoint, background))
+        return [int(text) % 2 for text in payload]
+
+
+@pytest.fixture
+def event_loop_thread():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="event-loop")
+    thread.start()
+    yield loop
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+@pytest.fixture
+def fake_executor(monkeypatch, tmp_path):
+    executor = FakeExecutor()
+    monkeypatch.setattr(scoring, "inference_executor", executor)
+    monkeypatch.setattr(scoring.settings.api, "scoring_jobs_path", str(tmp_path))
+    monkeypatch.setattr(scoring.settings.api, "scoring_chunk_size", 2)
+    return executor
+
+
+def write_input(tmp_path, n_texts):
+    input_path = tmp_path / "input.jsonl"
+    input_path.write_text("\n".join(json.dumps({"text": str(i)}) for i in range(n_texts)))
+    return str(input_path)
+
+
+def test_chunks_are_predicted_in_the_background_through_the_executor(fake_executor, event_loop_thread, tmp_path):
+    job = Job("score_file")
+
+    result = scoring.score_file_job(job, FakeModel(), write_input(tmp_path, 5), "text", False, event_loop_thread)
+
+    assert result["processed_texts"] == 5
+    assert fake_executor.calls == [("event-loop", "batch_predict", n, "/jobs", True) for n in (2, 2, 1)]
+    # Each chunk first yields to the interactive predictions, without polling
+    assert fake_executor.idle_waits == [scoring.settings.api.scoring_max_yield_ms / 1000] * 3
+
+    with open(scoring.get_results_path(job.job_id)) as f:
+        rows = list(csv.reader(f))
+    assert rows[1:] == [[str(i), "POSITIVE" if i % 2 else "NEGATIVE"] for i in range(5)]
+
+
+def test_job_fails_once_the_event_loop_is_closed(fake_executor, tmp_path):
+    loop = asyncio.new_event_loop()
+    loop.close()
+
+    with pytest.raises(RuntimeError):
+        scoring.score_file_job(Job("score_file"), FakeModel(), write_input(tmp_path, 2), "text", False, loop)
+
+
+def test_chunk_scheduled_before_the_event_loop_closes_fails_the_job(fake_executor, tmp_path):
+    # Never running, so it closes before it gets to the chunk
+    loop = asyncio.new_event_loop()
+    threading.Timer(0.1, loop.close).start()
+
+    with pytest.raises(OperationalError):
+        scoring.score_file_job(Job("score_file"), FakeModel(), write_input(tmp_path, 2), "text", False, loop)
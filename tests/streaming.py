@@ -0,0 +1,109 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+from opinionlens.app.admission import AdmissionController
+from opinionlens.app.exceptions import ModelNotAvailableError, OverloadedError
+from opinionlens.app.routers import inference
+
+
+class FakeModel:
+    model_id = "m"
+
+
+class FakeRequest:
+    def __init__(self, body: bytes):
+        self.body = body
+
+    async def stream(self):
+        yield self.body
+
+
+class DeletedMidStreamExecutor:
+    """Predict the first chunk, then fail as if the model was deleted meanwhile."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def run(self, model, method, payload, endpoint):
+        self.calls += 1
+        if self.calls > 1:
+            raise ModelNotAvailableError(f"Model {model.model_id!r} isn't loaded.")
+        return [1] * len(payload)
+
+
+class EchoExecutor:
+    async def run(self, model, method, payload, endpoint):
+        return [1] * len(payload)
+
+
+class RecordingController(AdmissionController):
+    """Record the weights of the admitted requests, shedding the requests after the first `capacity`."""
+
+    def __init__(self, capacity):
+        super().__init__("/stream_predict", max_in_flight=10, max_queued=10, max_queue_delay_ms=100.0)
+        self.capacity = capacity
+        self.weights = []
+
+    @asynccontextmanager
+    async def admit(self, weight):
+        if len(self.weights) == self.capacity:
+            raise OverloadedError("Too many inference requests to /stream_predict, try again later.", retry_after=2.5)
+        async with super().admit(weight):
+            self.weights.append(weight)
+            assert self.in_flight == weight
+            yield
+
+
+def stream(body, ndjson=False):
+    async def main():
+        request = FakeRequest(body)
+        return [line async for line in inference._stream_predictions(FakeModel(), request, ndjson=ndjson)]
+
+    return [json.loads(line) for line in "".join(asyncio.run(main())).splitlines()]
+
+
+def test_stream_chunks_are_admitted_by_their_valid_lines(monkeypatch):
+    controller = RecordingController(capacity=3)
+    monkeypatch.setattr(inference.settings.api, "admission_control", True)
+    monkeypatch.setattr(inference.settings.api, "stream_chunk_size", 3)
+    monkeypatch.setattr(inference, "inference_executor", EchoExecutor())
+    monkeypatch.setitem(inference.admission_controllers, "/stream_predict", controller)
+
+    lines = stream(b'"a"\n{"bad": 1}\n"b"\n"c"\n"d"\n"e"\n', ndjson=True)
+
+    assert len(lines) == 6
+    # The invalid line isn't predicted, so it doesn't count
+    assert controller.weights == [2, 3]
+    assert controller.in_flight == 0
+
+
+def test_shed_stream_ends_with_an_error_line_and_a_retry_after(monkeypatch):
+    controller = RecordingController(capacity=1)
+    monkeypatch.setattr(inference.settings.api, "admission_control", True)
+    monkeypatch.setattr(inference.settings.api, "stream_chunk_size", 1)
+    monkeypatch.setattr(inference, "inference_executor", EchoExecutor())
+    monkeypatch.setitem(inference.admission_controllers, "/stream_predict", controller)
+
+    lines = stream(b"great\nawful\n")
+
+    assert lines == [
+        {"line": 1, "prediction": "POSITIVE"},
+        {"error": "OverloadedError: Too many inference requests to /stream_predict, try again later.", "retry_after": 3},
+    ]
+
+
+def test_model_removed_mid_stream_ends_with_an_error_line(monkeypatch):
+    monkeypatch.setattr(inference.settings.api, "stream_chunk_size", 1)
+    monkeypatch.setattr(inference, "inference_executor", DeletedMidStreamExecutor())
+
+    async def main():
+        request = FakeRequest(b"great\nawful\n")
+        return [line async for line in inference._stream_predictions(FakeModel(), request, ndjson=False)]
+
+    lines = [json.loads(line) for line in "".join(asyncio.run(main())).splitlines()]
+
+    assert lines == [
+        {"line": 1, "prediction": "POSITIVE"},
+        {"error": "ModelNotAvailableError: Model 'm' isn't loaded."},
+    ]
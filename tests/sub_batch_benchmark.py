@@ -0,0 +1,72 @@
+"""Benchmark splitting large batches into sub-batches on the inference executor.
+
+Trains a small TF-IDF pipeline, then predicts large batches through the executor for a range
+of sub-batch sizes, reporting the latency per batch and the peak memory allocated meanwhile:
+
+    python tests/sub_batch_benchmark.py [batch_size] [n_batches]
+"""
+import asyncio
+import sys
+import time
+import tracemalloc
+
+from opinionlens.app.cache import prediction_cache
+from opinionlens.app.executors import InferenceExecutor
+from opinionlens.app.models import SklearnModel
+from opinionlens.common.settings import get_settings
+
+from benchmarking import make_texts, saved_pipeline
+
+settings = get_settings()
+
+SUB_BATCH_SIZES = (0, 250, 500, 1000, 2500)
+
+
+def measure(executor: InferenceExecutor, model: SklearnModel, batches: list[list[str]]) -> tuple[float, float]:
+    """Return the latency in milliseconds per batch, and the peak memory allocated in MiB."""
+    async def run():
+        for batch in batches:
+            await executor.run_batch(model, batch, endpoint="/benchmark")
+
+    start_time = time.perf_counter()
+    asyncio.run(run())
+    latency = (time.perf_counter() - start_time) / len(batches) * 1000
+
+    # Tracing slows allocations down, so memory is measured on a separate run
+    tracemalloc.start()
+    asyncio.run(run())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return latency, peak / 1024 ** 2
+
+
+def main():
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    n_batches = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    # Disable the prediction cache, so every call runs the model
+    prediction_cache.max_size = 0
+
+    batches = [make_texts(batch_size) for _ in range(n_batches)]
+
+    with saved_pipeline() as model_path:
+        for fast_path in (True, False):
+            settings.api.fast_path_scoring = fast_path
+            model = SklearnModel("benchmark", model_path)
+
+            print(f"{'Fast path' if fast_path else 'Pipeline'}, batches of {batch_size} texts:")
+            for sub_batch_size in SUB_BATCH_SIZES:
+                executor = InferenceExecutor(
+                    kind="thread",
+                    max_workers=settings.api.inference_workers,
+                    max_queue_size=settings.api.inference_queue_size,
+                    sub_batch_size=sub_batch_size,
+                )
+                try:
+                    latency, peak = measure(executor, model, batches)
+                finally:
+                    executor.shutdown()
+                print(f"  sub-batch size {sub_batch_size or 'off':>5}: {latency:8.1f} ms/batch, {peak:7.1f} MiB peak")
+
+
+if __name__ == "__main__":
+    main()
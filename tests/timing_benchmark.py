@@ -0,0 +1,53 @@
+"""Benchmark the overhead of the per-stage timings on the model hot path.
+
+Trains a small TF-IDF pipeline, then times `predict` and `batch_predict` with the stage timings
+recorded for no calls, the configured sample of calls, and every call:
+
+    python tests/timing_benchmark.py [n_calls]
+"""
+import sys
+import time
+
+from opinionlens.app import timing
+from opinionlens.app.cache import prediction_cache
+from opinionlens.app.models import SklearnModel
+from opinionlens.common.settings import get_settings
+
+from benchmarking import make_texts, saved_pipeline
+
+settings = get_settings()
+
+
+def measure(func, payloads, sample_rate: float) -> float:
+    """Return the time in microseconds per call, recording the stage timings at the sample rate."""
+    settings.api.stage_timing_sample_rate = sample_rate
+    start_time = time.perf_counter()
+    for payload in payloads:
+        with timing.record(timing.sample()):
+            func(payload)
+    return (time.perf_counter() - start_time) / len(payloads) * 1e6
+
+
+def main():
+    n_calls = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    default_rate = settings.api.stage_timing_sample_rate
+    # Disable the prediction cache, so every call runs the model
+    prediction_cache.max_size = 0
+
+    with saved_pipeline() as model_path:
+        for fast_path in (True, False):
+            settings.api.fast_path_scoring = fast_path
+            model = SklearnModel("benchmark", model_path)
+
+            print(f"{'Fast path' if fast_path else 'Pipeline'}:")
+            for label, func, payloads in (
+                ("predict", model.predict, make_texts(n_calls)),
+                ("batch_predict", model.batch_predict, [make_texts(64) for _ in range(n_calls // 64 or 1)]),
+            ):
+                for rate in (0.0, default_rate, 1.0):
+                    latency = measure(func, payloads, rate)
+                    print(f"  {label:>14} at sample rate {rate:4.2f}: {latency:8.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
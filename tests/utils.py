@@ -0,0 +1,93 @@
+import logging
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from opinionlens.common import utils
+from opinionlens.common.utils import RateLimitFilter, get_logger
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(scope="function")
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(utils, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def make_record(msg, *args, level=logging.INFO):
+    return logging.LogRecord("test", level, __file__, 0, msg, args, None)
+
+
+def test_rate_limit_lets_a_burst_through_then_refills(clock):
+    rate_limit = RateLimitFilter(rate=2, burst=2)
+
+    assert [rate_limit.filter(make_record("%d", i)) for i in range(3)] == [True, True, False]
+
+    # Half a second refills one record
+    clock.now = 0.5
+    assert rate_limit.filter(make_record("refilled"))
+    assert not rate_limit.filter(make_record("dropped"))
+
+    # The tokens never exceed the burst
+    clock.now = 100.0
+    assert [bool(rate_limit.filter(make_record("%d", i))) for i in range(3)] == [True, True, False]
+
+
+def test_rate_limit_reports_the_suppressed_records(clock):
+    rate_limit = RateLimitFilter(rate=1, burst=1)
+    rate_limit.filter(make_record("first"))
+    for _ in range(3):
+        rate_limit.filter(make_record("dropped"))
+
+    clock.now = 1.0
+    record = make_record("Model %r was requested.", "m")
+    reported = rate_limit.filter(record)
+
+    assert reported.getMessage() == "Model 'm' was requested. (3 records suppressed by the rate limit)"
+    # The original record is left as is
+    assert record.getMessage() == "Model 'm' was requested."
+
+    clock.now = 2.0
+    assert rate_limit.filter(make_record("next")) is True
+
+
+def test_rate_limit_always_lets_warnings_through(clock):
+    rate_limit = RateLimitFilter(rate=0, burst=1)
+
+    assert not rate_limit.filter(make_record("info"))
+    assert rate_limit.filter(make_record("warning", level=logging.WARNING))
+    assert rate_limit.filter(make_record("error", level=logging.ERROR))
+
+
+def test_forked_child_logs_through_its_own_listener(tmp_path):
+    filename = str(tmp_path / "logs" / "test.log")
+    logger = get_logger("test_forked_child", filename=filename)
+    logger.info("From the parent")
+
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 1
+        try:
+            logger.info("From the child")
+            # The child's listener writes the queued record before it exits
+            utils._stop_listeners()
+            exit_code = 0
+        finally:
+            os._exit(exit_code)
+
+    _, status = os.waitpid(pid, 0)
+    utils._listeners[filename][1].stop()
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    with open(filename) as f:
+        messages = [line.split(": ", 1)[1] for line in f.read().splitlines()]
+    assert sorted(messages) == ["From the child", "From the parent"]